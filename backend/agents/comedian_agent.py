@@ -1,11 +1,13 @@
 """ComedianAgent class for RoboComic backend."""
 
+import threading
+
 import injector
 import structlog
-from autogen import ConversableAgent
 
 from config import settings
 from models import Language
+from utils.usage import record_llm_usage
 
 
 class ComedianAgent:
@@ -16,6 +18,9 @@ class ComedianAgent:
         self.persona = None
         self.style = None
         self.agent = None
+        # Prompt and completion tokens of the agent's client already recorded by _record_usage
+        self._usage_seen = (0, 0)
+        self._usage_lock = threading.Lock()
 
     def _setup_agent(self, persona: dict, display_name: str, lang: str = Language.ENGLISH, temperature: float = None) -> None:
         """Setup the agent with specific persona and language"""
@@ -26,16 +31,47 @@ class ComedianAgent:
 
         temp = temperature if temperature is not None else settings.DEFAULT_TEMPERATURE
 
+        model_config = {"model": settings.LLM_MODEL, "api_key": settings.OPENAI_API_KEY}
+        if settings.LLM_BASE_URL:
+            model_config["base_url"] = settings.LLM_BASE_URL
         llm_config = {
-            "config_list": [{"model": settings.LLM_MODEL, "api_key": settings.OPENAI_API_KEY}],
+            "config_list": [model_config],
             "temperature": temp,
         }
 
+        # autogen is imported on first use to keep it out of API cold start
+        from autogen import ConversableAgent
+
         self.agent = ConversableAgent(
             name=display_name,
             system_message=f"You are {display_name}, a {self.style} comedian. {description}",
             llm_config=llm_config,
             human_input_mode="NEVER",
         )
+        self._usage_seen = (0, 0)
 
         self.logger.debug(f"Created ComedianAgent: {display_name} with style {self.style}, temperature: {temp}")
+
+    def generate_reply(self, messages: list):
+        """Generate the agent's reply to ``messages`` and record the tokens it used as ``duel_turn``."""
+        reply = self.agent.generate_reply(messages=messages)
+        self._record_usage()
+        return reply
+
+    def _record_usage(self) -> None:
+        """Record the tokens the client used since the last call, from its public usage summary (cache hits excluded).
+
+        Hedged duplicates of a turn share the client, so the running total is compared with what was already
+        recorded and every token is counted once, by whichever call sees it first.
+        """
+        client = self.agent.client
+        if client is None:
+            return
+        with self._usage_lock:
+            models = [usage for usage in (client.actual_usage_summary or {}).values() if isinstance(usage, dict)]
+            prompt = sum(usage.get("prompt_tokens") or 0 for usage in models)
+            completion = sum(usage.get("completion_tokens") or 0 for usage in models)
+            seen_prompt, seen_completion = self._usage_seen
+            self._usage_seen = (prompt, completion)
+        if prompt > seen_prompt or completion > seen_completion:
+            record_llm_usage("duel_turn", prompt - seen_prompt, completion - seen_completion)
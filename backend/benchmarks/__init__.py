@@ -0,0 +1 @@
+"""End-to-end load tests for the API against the offline LLM and TTS backends."""
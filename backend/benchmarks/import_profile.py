@@ -0,0 +1,121 @@
+"""Import-time profile of the API entry point, for tracking cold-start regressions.
+
+Imports ``main`` in a fresh interpreter under ``python -X importtime`` and reports the total import time, the
+slowest top-level packages and any module from ``utils.lazy_imports.HEAVY_MODULES`` that was imported eagerly::
+
+    python -m benchmarks.import_profile --output import-profile.json
+    python -m benchmarks.import_profile --compare import-profile.json --budget-ms 1500
+
+Exits non-zero when a heavy module is imported at startup or the total exceeds ``--budget-ms``.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import UTC, datetime
+
+from benchmarks.run import BACKEND_DIR, _git_commit
+
+# Dummy values for the required settings so the profile runs without a .env file
+PROFILE_ENV = {
+    "OPENAI_API_KEY": "profile",
+    "ELEVENLABS_API_KEY": "profile",
+    "COMEDIAN1_VOICE_ID": "profile-voice-1",
+    "COMEDIAN2_VOICE_ID": "profile-voice-2",
+}
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse ``-X importtime`` lines into ``{"module", "self_us", "cumulative_us", "depth"}`` records."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        records.append({"module": module, "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth})
+    return records
+
+
+def profile_import(module: str = "main", top: int = 15) -> dict:
+    """Import ``module`` in a fresh interpreter and summarize where the import time went."""
+    env = {**PROFILE_ENV, **os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    # utils.lazy_imports needs settings, so it is only imported in the child, after the profiled module
+    check = (
+        "import json, sys; from utils.lazy_imports import HEAVY_MODULES; "
+        "print(json.dumps(HEAVY_MODULES)); print(json.dumps(sorted(sys.modules)))"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}; {check}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    records = parse_importtime(result.stderr)
+    heavy, loaded = (json.loads(line) for line in result.stdout.strip().splitlines()[-2:])
+
+    packages: dict[str, int] = defaultdict(int)
+    for record in records:
+        packages[record["module"].split(".")[0]] += record["self_us"]
+    target = next((r for r in records if r["module"] == module), None)
+    return {
+        "module": module,
+        "import_ms": round(target["cumulative_us"] / 1000, 1) if target else None,
+        "process_ms": round(wall * 1000, 1),
+        "modules_imported": len(records),
+        "heavy_modules_loaded": [name for name in heavy if name in loaded],
+        "top_packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to sample; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="Top-level packages to list")
+    parser.add_argument("--output", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the import takes longer than this")
+    args = parser.parse_args()
+
+    profile = min((profile_import(args.module, args.top) for _ in range(args.runs)), key=lambda p: p["import_ms"] or 0)
+    report = {"commit": _git_commit(), "timestamp": datetime.now(UTC).isoformat(), **profile}
+
+    print(f"import {args.module}: {profile['import_ms']} ms ({profile['modules_imported']} modules)")
+    for entry in profile["top_packages"]:
+        print(f"  {entry['package']:<28} {entry['self_ms']:>8.1f} ms")
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+        if before.get("import_ms"):
+            change = (profile["import_ms"] - before["import_ms"]) / before["import_ms"]
+            print(f"vs {before.get('commit', '?')[:12]}: {before['import_ms']} -> {profile['import_ms']} ms ({change:+.1%})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    failures = []
+    if profile["heavy_modules_loaded"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(profile['heavy_modules_loaded'])}")
+    if args.budget_ms is not None and profile["import_ms"] > args.budget_ms:
+        failures.append(f"import took {profile['import_ms']} ms, budget is {args.budget_ms} ms")
+    if failures:
+        sys.exit("Cold-start regression: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
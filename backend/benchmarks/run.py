@@ -0,0 +1,308 @@
+"""Load-test ``main:app`` end to end against the fake LLM and TTS backends.
+
+Starts the OpenAI stub in-process, launches the API with ``uvicorn`` in a subprocess (``LLM_PROVIDER=fake``,
+``TTS_PROVIDER=fake``, rate limits off) and drives each endpoint at increasing concurrency::
+
+    python -m benchmarks.run --concurrency 1,4,16 --requests 32 --output bench.json
+    python -m benchmarks.run --output after.json --compare bench.json
+
+Every run is written as JSON (git commit, settings, and per endpoint and concurrency level: throughput, error
+count and p50/p95/p99 latency) so results from different commits can be compared with ``--compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime
+from itertools import count
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import uvicorn
+
+from fakes.openai_stub import StubConfig, create_app
+
+ENDPOINTS = ["personas", "tts", "judge-show", "generate-show"]
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JUDGE_HISTORY = [
+    {"role": "Comedian_1", "content": "I tried to be a morning person once. The morning filed a restraining order."},
+    {"role": "Comedian_2", "content": "My alarm clock and I are in couples therapy. It says I never listen."},
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile of ``values`` (``q`` in 0-100); 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """Throughput and latency summary (milliseconds) for one endpoint at one concurrency level."""
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 50), 2),
+        "p95_ms": round(1000 * percentile(latencies, 95), 2),
+        "p99_ms": round(1000 * percentile(latencies, 99), 2),
+        "max_ms": round(1000 * max(latencies), 2) if latencies else 0.0,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[dict]:
+    """Pair up matching endpoint/concurrency rows of two result files with the relative change of each metric."""
+    rows = []
+    for endpoint, levels in current["results"].items():
+        for level, stats in levels.items():
+            before = baseline.get("results", {}).get(endpoint, {}).get(level)
+            if before is None:
+                continue
+            row = {"endpoint": endpoint, "concurrency": int(level)}
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                old, new = before[metric], stats[metric]
+                row[metric] = {"before": old, "after": new, "change": round((new - old) / old, 4) if old else None}
+            rows.append(row)
+    return rows
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_llm_stub(config: StubConfig) -> tuple[uvicorn.Server, threading.Thread, int]:
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=0, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, server.servers[0].sockets[0].getsockname()[1]
+
+
+def start_api(port: int, llm_url: str, args: argparse.Namespace, scratch: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "benchmark"),
+        "ELEVENLABS_API_KEY": os.getenv("ELEVENLABS_API_KEY", "benchmark"),
+        "COMEDIAN1_VOICE_ID": os.getenv("COMEDIAN1_VOICE_ID", "benchmark-voice-1"),
+        "COMEDIAN2_VOICE_ID": os.getenv("COMEDIAN2_VOICE_ID", "benchmark-voice-2"),
+        "LLM_PROVIDER": "fake",
+        "LLM_BASE_URL": llm_url,
+        "TTS_PROVIDER": "fake",
+        "RATE_LIMITS_ENABLED": "false",
+        "SHOW_WORKERS": str(args.show_workers),
+        "TTS_CACHE_DIR": os.path.join(scratch, "tts-cache"),
+        "TOPIC_CONTEXT_CACHE_PATH": os.path.join(scratch, "topic-context.sqlite3"),
+        "METRICS_DIR": os.path.join(scratch, "metrics"),
+        "LANGSMITH_TRACING": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+    output = None if args.verbose else subprocess.DEVNULL
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> None:
+    """Wait for ``/health`` to return 200, which also means the show workers have finished warming up."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode} before becoming healthy")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API not healthy after {timeout:.0f}s")
+
+
+def request_factory(endpoint: str, personas: dict, args: argparse.Namespace) -> Callable[[httpx.AsyncClient], Awaitable]:
+    """Build a coroutine factory that sends one request to ``endpoint``; TTS text is unique to defeat the cache."""
+    sequence = count()
+    names = list(personas)
+    comedian1 = {"name": names[0].title(), **personas[names[0]]}
+    comedian2 = {"name": names[1 % len(names)].title(), **personas[names[1 % len(names)]]}
+
+    def personas_request(client):
+        return client.get("/personas")
+
+    def tts_request(client):
+        return client.post(
+            "/tts", json={"text": f"Benchmark line number {next(sequence)}, please laugh.", "role": "Comedian_1"}
+        )
+
+    def judge_request(client):
+        body = {"comedian1_name": "Comedian_1", "comedian2_name": "Comedian_2", "history": JUDGE_HISTORY, "lang": "en"}
+        return client.post("/judge-show", json=body)
+
+    def generate_request(client):
+        body = {
+            "comedian1_persona": comedian1,
+            "comedian2_persona": comedian2,
+            "topic": "airports",
+            "num_rounds": args.rounds,
+        }
+        return client.post("/generate-show", json=body)
+
+    return {
+        "personas": personas_request,
+        "tts": tts_request,
+        "judge-show": judge_request,
+        "generate-show": generate_request,
+    }[endpoint]
+
+
+async def run_level(client: httpx.AsyncClient, send: Callable, concurrency: int, total: int) -> dict:
+    """Send ``total`` requests from ``concurrency`` workers and summarize the latencies of the 2xx responses."""
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await send(client)
+                await response.aread()
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def benchmark(base_url: str, process: subprocess.Popen, args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_until_healthy(client, process, args.startup_timeout)
+        personas = (await client.get("/personas")).json()["personas"]
+        results: dict[str, dict[str, dict]] = {}
+        for endpoint in args.endpoints:
+            send = request_factory(endpoint, personas, args)
+            # One unmeasured request so lazy initialization is not billed to the first level
+            await run_level(client, send, 1, 1)
+            for concurrency in args.concurrency:
+                total = max(args.requests, concurrency)
+                stats = await run_level(client, send, concurrency, total)
+                results.setdefault(endpoint, {})[str(concurrency)] = stats
+                print(
+                    f"{endpoint:>14} c={concurrency:<3} {stats['throughput_rps']:>8.2f} rps  "
+                    f"p50 {stats['p50_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms  "
+                    f"p99 {stats['p99_ms']:>9.1f} ms  errors {stats['errors']}"
+                )
+        return results
+
+
+def print_comparison(rows: list[dict]) -> None:
+    for row in rows:
+        changes = "  ".join(
+            f"{metric} {row[metric]['before']} -> {row[metric]['after']}"
+            + (f" ({row[metric]['change']:+.1%})" if row[metric]["change"] is not None else "")
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+        )
+        print(f"{row['endpoint']:>14} c={row['concurrency']:<3} {changes}")
+
+
+def _int_list(value: str) -> list[int]:
+    return sorted({int(item) for item in value.split(",") if item.strip()})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16], help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per endpoint and level (at least the level)")
+    parser.add_argument("--endpoints", type=lambda v: v.split(","), default=ENDPOINTS, help="Comma-separated subset")
+    parser.add_argument("--rounds", type=int, default=1, help="num_rounds for /generate-show")
+    parser.add_argument("--show-workers", type=int, default=2, help="SHOW_WORKERS for the API process")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="Fake LLM delay before the first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=200)
+    parser.add_argument("--llm-completion-tokens", type=int, default=40)
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--verbose", action="store_true", help="Show the API server's logs")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    stub_config = StubConfig(
+        latency=args.llm_latency_ms / 1000,
+        tokens_per_second=args.llm_tokens_per_second,
+        completion_tokens=args.llm_completion_tokens,
+    )
+    stub, stub_thread, stub_port = start_llm_stub(stub_config)
+    port = _free_port()
+    with tempfile.TemporaryDirectory(prefix="robocomic-bench-") as scratch:
+        process = start_api(port, f"http://127.0.0.1:{stub_port}/v1", args, scratch)
+        try:
+            results = asyncio.run(benchmark(f"http://127.0.0.1:{port}", process, args))
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            stub.should_exit = True
+            stub_thread.join(timeout=5)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "rounds": args.rounds,
+            "show_workers": args.show_workers,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_tokens_per_second": args.llm_tokens_per_second,
+            "llm_completion_tokens": args.llm_completion_tokens,
+            "fake_tts_latency_ms": int(os.getenv("FAKE_TTS_LATENCY_MS", "200")),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(compare(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import os
 # Load environment variables from .env file
 # Use absolute path to ensure .env is found regardless of where the script is run from
 import pathlib
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -42,13 +43,154 @@ except ConfigError as e:
 
 # Optional settings with defaults
 LLM_MODEL = get_optional_env("LLM_MODEL", "gpt-3.5-turbo", "OpenAI model to use for LLM operations")
+LLM_PROVIDER = get_optional_env("LLM_PROVIDER", "openai", "LLM backend (openai or fake)").lower()
+FAKE_LLM_URL = get_optional_env("FAKE_LLM_URL", "http://127.0.0.1:8900/v1", "Base URL of the fake OpenAI server")
+LLM_BASE_URL = get_optional_env(
+    "LLM_BASE_URL", FAKE_LLM_URL if LLM_PROVIDER == "fake" else "", "OpenAI-compatible API base URL (empty for OpenAI)"
+)
 DEFAULT_TEMPERATURE = float(get_optional_env("DEFAULT_TEMPERATURE", "0.9", "Default LLM temperature"))
 DEFAULT_MAX_TOKENS = int(get_optional_env("DEFAULT_MAX_TOKENS", "1000", "Default max tokens for LLM responses"))
+# Used to estimate LLM spend in logs and metrics (defaults are gpt-3.5-turbo list prices)
+LLM_PROMPT_PRICE_PER_MTOK = float(
+    get_optional_env("LLM_PROMPT_PRICE_PER_MTOK", "0.5", "USD per million prompt tokens for cost accounting")
+)
+LLM_COMPLETION_PRICE_PER_MTOK = float(
+    get_optional_env("LLM_COMPLETION_PRICE_PER_MTOK", "1.5", "USD per million completion tokens for cost accounting")
+)
 DEFAULT_LANG = get_optional_env("DEFAULT_LANG", "en", "Default language for LLM operations")
 API_HOST = get_optional_env("API_HOST", "0.0.0.0", "Host for the API server")
 API_PORT = int(get_optional_env("API_PORT", "8000", "Port for the API server"))
 LOG_LEVEL = get_optional_env("LOG_LEVEL", "INFO", "Logging level")
 LOG_FORMAT = get_optional_env("LOG_FORMAT", "json", "Log format (json or human)")
+DUEL_TURN_TIMEOUT = float(get_optional_env("DUEL_TURN_TIMEOUT", "60", "Max seconds a single comedian turn may take"))
+RATE_LIMITS_ENABLED = (
+    get_optional_env("RATE_LIMITS_ENABLED", "true", "Enforce per-client rate limits (disable for load tests)").lower()
+    == "true"
+)
+DUEL_TURN_MAX_ATTEMPTS = int(
+    get_optional_env("DUEL_TURN_MAX_ATTEMPTS", "3", "Attempts at a failed or timed-out duel turn before the duel stops")
+)
+DUEL_TURN_RETRY_WAIT = float(
+    get_optional_env("DUEL_TURN_RETRY_WAIT", "0.5", "Seconds before the first retry of a duel turn (doubles per attempt)")
+)
+# Duel context window: turns each comedian sees verbatim per mode (0 = whole history). Older turns are folded into a
+# rolling LLM summary, DUEL_SUMMARY_BATCH turns per refresh
+DUEL_WINDOW_TURNS_ROAST = int(
+    get_optional_env("DUEL_WINDOW_TURNS_ROAST", "4", "Latest duel turns sent verbatim in roast mode (0 = all)")
+)
+DUEL_WINDOW_TURNS_TOPICAL = int(
+    get_optional_env("DUEL_WINDOW_TURNS_TOPICAL", "6", "Latest duel turns sent verbatim in topical mode (0 = all)")
+)
+DUEL_SUMMARY_BATCH = int(
+    get_optional_env("DUEL_SUMMARY_BATCH", "4", "Turns folded into the rolling duel summary per summary call")
+)
+DUEL_SUMMARY_MAX_WORDS = int(
+    get_optional_env("DUEL_SUMMARY_MAX_WORDS", "120", "Word budget of the rolling summary of older duel turns")
+)
+IO_THREAD_POOL_SIZE = int(
+    get_optional_env("IO_THREAD_POOL_SIZE", "16", "Max threads for blocking LLM/TTS calls made from API endpoints")
+)
+
+# Circuit breakers and bulkheads per upstream (LLM, TTS) in ResilienceService
+CIRCUIT_FAILURE_THRESHOLD = int(
+    get_optional_env("CIRCUIT_FAILURE_THRESHOLD", "5", "Consecutive upstream failures that open its circuit (0 disables)")
+)
+CIRCUIT_RESET_SECONDS = float(
+    get_optional_env("CIRCUIT_RESET_SECONDS", "30", "Seconds an open circuit waits before letting a probe call through")
+)
+CIRCUIT_HALF_OPEN_PROBES = int(
+    get_optional_env("CIRCUIT_HALF_OPEN_PROBES", "1", "Concurrent probe calls allowed while a circuit is half-open")
+)
+LLM_BULKHEAD_SIZE = int(
+    get_optional_env("LLM_BULKHEAD_SIZE", str(max(1, IO_THREAD_POOL_SIZE // 2)), "Max concurrent LLM calls per process")
+)
+TTS_BULKHEAD_SIZE = int(
+    get_optional_env("TTS_BULKHEAD_SIZE", str(max(1, IO_THREAD_POOL_SIZE // 2)), "Max concurrent TTS calls per process")
+)
+BULKHEAD_WAIT_SECONDS = float(
+    get_optional_env("BULKHEAD_WAIT_SECONDS", "1", "Seconds a call waits for a free bulkhead slot before it is rejected")
+)
+
+# Hedged LLM requests: a duplicate call fires when the first is slower than the given latency percentile
+LLM_HEDGING_ENABLED = (
+    get_optional_env("LLM_HEDGING_ENABLED", "false", "Race a duplicate LLM call against slow ones").lower() == "true"
+)
+LLM_HEDGE_PERCENTILE = float(
+    get_optional_env("LLM_HEDGE_PERCENTILE", "95", "Latency percentile of an operation after which its call is hedged")
+)
+LLM_HEDGE_MIN_DELAY = float(get_optional_env("LLM_HEDGE_MIN_DELAY", "0.5", "Minimum seconds before a hedge fires"))
+LLM_HEDGE_BUDGET = float(
+    get_optional_env("LLM_HEDGE_BUDGET", "0.1", "Max extra LLM calls from hedging, as a fraction of all LLM calls")
+)
+
+# Show generation process pool (0 workers means one per CPU)
+SHOW_WORKERS = int(get_optional_env("SHOW_WORKERS", "0", "Process-pool workers for show generation")) or (os.cpu_count() or 1)
+SHOW_WORKER_MAX_TASKS = int(
+    get_optional_env("SHOW_WORKER_MAX_TASKS", "50", "Shows a worker runs before it is recycled (0 disables recycling)")
+)
+PRELOAD_HEAVY_MODULES = (
+    get_optional_env(
+        "PRELOAD_HEAVY_MODULES", "true", "Import autogen/LangChain in the background after startup instead of on first use"
+    ).lower()
+    == "true"
+)
+SHOW_WORKERS_WARM_UP = get_optional_env("SHOW_WORKERS_WARM_UP", "true", "Pre-start show workers on startup").lower() == "true"
+SHOW_JOB_QUEUE_SIZE = int(get_optional_env("SHOW_JOB_QUEUE_SIZE", "100", "Max show jobs waiting for a worker"))
+SHOW_JOB_RESULT_TTL = int(get_optional_env("SHOW_JOB_RESULT_TTL", "3600", "Seconds finished show jobs are kept for polling"))
+
+# ElevenLabs HTTP client
+ELEVENLABS_POOL_SIZE = int(
+    get_optional_env("ELEVENLABS_POOL_SIZE", str(IO_THREAD_POOL_SIZE), "Max pooled keep-alive connections to ElevenLabs")
+)
+ELEVENLABS_CONNECT_TIMEOUT = float(
+    get_optional_env("ELEVENLABS_CONNECT_TIMEOUT", "5", "ElevenLabs connect timeout in seconds")
+)
+ELEVENLABS_READ_TIMEOUT = float(get_optional_env("ELEVENLABS_READ_TIMEOUT", "60", "ElevenLabs read timeout in seconds"))
+TTS_STREAM_CHUNK_SIZE = int(get_optional_env("TTS_STREAM_CHUNK_SIZE", "8192", "Bytes per chunk forwarded by /tts"))
+TTS_BATCH_CONCURRENCY = int(
+    get_optional_env("TTS_BATCH_CONCURRENCY", "4", "Max lines synthesized at once by a single /tts/batch request")
+)
+TTS_BATCH_GAP_MS = int(get_optional_env("TTS_BATCH_GAP_MS", "400", "Silence between lines in stitched show audio"))
+
+# TTS provider
+TTS_PROVIDER = get_optional_env("TTS_PROVIDER", "elevenlabs", "TTS backend (elevenlabs, bark or fake)").lower()
+FAKE_TTS_LATENCY_MS = int(get_optional_env("FAKE_TTS_LATENCY_MS", "200", "Fake TTS delay before the first audio byte"))
+FAKE_TTS_SPEED = float(
+    get_optional_env("FAKE_TTS_SPEED", "10", "Seconds of fake audio produced per wall-clock second after the first byte")
+)
+FAKE_TTS_CHARS_PER_SECOND = float(
+    get_optional_env("FAKE_TTS_CHARS_PER_SECOND", "15", "Speaking rate used to size fake TTS audio")
+)
+BARK_PRELOAD = (
+    get_optional_env("BARK_PRELOAD", "true", "Load Bark weights on startup instead of on first use").lower() == "true"
+)
+BARK_IDLE_RELEASE_SECONDS = int(
+    get_optional_env("BARK_IDLE_RELEASE_SECONDS", "0", "Free Bark weights after this many idle seconds (0 keeps them)")
+)
+BARK_COMEDIAN1_SPEAKER = get_optional_env(
+    "BARK_COMEDIAN1_SPEAKER", "v2/{lang}_speaker_6", "Bark speaker preset for the first comedian (empty for none)"
+)
+BARK_COMEDIAN2_SPEAKER = get_optional_env(
+    "BARK_COMEDIAN2_SPEAKER", "v2/{lang}_speaker_9", "Bark speaker preset for the second comedian (empty for none)"
+)
+BARK_WORKERS = int(
+    get_optional_env(
+        "BARK_WORKERS", "0", "Processes rendering Bark segments in parallel, each with its own weights (0 = in-process)"
+    )
+)
+BARK_SEGMENT_MAX_CHARS = int(
+    get_optional_env("BARK_SEGMENT_MAX_CHARS", "180", "Max characters per Bark segment before a line is split")
+)
+BARK_CROSSFADE_MS = int(get_optional_env("BARK_CROSSFADE_MS", "30", "Crossfade between joined Bark segments"))
+
+# TTS audio cache
+TTS_CACHE_DIR = get_optional_env(
+    "TTS_CACHE_DIR", str(pathlib.Path(tempfile.gettempdir()) / "robocomic-tts-cache"), "Directory for the on-disk TTS cache"
+)
+TTS_CACHE_MEMORY_ITEMS = int(get_optional_env("TTS_CACHE_MEMORY_ITEMS", "256", "Max clips kept in the in-memory TTS cache"))
+TTS_CACHE_MAX_DISK_MB = int(
+    get_optional_env("TTS_CACHE_MAX_DISK_MB", "512", "Max size of the on-disk TTS cache in MB (0 disables)")
+)
 
 # Temperature presets
 TEMPERATURE_PRESETS = {
@@ -58,10 +200,95 @@ TEMPERATURE_PRESETS = {
     "experimental": {"temperature": 1.0},
 }
 
+# Topic context cache (shared across process-pool workers)
+TOPIC_CONTEXT_CACHE_PATH = get_optional_env(
+    "TOPIC_CONTEXT_CACHE_PATH",
+    str(pathlib.Path(tempfile.gettempdir()) / "robocomic-topic-context.sqlite3"),
+    "SQLite file for the topic context cache (empty disables)",
+)
+TOPIC_CONTEXT_CACHE_TTL = int(get_optional_env("TOPIC_CONTEXT_CACHE_TTL", "21600", "Topic context cache TTL in seconds"))
+TOPIC_CONTEXT_CACHE_MAX_ITEMS = int(
+    get_optional_env("TOPIC_CONTEXT_CACHE_MAX_ITEMS", "500", "Max topics kept in the topic context cache")
+)
+
+# Comedianified text cache in front of Bark (memory LRU + optional SQLite tier)
+COMEDIANIFY_CACHE_MEMORY_ITEMS = int(
+    get_optional_env("COMEDIANIFY_CACHE_MEMORY_ITEMS", "1024", "Max rewrites kept in the in-memory comedianify cache")
+)
+COMEDIANIFY_CACHE_PATH = get_optional_env(
+    "COMEDIANIFY_CACHE_PATH", "", "SQLite file for the on-disk comedianify cache (empty disables)"
+)
+COMEDIANIFY_CACHE_MAX_ITEMS = int(
+    get_optional_env("COMEDIANIFY_CACHE_MAX_ITEMS", "10000", "Max rewrites kept in the on-disk comedianify cache")
+)
+
+# Prometheus multiprocess metrics store (shared by the API process and show workers)
+METRICS_DIR = get_optional_env(
+    "METRICS_DIR", str(pathlib.Path(tempfile.gettempdir()) / "robocomic-metrics"), "Directory for multiprocess metric files"
+)
+
 # Validate optional settings
 if LOG_FORMAT not in ["json", "human"]:
     raise ConfigError(f"Invalid LOG_FORMAT: {LOG_FORMAT}. Must be 'json' or 'human'")
 
+if IO_THREAD_POOL_SIZE < 1:
+    raise ConfigError(f"Invalid IO_THREAD_POOL_SIZE: {IO_THREAD_POOL_SIZE}. Must be at least 1")
+
+if SHOW_WORKERS < 1 or SHOW_WORKER_MAX_TASKS < 0:
+    raise ConfigError("Invalid show worker settings. SHOW_WORKERS must be positive and SHOW_WORKER_MAX_TASKS non-negative")
+
+if ELEVENLABS_POOL_SIZE < 1:
+    raise ConfigError(f"Invalid ELEVENLABS_POOL_SIZE: {ELEVENLABS_POOL_SIZE}. Must be at least 1")
+
+if DUEL_TURN_MAX_ATTEMPTS < 1 or DUEL_TURN_RETRY_WAIT < 0:
+    raise ConfigError(
+        "Invalid duel retry settings. DUEL_TURN_MAX_ATTEMPTS must be positive and DUEL_TURN_RETRY_WAIT non-negative"
+    )
+
+if DUEL_WINDOW_TURNS_ROAST < 0 or DUEL_WINDOW_TURNS_TOPICAL < 0 or DUEL_SUMMARY_BATCH < 1 or DUEL_SUMMARY_MAX_WORDS < 1:
+    raise ConfigError(
+        "Invalid duel window settings. DUEL_WINDOW_TURNS_ROAST and DUEL_WINDOW_TURNS_TOPICAL must be non-negative, "
+        "DUEL_SUMMARY_BATCH and DUEL_SUMMARY_MAX_WORDS positive"
+    )
+
+if CIRCUIT_FAILURE_THRESHOLD < 0 or CIRCUIT_RESET_SECONDS <= 0 or CIRCUIT_HALF_OPEN_PROBES < 1:
+    raise ConfigError(
+        "Invalid circuit breaker settings. CIRCUIT_FAILURE_THRESHOLD must be non-negative, CIRCUIT_RESET_SECONDS "
+        "positive and CIRCUIT_HALF_OPEN_PROBES at least 1"
+    )
+
+if LLM_BULKHEAD_SIZE < 1 or TTS_BULKHEAD_SIZE < 1 or BULKHEAD_WAIT_SECONDS < 0:
+    raise ConfigError("Invalid bulkhead settings. Bulkhead sizes must be positive and BULKHEAD_WAIT_SECONDS non-negative")
+
+if not 0 < LLM_HEDGE_PERCENTILE < 100 or LLM_HEDGE_MIN_DELAY < 0 or not 0 <= LLM_HEDGE_BUDGET <= 1:
+    raise ConfigError(
+        "Invalid hedging settings. LLM_HEDGE_PERCENTILE must be between 0 and 100, LLM_HEDGE_MIN_DELAY non-negative "
+        "and LLM_HEDGE_BUDGET between 0 and 1"
+    )
+
+if LLM_PROVIDER not in ["openai", "fake"]:
+    raise ConfigError(f"Invalid LLM_PROVIDER: {LLM_PROVIDER}. Must be 'openai' or 'fake'")
+
+if TTS_PROVIDER not in ["elevenlabs", "bark", "fake"]:
+    raise ConfigError(f"Invalid TTS_PROVIDER: {TTS_PROVIDER}. Must be 'elevenlabs', 'bark' or 'fake'")
+
+if FAKE_TTS_SPEED <= 0 or FAKE_TTS_CHARS_PER_SECOND <= 0:
+    raise ConfigError("Invalid fake TTS settings. FAKE_TTS_SPEED and FAKE_TTS_CHARS_PER_SECOND must be positive")
+
+if BARK_IDLE_RELEASE_SECONDS < 0:
+    raise ConfigError(f"Invalid BARK_IDLE_RELEASE_SECONDS: {BARK_IDLE_RELEASE_SECONDS}. Must be non-negative")
+
+if BARK_WORKERS < 0 or BARK_SEGMENT_MAX_CHARS < 1 or BARK_CROSSFADE_MS < 0:
+    raise ConfigError(
+        "Invalid Bark settings. BARK_WORKERS and BARK_CROSSFADE_MS must be non-negative, BARK_SEGMENT_MAX_CHARS positive"
+    )
+
+if TTS_BATCH_CONCURRENCY < 1 or TTS_BATCH_GAP_MS < 0:
+    raise ConfigError("Invalid TTS batch settings. TTS_BATCH_CONCURRENCY must be positive and TTS_BATCH_GAP_MS non-negative")
+
+if TTS_CACHE_MEMORY_ITEMS < 0 or TTS_CACHE_MAX_DISK_MB < 0:
+    raise ConfigError("Invalid TTS cache size. TTS_CACHE_MEMORY_ITEMS and TTS_CACHE_MAX_DISK_MB must be non-negative")
+
 if not (1 <= API_PORT <= 65535):
     raise ConfigError(f"Invalid API_PORT: {API_PORT}. Must be between 1 and 65535")
 
@@ -1,10 +1,19 @@
 import injector
 import structlog
 
+from config import settings
 from services.agent_manager import AgentManager
 from services.api_service import ApiService
+from services.llm_service import LLMService
+from services.topic_context_cache import TopicContextCache
+from tts.audio_cache import AudioCache
+from tts.bark_model import BarkModel
+from tts.bark_tts_service import BarkTTSService
+from tts.comedianify_cache import ComedianifyCache
 from tts.eleven_tts_service import ElevenTTSService
+from tts.fake_tts_service import FakeTTSService
 from tts.tts_service import TTSService
+from utils.hedging import RequestHedger
 from utils.logger import setup_logger
 from utils.resilience import ResilienceService
 
@@ -17,18 +26,18 @@ class AppContainer(injector.Module):
 
         # Bind services
         binder.bind(AgentManager, to=AgentManager, scope=injector.NoScope)
-        binder.bind(TTSService, to=ElevenTTSService, scope=injector.SingletonScope)
+        tts_services = {"elevenlabs": ElevenTTSService, "bark": BarkTTSService, "fake": FakeTTSService}
+        binder.bind(TTSService, to=tts_services[settings.TTS_PROVIDER], scope=injector.SingletonScope)
+        binder.bind(BarkModel, to=BarkModel, scope=injector.SingletonScope)
+        binder.bind(ComedianifyCache, to=ComedianifyCache, scope=injector.SingletonScope)
+        binder.bind(AudioCache, to=AudioCache, scope=injector.SingletonScope)
         binder.bind(ApiService, to=ApiService, scope=injector.SingletonScope)
+        binder.bind(LLMService, to=LLMService, scope=injector.SingletonScope)
+        binder.bind(TopicContextCache, to=TopicContextCache, scope=injector.SingletonScope)
         binder.bind(ResilienceService, to=ResilienceService, scope=injector.SingletonScope)
-
-        # Only bind UIService if streamlit is available (for local development)
-        try:
-            from ui.streamlit_ui import UIService
-
-            binder.bind(UIService, to=UIService, scope=injector.SingletonScope)
-        except ImportError:
-            # Streamlit not available, skip UIService binding
-            pass
+        binder.bind(RequestHedger, to=RequestHedger, scope=injector.SingletonScope)
+        # UIService is not bound here so the API never imports streamlit; it is an injector.singleton and resolves
+        # through auto-binding when the Streamlit app asks for it
 
 
 container = injector.Injector([AppContainer()])
@@ -0,0 +1 @@
+"""Local stand-ins for external services, for offline development and load testing."""
@@ -0,0 +1,129 @@
+"""OpenAI-compatible chat completions stub with configurable latency and token rate.
+
+Run it next to the API and point the app at it with ``LLM_PROVIDER=fake``::
+
+    python -m fakes.openai_stub --port 8900 --latency-ms 300 --tokens-per-second 50
+
+Only ``/v1/chat/completions`` (plain and streamed) and ``/v1/models`` are implemented. Replies are canned
+but shaped like the real ones: judge prompts get the JSON block the structured output parser expects.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+JUDGE_NAMES = re.compile(r"between (.+?) and (.+?) fairly")
+FILLER = (
+    "So I was at the airport the other day and the security guy asks me if I packed my own bag. "
+    "I said no, my anxiety packed it, that is why it is full of snacks and regret."
+).split()
+
+
+@dataclass
+class StubConfig:
+    latency: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "300")) / 1000
+    tokens_per_second: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    completion_tokens: int = int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "40"))
+
+
+def _reply(messages: list[dict], max_tokens: int) -> list[str]:
+    """Build the reply as a list of tokens (one word each)."""
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    if '"winner"' in prompt:
+        names = JUDGE_NAMES.search(prompt)
+        winner = names.group(1) if names else "Comedian_1"
+        body = json.dumps({"winner": winner, "summary": f"{winner} had the sharper timing tonight."})
+        return [f"```json\n{body}\n```"]
+    return [FILLER[i % len(FILLER)] + " " for i in range(max_tokens)]
+
+
+def create_app(config: StubConfig = None) -> FastAPI:
+    config = config or StubConfig()
+    app = FastAPI(title="Fake OpenAI")
+    app.state.config = config
+    app.state.requests = 0
+
+    @app.get("/v1/models")
+    def list_models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "robocomic"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        messages = body.get("messages", [])
+        tokens = _reply(messages, min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens))
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": sum(len(str(message.get("content", "")).split()) for message in messages),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        per_token = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        await asyncio.sleep(config.latency)
+
+        if not body.get("stream"):
+            await asyncio.sleep(per_token * len(tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+
+        async def _events():
+            def _chunk(delta: dict, finish_reason=None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield _chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(per_token)
+                yield _chunk({"content": token})
+            yield _chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=StubConfig.latency * 1000, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=StubConfig.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=StubConfig.completion_tokens)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(
+        latency=args.latency_ms / 1000, tokens_per_second=args.tokens_per_second, completion_tokens=args.completion_tokens
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,18 @@
 import asyncio
-import io
+import functools
 import os
+import re
 import sys
-import time
-from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import UTC, datetime
-from typing import List
+from typing import List, Optional
 
+import structlog
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
@@ -21,21 +22,48 @@ from config.personas import COMEDIAN_PERSONAS
 from config.settings import COMEDIAN1_VOICE_ID, COMEDIAN2_VOICE_ID, DEFAULT_TEMPERATURE, TEMPERATURE_PRESETS
 from container import container
 from models import (
+    AudioFormat,
     GenerateShowRequest,
     GenerateShowResponse,
     HealthResponse,
+    JobStatus,
     JudgeShowRequest,
     JudgeShowResponse,
     LLMConfig,
     PersonasResponse,
+    ShowJobResponse,
+    ShowJobStatsResponse,
     TemperaturePresetConfig,
+    TTSBatchRequest,
+    TTSBatchResponse,
+    TTSCacheStatsResponse,
+    TTSClip,
     TTSRequest,
     VoiceIdsResponse,
 )
 from services.api_service import ApiService
 from services.llm_service import LLMService
-from utils import general_exception_handler, robocomic_exception_handler, validation_exception_handler
-from utils.exceptions import TTSServiceException
+from services.show_jobs import ShowJob, ShowJobQueue
+from services.worker_pool import ShowWorkerPool, generate_show_worker
+from tts.audio_cache import AudioCache
+from tts.audio_encoding import MEDIA_TYPES, negotiate_audio_format, stitch_audio
+from tts.bark_model import BarkModel
+from utils import (
+    format_sse_event,
+    general_exception_handler,
+    robocomic_exception_handler,
+    validation_exception_handler,
+)
+from utils.exceptions import APIException, TTSServiceException
+from utils.lazy_imports import preload_heavy_modules
+from utils.metrics import (
+    CountingThreadPoolExecutor,
+    GaugeCollector,
+    RequestTimingMiddleware,
+    render_metrics,
+    reset_multiprocess_dir,
+)
+from utils.resilience import ResilienceService
 
 # Production settings
 IS_PRODUCTION = os.getenv("ENVIRONMENT", "development") == "production"
@@ -43,20 +71,57 @@ IS_PRODUCTION = os.getenv("ENVIRONMENT", "development") == "production"
 # Detect if running under pytest (for test CORS)
 IS_TEST = "pytest" in sys.modules
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Drop metric samples from previous runs before show workers start; skipped while sibling API workers are live
+    reset_multiprocess_dir()
+    warm_up_task = asyncio.create_task(show_pool.warm_up()) if settings.SHOW_WORKERS_WARM_UP else None
+    # autogen and LangChain are not imported by main; load them off the event loop so startup is not blocked
+    import_task = (
+        asyncio.get_running_loop().run_in_executor(io_pool, preload_heavy_modules, container.get(structlog.BoundLogger))
+        if settings.PRELOAD_HEAVY_MODULES
+        else None
+    )
+    bark_task = (
+        asyncio.create_task(preload_bark_model())
+        if bark_model is not None and settings.BARK_PRELOAD and bark_model.state == "unloaded"
+        else None
+    )
+    show_jobs.start()
+    yield
+    for task in (warm_up_task, import_task, bark_task):
+        if task is not None:
+            task.cancel()
+    await show_jobs.stop()
+    show_pool.shutdown(wait=False)
+    io_pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def preload_bark_model():
+    try:
+        await asyncio.get_running_loop().run_in_executor(io_pool, bark_model.load)
+    except Exception:
+        # Already logged by BarkModel.load; the first TTS request retries the load
+        pass
+
+
 app = FastAPI(
     title="RoboComic API",
     description="AI Standup Comedy App - RoboComic",
     version="1.0.0",
     docs_url="/docs" if not IS_PRODUCTION else None,
     redoc_url="/redoc" if not IS_PRODUCTION else None,
+    lifespan=lifespan,
 )
 
 # Add exception handlers
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(TTSServiceException, robocomic_exception_handler)
+app.add_exception_handler(APIException, robocomic_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = Limiter(key_func=get_remote_address, enabled=settings.RATE_LIMITS_ENABLED)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -71,64 +136,250 @@ app.add_middleware(
 
 
 # Request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+app.add_middleware(RequestTimingMiddleware)
 
 
 api_service = container.get(ApiService)
 llm_service = container.get(LLMService)
+audio_cache = container.get(AudioCache)
+resilience_service = container.get(ResilienceService)
+bark_model = container.get(BarkModel) if settings.TTS_PROVIDER == "bark" else None
 
-process_pool = ProcessPoolExecutor()
-
-
-def generate_show_worker(body_dict):
-    api_service = container.get(ApiService)
-    request_obj = GenerateShowRequest(**body_dict)
-    result = api_service.generate_show(request_obj)
-    return result
+show_pool = ShowWorkerPool(
+    container.get(structlog.BoundLogger), max_workers=settings.SHOW_WORKERS, max_tasks_per_child=settings.SHOW_WORKER_MAX_TASKS
+)
+show_jobs = ShowJobQueue(
+    container.get(structlog.BoundLogger),
+    runner=lambda body_dict: show_pool.run(generate_show_worker, body_dict),
+    concurrency=settings.SHOW_WORKERS,
+    max_queue=settings.SHOW_JOB_QUEUE_SIZE,
+    result_ttl=settings.SHOW_JOB_RESULT_TTL,
+)
+# Bounded pool for the synchronous LLM/TTS clients so they never block the event loop
+io_pool = CountingThreadPoolExecutor(max_workers=settings.IO_THREAD_POOL_SIZE, thread_name_prefix="blocking-io")
 
 
 @app.post("/generate-show", response_model=GenerateShowResponse)
 @limiter.limit("2/minute")
 async def generate_show_api(request: Request, body: GenerateShowRequest):
-    loop = asyncio.get_running_loop()
-    body_dict = body.model_dump()
-    result = await loop.run_in_executor(process_pool, generate_show_worker, body_dict)
+    result = await show_pool.run(generate_show_worker, body.model_dump())
     return result
 
 
+@app.post("/generate-show/stream")
+@limiter.limit("2/minute")
+async def generate_show_stream_api(request: Request, body: GenerateShowRequest):
+    """Stream a comedy duel as Server-Sent Events, one event per message, ending with the full history."""
+
+    def event_stream():
+        for event, data in api_service.stream_show(body):
+            yield format_sse_event(event, data)
+
+    # Sync generator is iterated in Starlette's threadpool, so the duel never blocks the event loop
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp, UTC).isoformat() if timestamp is not None else None
+
+
+def _job_response(job: ShowJob) -> ShowJobResponse:
+    return ShowJobResponse(
+        job_id=job.id,
+        status=job.status,
+        position=show_jobs.position(job),
+        created_at=_iso(job.created_at),
+        started_at=_iso(job.started_at),
+        finished_at=_iso(job.finished_at),
+        result=job.result,
+        error=job.error,
+    )
+
+
+def _get_job_or_404(job_id: str) -> ShowJob:
+    job = show_jobs.get(job_id)
+    if job is None:
+        raise APIException(message="Show job not found or expired", status_code=404, error_code="SHOW_JOB_NOT_FOUND")
+    return job
+
+
+@app.post("/generate-show/jobs", response_model=ShowJobResponse, status_code=202)
+@limiter.limit("2/minute")
+async def submit_show_job(request: Request, body: GenerateShowRequest):
+    """Queue a show for generation and return a job id to poll or subscribe to."""
+    job = show_jobs.submit(body.model_dump())
+    return _job_response(job)
+
+
+@app.get("/generate-show/jobs/stats", response_model=ShowJobStatsResponse)
+def get_show_job_stats():
+    """Get queue depth, wait time and run time of show jobs."""
+    return ShowJobStatsResponse(**show_jobs.stats())
+
+
+@app.get("/generate-show/jobs/{job_id}", response_model=ShowJobResponse)
+@limiter.limit("60/minute")
+async def get_show_job(request: Request, job_id: str):
+    """Poll a show job; the result is included once it has completed."""
+    return _job_response(_get_job_or_404(job_id))
+
+
+@app.get("/generate-show/jobs/{job_id}/events")
+async def subscribe_show_job(job_id: str):
+    """Subscribe to a show job as Server-Sent Events, ending with its final state."""
+    job = _get_job_or_404(job_id)
+
+    async def event_stream():
+        yield format_sse_event("status", _job_response(job).model_dump(mode="json"))
+        while not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+        event = "done" if job.status == JobStatus.COMPLETED else "error"
+        yield format_sse_event(event, _job_response(job).model_dump(mode="json"))
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/judge-show", response_model=JudgeShowResponse)
 @limiter.limit("2/minute")
 async def judge_show(request: Request, body: JudgeShowRequest):
     """Judge a comedy duel and return the winner and a summary using LLM."""
-    winner, summary = llm_service.judge_show(
-        comedian1_name=body.comedian1_name,
-        comedian2_name=body.comedian2_name,
-        history=[msg.model_dump() for msg in body.history],
-        lang=body.lang,
+    loop = asyncio.get_running_loop()
+    winner, summary = await loop.run_in_executor(
+        io_pool,
+        functools.partial(
+            llm_service.judge_show,
+            comedian1_name=body.comedian1_name,
+            comedian2_name=body.comedian2_name,
+            history=[msg.model_dump() for msg in body.history],
+            lang=body.lang,
+        ),
     )
     return JudgeShowResponse(winner=winner, summary=summary)
 
 
 @app.post("/tts")
-@limiter.limit("4/10 minutes")
 async def tts_api(request: Request, body: TTSRequest):
-    audio_result = api_service.tts(body)
-    if isinstance(audio_result, tuple) and len(audio_result) == 2:
-        audio_array, sample_rate = audio_result
-        import soundfile as sf
-
-        buf = io.BytesIO()
-        sf.write(buf, audio_array, sample_rate, format="WAV")
-        buf.seek(0)
-        return StreamingResponse(buf, media_type="audio/wav")
-    else:
-        return StreamingResponse(io.BytesIO(audio_result), media_type="audio/wav")
+    audio_format = api_service.resolve_audio_format(body, negotiate_audio_format(body.format, request.headers.get("accept")))
+    headers = {"Vary": "Accept"}
+    # Cache hits cost nothing upstream, so they bypass the TTS rate limit; the lookup may read disk, so it runs
+    # on the I/O pool rather than the event loop
+    cached = await asyncio.get_running_loop().run_in_executor(io_pool, api_service.cached_tts, body, audio_format)
+    if cached is not None:
+        headers["X-TTS-Cache"] = "hit"
+        return Response(cached, media_type=MEDIA_TYPES[audio_format], headers=headers)
+    return await synthesize_tts(request=request, body=body, audio_format=audio_format, headers=headers)
+
+
+@limiter.limit("4/10 minutes")
+async def synthesize_tts(request: Request, body: TTSRequest, audio_format: AudioFormat, headers: dict):
+    loop = asyncio.get_running_loop()
+    chunks = api_service.tts_stream(body, audio_format)
+    # Pull the first chunk before responding so provider errors still map to JSON error responses
+    first = await loop.run_in_executor(io_pool, next, chunks, None)
+    return StreamingResponse(_drain_tts_stream(chunks, first), media_type=MEDIA_TYPES[audio_format], headers=headers)
+
+
+async def _drain_tts_stream(chunks, first: Optional[bytes]):
+    loop = asyncio.get_running_loop()
+    try:
+        chunk = first
+        while chunk is not None:
+            yield chunk
+            chunk = await loop.run_in_executor(io_pool, next, chunks, None)
+    finally:
+        # Closing on disconnect stops synthesis and discards the partial cache entry
+        await loop.run_in_executor(io_pool, chunks.close)
+
+
+@app.post("/tts/batch", response_model=TTSBatchResponse)
+async def tts_batch_api(request: Request, body: TTSBatchRequest):
+    """Synthesize a whole show, returning a manifest of cached clips or, with ``stitch``, one audio track."""
+    audio_format = api_service.resolve_audio_format(body, negotiate_audio_format(body.format, request.headers.get("accept")))
+    # Like /tts, a show whose lines are all cached bypasses the rate limit
+    if await asyncio.get_running_loop().run_in_executor(io_pool, api_service.batch_cached, body, audio_format):
+        return await render_tts_batch(body, audio_format)
+    return await synthesize_tts_batch(request=request, body=body, audio_format=audio_format)
+
+
+@limiter.limit("2/10 minutes")
+async def synthesize_tts_batch(request: Request, body: TTSBatchRequest, audio_format: AudioFormat):
+    return await render_tts_batch(body, audio_format)
+
+
+async def render_tts_batch(body: TTSBatchRequest, audio_format: AudioFormat):
+    loop = asyncio.get_running_loop()
+    clips = await loop.run_in_executor(io_pool, api_service.tts_batch, body, audio_format)
+    if body.stitch:
+        track = await loop.run_in_executor(
+            io_pool, stitch_audio, [clip["audio"] for clip in clips], audio_format, settings.TTS_BATCH_GAP_MS / 1000
+        )
+        return Response(track, media_type=MEDIA_TYPES[audio_format], headers={"Vary": "Accept"})
+    return TTSBatchResponse(
+        format=audio_format,
+        media_type=MEDIA_TYPES[audio_format],
+        clips=[
+            TTSClip(
+                index=clip["index"],
+                role=clip["role"],
+                voice_id=clip["voice_id"],
+                url=f"/tts/clips/{clip['key']}.{audio_format.value}",
+                size=len(clip["audio"]),
+                cached=clip["cached"],
+            )
+            for clip in clips
+        ],
+    )
+
+
+# Manifest clip ids are "<cache key>.<format>"
+TTS_CLIP_ID = re.compile(rf"([0-9a-f]{{64}})\.({'|'.join(fmt.value for fmt in AudioFormat)})")
+
+
+@app.get("/tts/clips/{clip_id}")
+def get_tts_clip(clip_id: str):
+    """Serve a clip listed in a /tts/batch manifest."""
+    match = TTS_CLIP_ID.fullmatch(clip_id)
+    data = audio_cache.get(match.group(1)) if match else None
+    if data is None:
+        raise APIException(message="Clip not found", status_code=404, error_code="TTS_CLIP_NOT_FOUND")
+    return Response(
+        data, media_type=MEDIA_TYPES[AudioFormat(match.group(2))], headers={"Cache-Control": "public, max-age=86400"}
+    )
+
+
+@app.get("/tts/cache-stats", response_model=TTSCacheStatsResponse)
+def get_tts_cache_stats():
+    """Get hit/miss counters and usage of the TTS audio cache."""
+    return TTSCacheStatsResponse(**audio_cache.stats())
+
+
+def _pool_gauges():
+    job_stats = show_jobs.stats()
+    return [
+        ("robocomic_show_pool_in_flight", "Shows currently running in the process pool", show_pool.in_flight),
+        ("robocomic_show_pool_workers", "Configured show worker processes", show_pool.max_workers),
+        ("robocomic_show_jobs_queue_depth", "Show jobs waiting for a worker", job_stats["queue_depth"]),
+        ("robocomic_show_jobs_running", "Show jobs currently running", job_stats["running"]),
+        ("robocomic_io_pool_queue_depth", "Blocking LLM/TTS calls waiting for a thread", io_pool.queued),
+        ("robocomic_io_pool_in_flight", "Blocking LLM/TTS calls running on a thread", io_pool.running),
+    ]
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics aggregated across the API process and show workers."""
+    body, content_type = render_metrics(GaugeCollector(_pool_gauges))
+    return Response(content=body, media_type=content_type)
 
 
 @app.get("/personas", response_model=PersonasResponse)
@@ -139,7 +390,19 @@ def get_personas(request: Request):
 
 @app.api_route("/health", methods=["GET", "HEAD", "OPTIONS"], response_model=HealthResponse)
 async def health_check():
-    return HealthResponse(status="healthy", version="1.0.0", timestamp=datetime.now(UTC).isoformat())
+    # Report 503 while show workers or the Bark model are still warming up so the first request is not a cold one
+    ready = show_pool.ready and (bark_model is None or bark_model.ready)
+    health = HealthResponse(
+        status="healthy" if ready else "starting",
+        version="1.0.0",
+        timestamp=datetime.now(UTC).isoformat(),
+        workers=show_pool.state,
+        tts_model=bark_model.state if bark_model is not None else None,
+        circuits=resilience_service.circuit_states(),
+    )
+    if not ready:
+        return JSONResponse(status_code=503, content=health.model_dump())
+    return health
 
 
 @app.get("/llm-config", response_model=LLMConfig)
@@ -1,17 +1,25 @@
 from .api_models import (
+    AudioFormat,
     ChatMessage,
     ErrorResponse,
     GenerateShowRequest,
     GenerateShowResponse,
     HealthResponse,
+    JobStatus,
     JudgeShowRequest,
     JudgeShowResponse,
     Language,
     LLMConfig,
     Mode,
     PersonasResponse,
+    ShowJobResponse,
+    ShowJobStatsResponse,
     TemperaturePreset,
     TemperaturePresetConfig,
+    TTSBatchRequest,
+    TTSBatchResponse,
+    TTSCacheStatsResponse,
+    TTSClip,
     TTSRequest,
     VoiceIdsResponse,
 )
@@ -32,4 +40,12 @@ __all__ = [
     "VoiceIdsResponse",
     "JudgeShowRequest",
     "JudgeShowResponse",
+    "TTSCacheStatsResponse",
+    "JobStatus",
+    "ShowJobResponse",
+    "ShowJobStatsResponse",
+    "AudioFormat",
+    "TTSBatchRequest",
+    "TTSClip",
+    "TTSBatchResponse",
 ]
@@ -9,11 +9,24 @@ class Language(str, Enum):
     POLISH = "pl"
 
 
+class AudioFormat(str, Enum):
+    WAV = "wav"
+    MP3 = "mp3"
+    OPUS = "opus"
+
+
 class Mode(str, Enum):
     TOPICAL = "topical"
     ROAST = "roast"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class TemperaturePreset(str, Enum):
     CONSERVATIVE = "conservative"
     BALANCED = "balanced"
@@ -62,6 +75,12 @@ class TTSRequest(BaseModel):
     text: str = Field(..., description="Text to convert to speech")
     lang: Language = Field(default=Language.ENGLISH, description="Language for TTS")
     voice_id: Optional[str] = Field(default=None, description="Voice ID to use for TTS")
+    role: Optional[str] = Field(
+        default=None, description="Speaker role (Comedian_1 or Comedian_2); picks that comedian's voice when voice_id is unset"
+    )
+    format: Optional[AudioFormat] = Field(
+        default=None, description="Audio format; overrides the Accept header, defaults to the provider's native format"
+    )
 
     @field_validator("text")
     @classmethod
@@ -82,6 +101,8 @@ class GenerateShowResponse(BaseModel):
     history: List[ChatMessage] = Field(..., description="Chat history of the comedy duel")
     success: bool = Field(default=True, description="Whether the request was successful")
     message: Optional[str] = Field(default=None, description="Optional message")
+    turns_completed: int = Field(default=0, description="Comedian turns in the history")
+    incomplete: bool = Field(default=False, description="Whether a turn failed for good and the show ended early")
 
 
 class ErrorResponse(BaseModel):
@@ -98,6 +119,13 @@ class HealthResponse(BaseModel):
     status: str = Field(..., description="Health status")
     version: str = Field(..., description="API version")
     timestamp: str = Field(..., description="Current timestamp")
+    workers: Optional[str] = Field(default=None, description="Show worker pool state (cold, warming or ready)")
+    tts_model: Optional[str] = Field(
+        default=None, description="Bark model state (unloaded, loading, ready or failed) when Bark is the TTS provider"
+    )
+    circuits: Optional[Dict[str, str]] = Field(
+        default=None, description="Circuit breaker state per upstream (closed, half_open or open) in the API process"
+    )
 
 
 class VoiceIdsResponse(BaseModel):
@@ -115,3 +143,64 @@ class JudgeShowRequest(BaseModel):
 class JudgeShowResponse(BaseModel):
     winner: str = Field(..., description="Name of the winning comedian")
     summary: str = Field(..., description="One-sentence summary or justification for the winner")
+
+
+class TTSBatchRequest(BaseModel):
+    history: List[ChatMessage] = Field(..., description="Show history as returned by /generate-show")
+    lang: Language = Field(default=Language.ENGLISH, description="Language for TTS")
+    format: Optional[AudioFormat] = Field(
+        default=None, description="Audio format; overrides the Accept header, defaults to the provider's native format"
+    )
+    stitch: bool = Field(default=False, description="Return one stitched track instead of a manifest of clips")
+
+    @field_validator("history")
+    @classmethod
+    def validate_history(cls, v):
+        if len(v) > 100:
+            raise ValueError("History too long (max 100 messages)")
+        return v
+
+
+class TTSClip(BaseModel):
+    index: int = Field(..., description="Position of the line in the submitted history")
+    role: str = Field(..., description="Role of the speaker")
+    voice_id: Optional[str] = Field(default=None, description="Voice ID used for the line")
+    url: str = Field(..., description="Where to fetch the cached clip")
+    size: int = Field(..., description="Clip size in bytes")
+    cached: bool = Field(..., description="Whether the clip was already cached before this request")
+
+
+class TTSBatchResponse(BaseModel):
+    format: AudioFormat = Field(..., description="Format of every clip")
+    media_type: str = Field(..., description="Media type of every clip")
+    clips: List[TTSClip] = Field(..., description="One entry per spoken line, in show order")
+
+
+class TTSCacheStatsResponse(BaseModel):
+    memory_hits: int = Field(..., description="Requests served from the in-memory audio cache")
+    disk_hits: int = Field(..., description="Requests served from the on-disk audio cache")
+    misses: int = Field(..., description="Requests that required a call to the TTS provider")
+    memory_items: int = Field(..., description="Clips currently held in memory")
+    disk_bytes: int = Field(..., description="Bytes currently used by the on-disk cache")
+
+
+class ShowJobResponse(BaseModel):
+    job_id: str = Field(..., description="Identifier to poll or subscribe to")
+    status: JobStatus = Field(..., description="Current job status")
+    position: Optional[int] = Field(default=None, description="Position in the queue while the job is waiting")
+    created_at: str = Field(..., description="When the job was accepted")
+    started_at: Optional[str] = Field(default=None, description="When a worker picked the job up")
+    finished_at: Optional[str] = Field(default=None, description="When the job finished")
+    result: Optional[GenerateShowResponse] = Field(default=None, description="Generated show once completed")
+    error: Optional[str] = Field(default=None, description="Error message if the job failed")
+
+
+class ShowJobStatsResponse(BaseModel):
+    queue_depth: int = Field(..., description="Jobs waiting for a worker")
+    running: int = Field(..., description="Jobs currently running")
+    completed: int = Field(..., description="Jobs completed since startup")
+    failed: int = Field(..., description="Jobs failed since startup")
+    avg_wait_seconds: float = Field(..., description="Average time jobs spent queued")
+    max_wait_seconds: float = Field(..., description="Longest time a job spent queued")
+    avg_run_seconds: float = Field(..., description="Average job run time")
+    max_run_seconds: float = Field(..., description="Longest job run time")
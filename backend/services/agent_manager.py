@@ -1,16 +1,102 @@
 """AgentManager service for RoboComic backend."""
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
 import injector
 import structlog
-from autogen import GroupChat, GroupChatManager
-from langsmith import traceable
 
 from agents.comedian_agent import ComedianAgent
 from config import settings
 from models import Language, Mode
-from services.prompt_templates import COMEDIAN_PROMPT_TEMPLATE
+from services.llm_service import LLMService
+from services.prompt_templates import COMEDIAN_PROMPT_TEMPLATE, DUEL_SUMMARY_PREFIX
+from utils.exceptions import AgentException, UpstreamUnavailableException
+from utils.metrics import RETRIES, stage_timer
 from utils.resilience import ResilienceService
 
+# Name used for the opening prompt in the duel history (kept from the former GroupChatManager)
+MANAGER_ROLE = "chat_manager"
+# Agent names, used as message roles and to pick each comedian's TTS voice
+COMEDIAN1_ROLE = "Comedian_1"
+COMEDIAN2_ROLE = "Comedian_2"
+# How often a waiting turn checks for cancellation
+CANCEL_POLL_INTERVAL = 0.25
+# Upper bound for the backoff between attempts at the same turn
+MAX_TURN_RETRY_WAIT = 8.0
+
+
+@dataclass
+class DuelCheckpoint:
+    """Duel state as of the last completed turn.
+
+    ``iter_duel`` appends every message as soon as its turn succeeds, so handing the same checkpoint to a new
+    ``iter_duel`` call continues the duel after that turn instead of starting over.
+    """
+
+    history: list = field(default_factory=list)
+    retries: int = 0
+    # Comedian turns the duel is meant to have, set when it starts
+    turns_planned: int = 0
+    # Rolling summary of the first ``summarized`` turns, which are no longer sent verbatim
+    summary: str = ""
+    summarized: int = 0
+
+    @property
+    def turns_done(self) -> int:
+        # The opening prompt is not a turn
+        return max(len(self.history) - 1, 0)
+
+    @property
+    def complete(self) -> bool:
+        return self.turns_done >= self.turns_planned
+
+
+@dataclass
+class DuelWindow:
+    """The part of the duel history a comedian is shown on its turn.
+
+    Each turn sees the opening prompt, the rolling summary of older turns and the turns since, verbatim. Once
+    ``turns + batch`` turns are unsummarized, all but the latest ``turns`` are folded into the summary with one
+    short LLM call. So a turn sees between ``turns`` and ``turns + batch - 1`` turns verbatim plus a summary of
+    bounded length, and later turns cost about as much as early ones. ``turns=0`` sends the whole history.
+    """
+
+    turns: int
+    batch: int
+    lang: str = Language.ENGLISH
+
+    @classmethod
+    def for_mode(cls, mode: str, lang: str) -> "DuelWindow":
+        turns = settings.DUEL_WINDOW_TURNS_ROAST if mode == Mode.ROAST else settings.DUEL_WINDOW_TURNS_TOPICAL
+        return cls(turns=turns, batch=settings.DUEL_SUMMARY_BATCH, lang=lang)
+
+    def due(self, checkpoint: DuelCheckpoint) -> list:
+        """Turns to fold into the summary before the next turn, if a refresh is due."""
+        unsummarized = checkpoint.history[1 + checkpoint.summarized :]
+        if not self.turns or len(unsummarized) < self.turns + self.batch:
+            return []
+        return unsummarized[: -self.turns]
+
+    def apply(self, checkpoint: DuelCheckpoint) -> list:
+        """Messages for the next turn."""
+        history = checkpoint.history
+        if not checkpoint.summarized:
+            return list(history)
+        summary = {"role": MANAGER_ROLE, "content": f"{DUEL_SUMMARY_PREFIX[self.lang]}\n{checkpoint.summary}"}
+        return history[:1] + [summary] + history[1 + checkpoint.summarized :]
+
+
+def fallback_summary(summary: str, turns: list, max_words: int) -> str:
+    """Previous summary plus the new turns, cut to the last ``max_words`` words; used when no LLM summary is available."""
+    words = " ".join([summary, *(f"{msg['role']}: {msg['content']}" for msg in turns)]).split()
+    return " ".join(words[-max_words:])
+
 
 class AgentManager:
     @injector.inject
@@ -18,49 +104,40 @@ class AgentManager:
         self,
         logger: structlog.BoundLogger,
         resilience_service: ResilienceService,
+        llm_service: LLMService = None,
     ):
         self.logger = logger
         self.resilience_service = resilience_service
-        self.history = []
+        self.llm_service = llm_service
 
-    def reset_agents(self, temperature: float = None, persona1: dict = None, persona2: dict = None) -> None:
-        self.logger.debug(
-            f"Resetting agents: {getattr(self, 'comedian1_name', 'Comedian_1')} and {getattr(self, 'comedian2_name', 'Comedian_2')}"
-        )
-        self.comedian1 = ComedianAgent(self.logger)
-        self.comedian1._setup_agent(persona1, "Comedian_1", self.lang, temperature)
-        self.comedian2 = ComedianAgent(self.logger)
-        self.comedian2._setup_agent(persona2, "Comedian_2", self.lang, temperature)
+    def _create_agents(
+        self, lang: str, temperature: float = None, persona1: dict = None, persona2: dict = None
+    ) -> tuple[ComedianAgent, ComedianAgent]:
+        comedian1 = ComedianAgent(self.logger)
+        comedian1._setup_agent(persona1, COMEDIAN1_ROLE, lang, temperature)
+        comedian2 = ComedianAgent(self.logger)
+        comedian2._setup_agent(persona2, COMEDIAN2_ROLE, lang, temperature)
+        return comedian1, comedian2
 
-    def set_personas(self, persona1: dict, persona2: dict, lang: str = None) -> None:
-        self.logger.info(
-            f"Setting personas: {persona1.get('name', 'Comedian_1')} vs {persona2.get('name', 'Comedian_2')}, lang={lang or self.lang}"
-        )
-        self.comedian1_name = persona1.get("name", "Comedian_1")
-        self.comedian2_name = persona2.get("name", "Comedian_2")
-        if lang is not None:
-            self.lang = lang
-        self.reset_agents(persona1=persona1, persona2=persona2)
-
-    def _format_initial_prompt(self, mode, topic, lang, context):
+    def _format_initial_prompt(self, mode, topic, lang, context, comedian: ComedianAgent):
         if mode == Mode.TOPICAL:
             if context and context.strip():
                 return COMEDIAN_PROMPT_TEMPLATE[lang]["topical_with_context"].format(
-                    name=self.comedian1.name,
-                    style=self.comedian1.style,
+                    name=comedian.name,
+                    style=comedian.style,
                     topic=topic or ("anything" if lang == Language.ENGLISH else "cokolwiek"),
                     context=context,
                 )
             else:
                 return COMEDIAN_PROMPT_TEMPLATE[lang]["topical_without_context"].format(
-                    name=self.comedian1.name,
-                    style=self.comedian1.style,
+                    name=comedian.name,
+                    style=comedian.style,
                     topic=topic or ("anything" if lang == Language.ENGLISH else "cokolwiek"),
                 )
         else:
             return COMEDIAN_PROMPT_TEMPLATE[lang][mode].format(
-                name=self.comedian1.name,
-                style=self.comedian1.style,
+                name=comedian.name,
+                style=comedian.style,
                 topic=topic or ("anything" if lang == Language.ENGLISH else "cokolwiek"),
             )
 
@@ -74,46 +151,206 @@ class AgentManager:
         temperature: float = None,
         persona1: dict = None,
         persona2: dict = None,
+        checkpoint: Optional[DuelCheckpoint] = None,
     ) -> list:
+        """Run a whole comedy duel and return its history.
+
+        Failed turns are retried on their own (see ``iter_duel``). If a turn still fails, the messages produced
+        so far are returned instead of a canned fallback, and the ``checkpoint`` passed in is left incomplete
+        (see ``DuelCheckpoint.complete``) so the caller can tell a short show from a finished one.
+        """
+        checkpoint = checkpoint if checkpoint is not None else DuelCheckpoint()
+        history = checkpoint.history
+        try:
+            for _ in self.iter_duel(
+                mode,
+                topic=topic,
+                max_rounds=max_rounds,
+                lang=lang,
+                context=context,
+                temperature=temperature,
+                persona1=persona1,
+                persona2=persona2,
+                checkpoint=checkpoint,
+            ):
+                pass
+        except Exception as e:
+            self.logger.error(f"Error running duel after {len(history)} messages: {e}")
+            if not any(msg["role"] != MANAGER_ROLE for msg in history):
+                # Return a minimal conversation to prevent frontend issues
+                return [
+                    {"role": "system", "content": "Conversation failed to generate properly."},
+                    {"role": COMEDIAN1_ROLE, "content": "Sorry, I'm having technical difficulties right now."},
+                    {"role": COMEDIAN2_ROLE, "content": "Yeah, let's try again later!"},
+                ]
+        self.logger.info(f"Duel completed: {len(history)} messages generated, {checkpoint.retries} turn retries")
+        return history
+
+    def iter_duel(
+        self,
+        mode: str,
+        topic: str = None,
+        max_rounds: int = 2,
+        lang: str = "en",
+        context: str = "",
+        temperature: float = None,
+        persona1: dict = None,
+        persona2: dict = None,
+        cancel_event: Optional[threading.Event] = None,
+        turn_timeout: Optional[float] = None,
+        checkpoint: Optional[DuelCheckpoint] = None,
+    ) -> Iterator[dict]:
+        """Alternate the two comedians turn by turn, yielding each message as soon as it is produced.
+
+        The opening prompt is yielded first. The duel has ``max_rounds * 4`` messages including the
+        prompt, matching the former GroupChat budget. Setting ``cancel_event`` stops the duel before the
+        next turn (or while waiting on one); a turn that takes longer than ``turn_timeout`` seconds raises
+        ``AgentException``. Closing the generator early also stops the duel.
+
+        Every completed turn is recorded in ``checkpoint``. A failed or timed-out turn is retried on its own,
+        up to ``DUEL_TURN_MAX_ATTEMPTS`` times, from that checkpoint; turns already played are never redone. A
+        checkpoint that already holds messages resumes the duel after its last turn without yielding them again.
+
+        Each turn sees only the mode's ``DuelWindow`` of the history; the checkpoint keeps every message.
+        """
+        checkpoint = checkpoint if checkpoint is not None else DuelCheckpoint()
         self.logger.info(
             f"Starting duel: mode={mode}, topic={topic}, max_rounds={max_rounds}, lang={lang}, temperature={temperature}"
+            + (f", resuming after turn {checkpoint.turns_done}" if checkpoint.history else "")
         )
-        self.reset_agents(temperature, persona1=persona1, persona2=persona2)
-        agents = [
-            self.comedian1.agent,
-            self.comedian2.agent,
-        ]
-        initial_prompt = self._format_initial_prompt(mode, topic, lang, context)
-        group_chat = GroupChat(agents=agents, messages=[], max_round=max_rounds * 4, speaker_selection_method="round_robin")
-
-        manager = GroupChatManager(
-            groupchat=group_chat,
-            llm_config={"config_list": [{"model": settings.LLM_MODEL, "api_key": settings.OPENAI_API_KEY}]},
-        )
+        turn_timeout = turn_timeout if turn_timeout is not None else settings.DUEL_TURN_TIMEOUT
+        # Agents are local to this call so concurrent duels on a shared manager do not clobber each other
+        comedians = self._create_agents(lang, temperature, persona1=persona1, persona2=persona2)
+        window = DuelWindow.for_mode(mode, lang)
+        history = checkpoint.history
+        if not history:
+            initial_prompt = self._format_initial_prompt(mode, topic, lang, context, comedian=comedians[0])
+            history.append({"role": MANAGER_ROLE, "content": initial_prompt})
+            yield history[0]
 
-        # Use resilience at conversation level with better error handling
-        @traceable
-        @self.resilience_service.resilient_llm_call()
-        def _run_chat():
-            chat_result = manager.initiate_chat(
-                self.comedian1.agent, message=initial_prompt, max_turns=max_rounds * 4, summary_method="last_msg"
-            )
-            duel_history = []
-            for msg in chat_result.chat_history:
-                role = msg.get("name") or msg.get("role")
-                content = msg["content"]
-                duel_history.append({"role": role, "content": content})
-            return duel_history
+        checkpoint.turns_planned = max_rounds * 4 - 1
+        for turn in range(checkpoint.turns_done, checkpoint.turns_planned):
+            speaker = comedians[turn % 2]
+            self._summarize_older_turns(window, checkpoint, lang)
+            content = self._play_turn(speaker, window.apply(checkpoint), checkpoint, turn, turn_timeout, cancel_event)
+            if content is None:
+                return
+            message = {"role": speaker.name, "content": content}
+            history.append(message)
+            yield message
 
+    def _summarize_older_turns(self, window: DuelWindow, checkpoint: DuelCheckpoint, lang: str) -> None:
+        """Fold the turns that left the window into the checkpoint's rolling summary, when a refresh is due."""
+        turns = window.due(checkpoint)
+        if not turns:
+            return
+        summary = self.llm_service.summarize_duel(checkpoint.summary, turns, lang) if self.llm_service is not None else ""
+        if not summary:
+            summary = fallback_summary(checkpoint.summary, turns, settings.DUEL_SUMMARY_MAX_WORDS)
+        checkpoint.summary = summary
+        checkpoint.summarized += len(turns)
+        self.logger.debug(f"Summarized {checkpoint.summarized} duel turns in {len(summary.split())} words")
+
+    def _play_turn(
+        self,
+        speaker: ComedianAgent,
+        messages: list,
+        checkpoint: DuelCheckpoint,
+        turn: int,
+        turn_timeout: float,
+        cancel_event: Optional[threading.Event],
+    ) -> Optional[str]:
+        """Play one turn from the checkpointed ``messages``, retrying a failed or timed-out attempt.
+
+        Returns None if the duel is cancelled before or during the turn. Every attempt runs in its own thread so
+        a timed-out one, which cannot be interrupted, does not hold up the retry.
+        """
+        for attempt in range(1, settings.DUEL_TURN_MAX_ATTEMPTS + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                self.logger.info(f"Duel cancelled after {turn} turns")
+                return None
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="duel-turn")
+            # The copied context carries the request's usage tracker into the turn thread
+            future = executor.submit(copy_context().run, self._run_turn, speaker, messages)
+            try:
+                return self._wait_for_turn(future, speaker, turn, turn_timeout, cancel_event)
+            except UpstreamUnavailableException:
+                # The LLM circuit is open; retrying now would only be rejected again
+                raise
+            except Exception as e:
+                if attempt == settings.DUEL_TURN_MAX_ATTEMPTS:
+                    raise
+                checkpoint.retries += 1
+                RETRIES.labels(operation="duel_turn").inc()
+                delay = min(settings.DUEL_TURN_RETRY_WAIT * 2 ** (attempt - 1), MAX_TURN_RETRY_WAIT)
+                self.logger.warning(
+                    f"Turn {turn + 1} by {speaker.name} failed (attempt {attempt}/"
+                    f"{settings.DUEL_TURN_MAX_ATTEMPTS}), retrying in {delay:.1f}s: {e}"
+                )
+                if cancel_event is not None:
+                    cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+            finally:
+                # A timed-out attempt keeps running in its thread; don't wait for it
+                executor.shutdown(wait=False, cancel_futures=True)
+        return None
+
+    def _wait_for_turn(self, future, speaker: ComedianAgent, turn: int, turn_timeout: float, cancel_event) -> Optional[str]:
+        """Wait for a turn's reply, returning None if the duel is cancelled meanwhile."""
+        deadline = time.monotonic() + turn_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AgentException(
+                    message=f"{speaker.name} did not answer within {turn_timeout}s",
+                    error_code="DUEL_TURN_TIMEOUT",
+                    details={"turn": turn + 1},
+                )
+            try:
+                return future.result(timeout=min(remaining, CANCEL_POLL_INTERVAL))
+            except FutureTimeoutError:
+                if cancel_event is not None and cancel_event.is_set():
+                    self.logger.info(f"Duel cancelled during turn {turn + 1}")
+                    return None
+
+    def _run_turn(self, speaker: ComedianAgent, history: list) -> str:
+        from langsmith import traceable
+
+        # With hedging on, a slow attempt races a duplicate generate_reply on the same checkpointed history
+        @traceable(name="duel_turn")
+        @self.resilience_service.resilient_llm_call(hedge="duel_turn")
+        def _generate():
+            messages = [
+                {
+                    "role": "assistant" if msg["role"] == speaker.name else "user",
+                    "name": msg["role"],
+                    "content": msg["content"],
+                }
+                for msg in history
+            ]
+            with stage_timer("duel_turn"):
+                reply = speaker.generate_reply(messages)
+            content = reply.get("content") if isinstance(reply, dict) else reply
+            if not content:
+                raise AgentException(message=f"{speaker.name} produced an empty reply", error_code="EMPTY_REPLY")
+            return content
+
+        return _generate()
+
+    def stream_duel(self, mode: str, **kwargs) -> Iterator[dict]:
+        """Yield ``{"event": "message", ...}`` for every duel message and finish with a ``done`` event.
+
+        The ``done`` event carries the full history. If the duel fails midway, an ``error`` event is emitted
+        instead. Closing the generator (e.g. on client disconnect) aborts the duel.
+        """
+        history = []
         try:
-            self.history = _run_chat()
-            self.logger.info(f"Duel completed: {len(self.history)} messages generated")
-            return self.history
+            for message in self.iter_duel(mode, **kwargs):
+                history.append(message)
+                yield {"event": "message", "data": message}
         except Exception as e:
-            self.logger.error(f"Error running duel after retries: {e}")
-            # Return a minimal conversation to prevent frontend issues
-            return [
-                {"role": "system", "content": "Conversation failed to generate properly."},
-                {"role": "Comedian_1", "content": "Sorry, I'm having technical difficulties right now."},
-                {"role": "Comedian_2", "content": "Yeah, let's try again later!"},
-            ]
+            self.logger.error(f"Error streaming duel after {len(history)} messages: {e}")
+            yield {"event": "error", "data": {"message": str(e), "history": history}}
+            return
+        yield {"event": "done", "data": history}
@@ -1,53 +1,69 @@
-from typing import Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple
 
 import injector
-import numpy as np
 import requests
 import structlog
 
-from models import ChatMessage, GenerateShowRequest, GenerateShowResponse, TTSRequest
-from services.agent_manager import AgentManager
+from config import settings
+from config.settings import COMEDIAN1_VOICE_ID, COMEDIAN2_VOICE_ID
+from models import AudioFormat, ChatMessage, GenerateShowRequest, GenerateShowResponse, TTSBatchRequest, TTSRequest
+from services.agent_manager import COMEDIAN1_ROLE, COMEDIAN2_ROLE, AgentManager, DuelCheckpoint
 from services.llm_service import LLMService
+from services.topic_context_cache import TopicContextCache
+from tts.audio_cache import AudioCache
 from tts.tts_service import TTSService
-from utils import APIException, TTSServiceException
+from utils import APIException, RoboComicException, TTSServiceException, UpstreamUnavailableException
+from utils.usage import UsageTracker, track_usage
 
 
 class ApiService:
     @injector.inject
     def __init__(
-        self, agent_manager: AgentManager, tts_service: TTSService, logger: structlog.BoundLogger, llm_service: LLMService
+        self,
+        agent_manager: AgentManager,
+        tts_service: TTSService,
+        logger: structlog.BoundLogger,
+        llm_service: LLMService,
+        audio_cache: AudioCache = None,
+        topic_cache: TopicContextCache = None,
     ):
         self.agent_manager = agent_manager
         self.tts_service = tts_service
         self.logger = logger
         self.llm_service = llm_service
+        self.audio_cache = audio_cache
+        self.topic_cache = topic_cache
 
     def generate_show(self, request: GenerateShowRequest) -> GenerateShowResponse:
         self.logger.info(
             f"Generating show: {request.comedian1_persona.style} vs {request.comedian2_persona.style}, mode={request.mode}, rounds={request.num_rounds}, temperature={request.temperature}"
         )
         try:
-            self.agent_manager.set_personas(
-                request.comedian1_persona.model_dump(), request.comedian2_persona.model_dump(), lang=request.lang
-            )
-            context = ""
-            if request.build_context and request.topic.strip():
-                self.logger.info(f"Generating topic context for: {request.topic}")
-                context = self.llm_service.generate_topic_context(request.topic, request.lang)
-            self.logger.info(f"Starting comedy duel with {request.num_rounds} rounds")
-            history = self.agent_manager.run_duel(
-                request.mode,
-                request.topic,
-                max_rounds=request.num_rounds,
-                lang=request.lang,
-                context=context,
-                temperature=request.temperature,
-                persona1=request.comedian1_persona.model_dump(),
-                persona2=request.comedian2_persona.model_dump(),
-            )
+            with track_usage("generate-show", self.logger):
+                context = self._build_context(request)
+                self.logger.info(f"Starting comedy duel with {request.num_rounds} rounds")
+                checkpoint = DuelCheckpoint()
+                history = self.agent_manager.run_duel(
+                    request.mode,
+                    request.topic,
+                    max_rounds=request.num_rounds,
+                    lang=request.lang,
+                    context=context,
+                    temperature=request.temperature,
+                    persona1=request.comedian1_persona.model_dump(),
+                    persona2=request.comedian2_persona.model_dump(),
+                    checkpoint=checkpoint,
+                )
             chat_messages = [ChatMessage(role=msg["role"], content=msg["content"]) for msg in history]
+            if not checkpoint.complete:
+                message = f"Show ended after {checkpoint.turns_done} of {checkpoint.turns_planned} turns"
+                self.logger.warning(message)
+                return GenerateShowResponse(
+                    history=chat_messages, message=message, turns_completed=checkpoint.turns_done, incomplete=True
+                )
             self.logger.info(f"Successfully generated show with {len(chat_messages)} messages")
-            return GenerateShowResponse(history=chat_messages)
+            return GenerateShowResponse(history=chat_messages, turns_completed=checkpoint.turns_done)
         except Exception as e:
             self.logger.error(f"Failed to generate show: {str(e)}", exc_info=True)
             raise APIException(
@@ -57,25 +73,185 @@ class ApiService:
                 details={"original_error": str(e)},
             )
 
-    def tts(self, request: TTSRequest) -> Union[bytes, Tuple[np.ndarray, int]]:
-        self.logger.info(f"TTS request: {len(request.text)} characters, lang={request.lang}, voice_id={request.voice_id}")
+    def stream_show(self, request: GenerateShowRequest) -> Iterator[Tuple[str, dict]]:
+        """Generate a show and yield ``(event, data)`` pairs as each message is produced.
+
+        Emits a ``message`` event per comedian line and a terminal ``done`` event carrying
+        the full ``GenerateShowResponse``. Failures are reported as an ``error`` event since
+        the response headers are already sent by the time they happen.
+        """
+        self.logger.info(
+            f"Streaming show: {request.comedian1_persona.style} vs {request.comedian2_persona.style}, mode={request.mode}, rounds={request.num_rounds}, temperature={request.temperature}"
+        )
+        usage = UsageTracker("generate-show/stream")
         try:
-            audio_result = self.tts_service.speak(request.text, lang=request.lang, voice_id=request.voice_id)
-            return audio_result
-        except requests.exceptions.HTTPError as e:
-            if e.response is not None and e.response.status_code == 401:
-                self.logger.error("TTS service unavailable: out of credits or invalid API key.")
-                raise TTSServiceException(
-                    message="TTS service unavailable: out of credits or invalid API key.",
-                    error_code="TTS_CREDITS_EXCEEDED",
-                    details={"original_error": str(e)},
-                )
-            self.logger.error(f"TTS generation failed: {str(e)}", exc_info=True)
-            raise TTSServiceException(
-                message="Failed to generate audio", error_code="TTS_GENERATION_FAILED", details={"original_error": str(e)}
+            context = usage.run(self._build_context, request)
+            events = self.agent_manager.stream_duel(
+                request.mode,
+                topic=request.topic,
+                max_rounds=request.num_rounds,
+                lang=request.lang,
+                context=context,
+                temperature=request.temperature,
+                persona1=request.comedian1_persona.model_dump(),
+                persona2=request.comedian2_persona.model_dump(),
+            )
+            # Each step may run on a different thread, so the usage tracker is activated per step
+            for event in iter(lambda: usage.run(next, events, None), None):
+                if event["event"] == "message":
+                    yield "message", ChatMessage(**event["data"]).model_dump()
+                elif event["event"] == "done":
+                    chat_messages = [ChatMessage(role=msg["role"], content=msg["content"]) for msg in event["data"]]
+                    self.logger.info(f"Successfully streamed show with {len(chat_messages)} messages")
+                    response = GenerateShowResponse(history=chat_messages, turns_completed=max(len(chat_messages) - 1, 0))
+                    yield "done", response.model_dump()
+                else:
+                    raise RuntimeError(event["data"].get("message", "Duel stream failed"))
+        except Exception as e:
+            self.logger.error(f"Failed to stream show: {str(e)}", exc_info=True)
+            yield "error", {
+                "success": False,
+                "error": "Failed to generate comedy show",
+                "error_code": "SHOW_GENERATION_FAILED",
+                "details": {"original_error": str(e)},
+            }
+        finally:
+            usage.report(self.logger)
+
+    def _build_context(self, request: GenerateShowRequest) -> str:
+        if not (request.build_context and request.topic.strip()):
+            return ""
+        if self.topic_cache is not None:
+            cached = self.topic_cache.get(request.topic, request.lang)
+            if cached is not None:
+                self.logger.info(f"Using cached topic context for: {request.topic}")
+                return cached
+        self.logger.info(f"Generating topic context for: {request.topic}")
+        context = self.llm_service.generate_topic_context(request.topic, request.lang)
+        if self.topic_cache is not None:
+            self.topic_cache.put(request.topic, request.lang, context)
+        return context
+
+    def resolve_audio_format(self, request: TTSRequest, audio_format: Optional[AudioFormat] = None) -> AudioFormat:
+        """Negotiated format first, then the request's ``format`` field, then the provider's native format."""
+        return audio_format or request.format or self.tts_service.native_format
+
+    @staticmethod
+    def voice_for_role(role: Optional[str]) -> Optional[str]:
+        return {COMEDIAN1_ROLE: COMEDIAN1_VOICE_ID, COMEDIAN2_ROLE: COMEDIAN2_VOICE_ID}.get(role)
+
+    def _voice_id(self, request: TTSRequest) -> Optional[str]:
+        """An explicit voice_id wins; otherwise the voice follows the speaker role so output is deterministic."""
+        return request.voice_id or self.voice_for_role(request.role)
+
+    def _tts_cache_key(self, request: TTSRequest, audio_format: AudioFormat) -> str:
+        # The role is part of the key because providers such as Bark pick the voice from it, not the voice id
+        voice = f"{self._voice_id(request) or ''}:{request.role or ''}"
+        return AudioCache.make_key(voice, request.text, request.lang, audio_format)
+
+    def cached_tts(self, request: TTSRequest, audio_format: Optional[AudioFormat] = None) -> Optional[bytes]:
+        """Return previously synthesized audio for this request, or None on a cache miss."""
+        if self.audio_cache is None:
+            return None
+        return self.audio_cache.get(self._tts_cache_key(request, self.resolve_audio_format(request, audio_format)))
+
+    def tts_stream(self, request: TTSRequest, audio_format: Optional[AudioFormat] = None) -> Iterator[bytes]:
+        """Yield encoded audio chunks as the TTS provider produces them, caching the clip once it completes.
+
+        Provider errors surface on the first ``next()`` as ``TTSServiceException``, before any audio is sent.
+        """
+        audio_format = self.resolve_audio_format(request, audio_format)
+        voice_id = self._voice_id(request)
+        self.logger.info(
+            f"TTS stream request: {len(request.text)} characters, lang={request.lang}, voice_id={voice_id}, "
+            f"format={getattr(audio_format, 'value', audio_format)}"
+        )
+        try:
+            chunks = self.tts_service.stream(
+                request.text, lang=request.lang, voice_id=voice_id, audio_format=audio_format, role=request.role
             )
+            if self.audio_cache is not None:
+                chunks = self.audio_cache.tee(self._tts_cache_key(request, audio_format), chunks)
+            yield from chunks
         except Exception as e:
-            self.logger.error(f"TTS generation failed: {str(e)}", exc_info=True)
-            raise TTSServiceException(
-                message="Failed to generate audio", error_code="TTS_GENERATION_FAILED", details={"original_error": str(e)}
+            raise self._tts_error(e)
+
+    def batch_lines(self, request: TTSBatchRequest) -> list[tuple[int, str, TTSRequest]]:
+        """Map each comedian line of a show to a TTS request with that comedian's voice; other roles are skipped."""
+        lines = []
+        for index, message in enumerate(request.history):
+            voice_id = self.voice_for_role(message.role)
+            if voice_id is None or not message.content.strip():
+                continue
+            try:
+                line = TTSRequest(text=message.content, lang=request.lang, voice_id=voice_id, role=message.role)
+            except ValueError as e:
+                raise APIException(
+                    message=f"Line {index} cannot be synthesized",
+                    status_code=422,
+                    error_code="TTS_BATCH_INVALID_LINE",
+                    details={"index": index, "original_error": str(e)},
+                )
+            lines.append((index, message.role, line))
+        if not lines:
+            raise APIException(
+                message="History has no comedian lines to synthesize", status_code=400, error_code="TTS_BATCH_EMPTY"
+            )
+        return lines
+
+    def batch_cached(self, request: TTSBatchRequest, audio_format: Optional[AudioFormat] = None) -> bool:
+        """Whether every line of the show is already cached, so the batch costs nothing upstream."""
+        audio_format = self.resolve_audio_format(request, audio_format)
+        return self.audio_cache is not None and all(
+            self.audio_cache.contains(self._tts_cache_key(line, audio_format)) for _, _, line in self.batch_lines(request)
+        )
+
+    def tts_batch(self, request: TTSBatchRequest, audio_format: Optional[AudioFormat] = None) -> list[dict]:
+        """Synthesize every comedian line of a show concurrently, at most ``TTS_BATCH_CONCURRENCY`` at a time.
+
+        Identical lines are synthesized once. Returns one dict per line, in show order, with the encoded
+        audio, its cache key and whether it was already cached.
+        """
+        audio_format = self.resolve_audio_format(request, audio_format)
+        lines = [
+            (index, role, line, self._tts_cache_key(line, audio_format)) for index, role, line in self.batch_lines(request)
+        ]
+        unique = {key: line for _, _, line, key in lines}
+        self.logger.info(f"TTS batch: {len(lines)} lines, {len(unique)} unique, format={audio_format}")
+
+        def _render(line: TTSRequest) -> tuple[bytes, bool]:
+            cached = self.cached_tts(line, audio_format)
+            if cached is not None:
+                return cached, True
+            return b"".join(self.tts_stream(line, audio_format)), False
+
+        workers = min(settings.TTS_BATCH_CONCURRENCY, len(unique))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-batch") as pool:
+            rendered = dict(zip(unique, pool.map(_render, unique.values())))
+        return [
+            {
+                "index": index,
+                "role": role,
+                "voice_id": line.voice_id,
+                "key": key,
+                "audio": rendered[key][0],
+                "cached": rendered[key][1],
+            }
+            for index, role, line, key in lines
+        ]
+
+    def _tts_error(self, e: Exception) -> RoboComicException:
+        if isinstance(e, UpstreamUnavailableException):
+            # Circuit open or bulkhead full: already counted and logged by ResilienceService, surfaces as a 503
+            return e
+        if isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code == 401:
+            self.logger.error("TTS service unavailable: out of credits or invalid API key.")
+            return TTSServiceException(
+                message="TTS service unavailable: out of credits or invalid API key.",
+                error_code="TTS_CREDITS_EXCEEDED",
+                details={"original_error": str(e)},
             )
+        self.logger.error(f"TTS generation failed: {str(e)}", exc_info=True)
+        return TTSServiceException(
+            message="Failed to generate audio", error_code="TTS_GENERATION_FAILED", details={"original_error": str(e)}
+        )
@@ -1,18 +1,39 @@
 """LLM utility functions for RoboComic backend."""
 
 import re
+import threading
+from typing import TYPE_CHECKING
 
 import injector
 import structlog
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
-from langchain_openai import ChatOpenAI
 
 from config import settings
 from models import Language
-from services.prompt_templates import COMEDIANIFY_PROMPT, JUDGING_PROMPT, RESPONSE_SCHEMA_DESCRIPTIONS, TOPIC_CONTEXT_PROMPT
+from services.prompt_templates import (
+    COMEDIANIFY_PROMPT,
+    DUEL_SUMMARY_PROMPT,
+    JUDGING_PROMPT,
+    RESPONSE_SCHEMA_DESCRIPTIONS,
+    TOPIC_CONTEXT_PROMPT,
+)
+from utils.metrics import stage_timer
 from utils.resilience import ResilienceService
+from utils.usage import record_llm_usage, track_usage
+
+if TYPE_CHECKING:
+    from langchain_core.runnables import Runnable
+    from langchain_openai import ChatOpenAI
+
+
+def _content_with_usage(stage: str):
+    """Chain step that records the reply's token usage under ``stage`` and passes its text on."""
+
+    def content(message):
+        usage = getattr(message, "usage_metadata", None) or {}
+        record_llm_usage(stage, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+        return message.content
+
+    return content
 
 
 class LLMService:
@@ -20,30 +41,82 @@ class LLMService:
     def __init__(self, logger: structlog.BoundLogger, resilience_service: ResilienceService):
         self.logger = logger
         self.resilience_service = resilience_service
+        # Clients and chains are built once per (kind, lang, temperature) and reused across requests
+        self._llms: dict[float, "ChatOpenAI"] = {}
+        self._chains: dict[tuple, "Runnable"] = {}
+        self._lock = threading.Lock()
 
     def _create_llm(self, temperature=None):
+        # LangChain is imported on first use to keep it out of API cold start
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(
             openai_api_key=settings.OPENAI_API_KEY,
+            base_url=settings.LLM_BASE_URL or None,
             model=settings.LLM_MODEL,
             temperature=temperature if temperature is not None else settings.DEFAULT_TEMPERATURE,
         )
 
+    def _get_llm(self, temperature=None) -> "ChatOpenAI":
+        temperature = temperature if temperature is not None else settings.DEFAULT_TEMPERATURE
+        with self._lock:
+            llm = self._llms.get(temperature)
+            if llm is None:
+                llm = self._llms[temperature] = self._create_llm(temperature)
+            return llm
+
+    def _get_chain(self, kind: str, lang: str, temperature=None) -> "Runnable":
+        key = (kind, lang, temperature)
+        with self._lock:
+            chain = self._chains.get(key)
+        if chain is None:
+            chain = self._build_chain(kind, lang, temperature)
+            with self._lock:
+                chain = self._chains.setdefault(key, chain)
+        return chain
+
+    def _build_chain(self, kind: str, lang: str, temperature=None) -> "Runnable":
+        from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+        from langchain.prompts import ChatPromptTemplate
+        from langchain_core.runnables import RunnableLambda
+
+        llm = self._get_llm(temperature)
+        content = RunnableLambda(_content_with_usage(kind))
+        if kind == "topic_context":
+            return ChatPromptTemplate.from_template(TOPIC_CONTEXT_PROMPT[lang]) | llm | content
+        if kind == "comedianify":
+            return ChatPromptTemplate.from_template(COMEDIANIFY_PROMPT[lang]) | llm | content
+        if kind == "duel_summary":
+            return ChatPromptTemplate.from_template(DUEL_SUMMARY_PROMPT[lang]) | llm | content
+        if kind == "judge":
+            descriptions = RESPONSE_SCHEMA_DESCRIPTIONS.get(lang, RESPONSE_SCHEMA_DESCRIPTIONS["en"])
+            response_schemas = [
+                ResponseSchema(name="winner", description=descriptions["winner"]),
+                ResponseSchema(name="summary", description=descriptions["summary"]),
+            ]
+            output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+            prompt = ChatPromptTemplate.from_template(JUDGING_PROMPT[lang]).partial(
+                format_instructions=output_parser.get_format_instructions()
+            )
+            return prompt | llm | content | output_parser
+        raise ValueError(f"Unknown chain kind: {kind}")
+
     def generate_topic_context(self, topic: str, lang: str = Language.ENGLISH) -> str:
         if not topic:
             return ""
 
-        @self.resilience_service.resilient_llm_call()
+        @self.resilience_service.resilient_llm_call(hedge="topic_context")
         def _generate_context():
-            prompt = ChatPromptTemplate.from_template(TOPIC_CONTEXT_PROMPT[lang])
-            llm = self._create_llm()
-            chain = RunnablePassthrough() | prompt | llm | RunnableLambda(lambda x: x.content)
-            response = chain.invoke({"topic": topic})
+            chain = self._get_chain("topic_context", lang)
+            with stage_timer("topic_context"):
+                response = chain.invoke({"topic": topic})
             context = response.strip()
             context = re.sub(r"(?<!\d)\. ", ".\n", context)
             return f"\n{context}\n"
 
         try:
-            return _generate_context()
+            with track_usage("topic_context", self.logger):
+                return _generate_context()
         except Exception as e:
             self.logger.error(f"Error generating topic context: {e}")
             return ""
@@ -52,58 +125,64 @@ class LLMService:
         if not text:
             return ""
 
-        @self.resilience_service.resilient_llm_call()
+        @self.resilience_service.resilient_llm_call(hedge="comedianify")
         def _comedianify():
-            prompt = ChatPromptTemplate.from_template(COMEDIANIFY_PROMPT[lang])
-            llm = self._create_llm()
-            chain = RunnablePassthrough() | prompt | llm | RunnableLambda(lambda x: x.content)
-            response = chain.invoke({"text": text, "gender": gender})
+            chain = self._get_chain("comedianify", lang)
+            with stage_timer("comedianify"):
+                response = chain.invoke({"text": text, "gender": gender})
             return response.strip()
 
         try:
-            return _comedianify()
+            with track_usage("comedianify", self.logger):
+                return _comedianify()
         except Exception as e:
             self.logger.error(f"Error comedianifying text: {e}")
             return text
 
+    def summarize_duel(self, summary: str, turns: list, lang: str = Language.ENGLISH) -> str:
+        """Fold ``turns`` into the rolling duel ``summary``; returns an empty string if the LLM call fails."""
+        lines = "\n".join(f"{msg['role']}: {msg['content']}" for msg in turns)
+
+        @self.resilience_service.resilient_llm_call(hedge="duel_summary")
+        def _summarize():
+            # Low temperature: the summary should restate the show, not riff on it
+            chain = self._get_chain("duel_summary", lang, temperature=0.0)
+            with stage_timer("duel_summary"):
+                response = chain.invoke(
+                    {"summary": summary or "-", "lines": lines, "max_words": settings.DUEL_SUMMARY_MAX_WORDS}
+                )
+            return response.strip()
+
+        try:
+            with track_usage("duel_summary", self.logger):
+                return _summarize()
+        except Exception as e:
+            self.logger.error(f"Error summarizing duel: {e}")
+            return ""
+
     def judge_show(
         self, comedian1_name: str, comedian2_name: str, history: list, lang: str = Language.ENGLISH
     ) -> tuple[str, str]:
         history_text = "\n".join(
             [f"{msg['role']}: {msg['content']}" if isinstance(msg, dict) else f"{msg.role}: {msg.content}" for msg in history]
         )
-        descriptions = RESPONSE_SCHEMA_DESCRIPTIONS.get(lang, RESPONSE_SCHEMA_DESCRIPTIONS["en"])
-        response_schemas = [
-            ResponseSchema(name="winner", description=descriptions["winner"]),
-            ResponseSchema(name="summary", description=descriptions["summary"]),
-        ]
-        output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-        format_instructions = output_parser.get_format_instructions()
-        prompt = ChatPromptTemplate.from_template(JUDGING_PROMPT[lang])
-        llm = self._create_llm()
-        chain = (
-            RunnablePassthrough.assign(
-                format_instructions=lambda _: format_instructions,
-                history_text=lambda _: history_text,
-            )
-            | prompt
-            | llm
-            | RunnableLambda(lambda x: x.content)
-            | output_parser
-        )
 
-        @self.resilience_service.resilient_llm_call()
+        @self.resilience_service.resilient_llm_call(hedge="judge")
         def _judge():
-            result = chain.invoke(
-                {
-                    "comedian1_name": comedian1_name,
-                    "comedian2_name": comedian2_name,
-                }
-            )
+            chain = self._get_chain("judge", lang)
+            with stage_timer("judge"):
+                result = chain.invoke(
+                    {
+                        "comedian1_name": comedian1_name,
+                        "comedian2_name": comedian2_name,
+                        "history_text": history_text,
+                    }
+                )
             return result["winner"], result["summary"]
 
         try:
-            return _judge()
+            with track_usage("judge-show", self.logger):
+                return _judge()
         except Exception as e:
             self.logger.error(f"Error judging show: {e}")
             return comedian1_name, f"{comedian1_name} wins by default (LLM error)."
@@ -49,6 +49,28 @@ COMEDIAN_PROMPT_TEMPLATE = {
     },
 }
 
+# Heads the rolling summary of duel turns that fell out of the context window
+DUEL_SUMMARY_PREFIX = {
+    "en": "Earlier in the show (summary):",
+    "pl": "Wcześniej w programie (streszczenie):",
+}
+
+DUEL_SUMMARY_PROMPT = {
+    "en": (
+        "You keep notes for a stand-up comedy duel. Summary of the show so far:\n{summary}\n\n"
+        "New lines:\n{lines}\n\n"
+        "Rewrite the summary to cover the new lines too, in at most {max_words} words. Keep who said what, running "
+        "jokes, insults and punchlines someone could call back to. Return only the summary, in English."
+    ),
+    "pl": (
+        "Prowadzisz notatki z pojedynku stand-uperów. Streszczenie dotychczasowego występu:\n{summary}\n\n"
+        "Nowe wypowiedzi:\n{lines}\n\n"
+        "Przepisz streszczenie tak, aby obejmowało też nowe wypowiedzi, w maksymalnie {max_words} słowach. Zachowaj, "
+        "kto co powiedział, powracające żarty, obelgi i puenty, do których można nawiązać. Podaj tylko streszczenie, "
+        "po polsku."
+    ),
+}
+
 TOPIC_CONTEXT_PROMPT = {
     "en": (
         "List exactly 10 best-known, widely recognized, true anecdotes, interesting facts, or funny moments about the topic: '{topic}'. "
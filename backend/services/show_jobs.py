@@ -0,0 +1,158 @@
+"""Bounded job queue and TTL result store for asynchronous show generation."""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+
+from models import JobStatus
+from utils.exceptions import APIException
+
+
+@dataclass
+class ShowJob:
+    request: dict
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class ShowJobQueue:
+    """Runs show jobs through ``runner`` with bounded concurrency and keeps results for ``result_ttl`` seconds.
+
+    Must be started from a running event loop; ``concurrency`` usually matches the process pool size so the
+    queue, not the pool, absorbs bursts.
+    """
+
+    def __init__(
+        self,
+        logger: structlog.BoundLogger,
+        runner: Callable[[dict], Awaitable[Any]],
+        concurrency: int,
+        max_queue: int,
+        result_ttl: float,
+    ):
+        self.logger = logger
+        self.runner = runner
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.jobs: dict[str, ShowJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._max_wait = 0.0
+        self._max_run = 0.0
+
+    @property
+    def started(self) -> bool:
+        return any(not task.done() for task in self._workers)
+
+    def start(self) -> None:
+        if self.started:
+            return
+        previous, self._queue = self._queue, asyncio.Queue(maxsize=self.max_queue)
+        # Carry over jobs queued under a previous event loop (e.g. after a lifespan restart)
+        while previous is not None and not previous.empty():
+            self._queue.put_nowait(previous.get_nowait())
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self.logger.info(f"Show job queue started: concurrency={self.concurrency}, max_queue={self.max_queue}")
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, request: dict) -> ShowJob:
+        self.start()
+        self._purge_expired()
+        job = ShowJob(request=request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise APIException(
+                message="Show queue is full, please try again later",
+                status_code=503,
+                error_code="SHOW_QUEUE_FULL",
+                details={"queue_depth": self._queue.qsize()},
+            )
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ShowJob]:
+        self._purge_expired()
+        return self.jobs.get(job_id)
+
+    def position(self, job: ShowJob) -> Optional[int]:
+        """1-based position of a queued job, counting only jobs that are still waiting."""
+        if job.status != JobStatus.QUEUED:
+            return None
+        return sum(
+            1 for other in self.jobs.values() if other.status == JobStatus.QUEUED and other.created_at <= job.created_at
+        )
+
+    def stats(self) -> dict:
+        finished = self._completed + self._failed
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_seconds": self._total_wait / finished if finished else 0.0,
+            "max_wait_seconds": self._max_wait,
+            "avg_run_seconds": self._total_run / finished if finished else 0.0,
+            "max_run_seconds": self._max_run,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                job.result = await self.runner(job.request)
+                job.status = JobStatus.COMPLETED
+                self._completed += 1
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = "Cancelled"
+                raise
+            except Exception as e:
+                self.logger.error(f"Show job {job.id} failed: {e}")
+                job.status = JobStatus.FAILED
+                job.error = getattr(e, "message", str(e))
+                self._failed += 1
+            finally:
+                job.finished_at = time.time()
+                self._running -= 1
+                self._record_timing(job)
+                job.done.set()
+                self._queue.task_done()
+
+    def _record_timing(self, job: ShowJob) -> None:
+        wait = job.started_at - job.created_at
+        run = job.finished_at - job.started_at
+        self._total_wait += wait
+        self._total_run += run
+        self._max_wait = max(self._max_wait, wait)
+        self._max_run = max(self._max_run, run)
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
@@ -0,0 +1,86 @@
+"""Topic context cache shared across worker processes."""
+
+import re
+import sqlite3
+import time
+from contextlib import closing
+from typing import Optional
+
+import injector
+import structlog
+
+from config import settings
+
+
+class TopicContextCache:
+    """SQLite-backed TTL + LRU cache for generated topic contexts.
+
+    Each operation opens its own short-lived connection, so the cache is safe to use from
+    forked ``ProcessPoolExecutor`` workers and from threads without sharing handles.
+    """
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.path = settings.TOPIC_CONTEXT_CACHE_PATH
+        self.ttl = settings.TOPIC_CONTEXT_CACHE_TTL
+        self.max_items = settings.TOPIC_CONTEXT_CACHE_MAX_ITEMS
+        self.enabled = bool(self.path) and self.ttl > 0 and self.max_items > 0
+        if self.enabled:
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS topic_context ("
+                        "key TEXT PRIMARY KEY, context TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS topic_context_accessed ON topic_context (accessed_at)")
+            except sqlite3.Error as e:
+                self.logger.warning(f"Topic context cache disabled: {e}")
+                self.enabled = False
+
+    @staticmethod
+    def make_key(topic: str, lang: str) -> str:
+        """Normalize a topic so trivial variations share one cache entry."""
+        normalized = re.sub(r"\s+", " ", topic.casefold()).strip(" .,!?;:'\"")
+        return f"{getattr(lang, 'value', lang)}:{normalized}"
+
+    def get(self, topic: str, lang: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        key = self.make_key(topic, lang)
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute(
+                    "SELECT context FROM topic_context WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE topic_context SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Topic context cache read failed: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, topic: str, lang: str, context: str) -> None:
+        if not self.enabled or not context:
+            return
+        key = self.make_key(topic, lang)
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO topic_context (key, context, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, context, now, now),
+                )
+                conn.execute("DELETE FROM topic_context WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM topic_context WHERE key NOT IN "
+                    "(SELECT key FROM topic_context ORDER BY accessed_at DESC LIMIT ?)",
+                    (self.max_items,),
+                )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Topic context cache write failed: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
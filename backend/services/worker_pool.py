@@ -0,0 +1,89 @@
+"""Process pool for show generation with warm, pre-initialized workers."""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import structlog
+
+from container import container
+from models import GenerateShowRequest, GenerateShowResponse
+from services.api_service import ApiService
+from utils.lazy_imports import HEAVY_MODULES, preload_heavy_modules
+from utils.metrics import mark_dead_on_exit
+
+# Imported once in the fork server so recycled workers fork with autogen/langchain already loaded
+PRELOAD_MODULES = [*HEAVY_MODULES, "container"]
+
+
+def init_worker() -> None:
+    """Process initializer: build the injector graph and import the lazily loaded modules so the first show is warm."""
+    # A recycled worker's circuit state must not outlive it in the multiprocess metrics
+    mark_dead_on_exit()
+    container.get(ApiService)
+    preload_heavy_modules()
+
+
+def warm_up_worker() -> int:
+    init_worker()
+    return os.getpid()
+
+
+def generate_show_worker(body_dict: dict) -> GenerateShowResponse:
+    api_service = container.get(ApiService)
+    request_obj = GenerateShowRequest(**body_dict)
+    return api_service.generate_show(request_obj)
+
+
+class ShowWorkerPool:
+    """Wraps a ``ProcessPoolExecutor`` with explicit warm-up and readiness state.
+
+    States: ``cold`` (workers start lazily on first task), ``warming`` and ``ready``.
+    """
+
+    def __init__(self, logger: structlog.BoundLogger, max_workers: int, max_tasks_per_child: int = 0):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.state = "cold"
+        self.in_flight = 0
+        kwargs = {}
+        if max_tasks_per_child > 0:
+            # Worker recycling is not supported with plain fork; the fork server keeps recycled workers warm
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            context = multiprocessing.get_context(method)
+            if method == "forkserver":
+                context.set_forkserver_preload(PRELOAD_MODULES)
+            kwargs = {"mp_context": context, "max_tasks_per_child": max_tasks_per_child}
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, **kwargs)
+
+    @property
+    def ready(self) -> bool:
+        return self.state != "warming"
+
+    async def warm_up(self) -> None:
+        """Start every worker and wait until each has finished its initializer."""
+        self.state = "warming"
+        self.logger.info(f"Warming up {self.max_workers} show workers")
+        loop = asyncio.get_running_loop()
+        try:
+            pids = await asyncio.gather(
+                *[loop.run_in_executor(self.executor, warm_up_worker) for _ in range(self.max_workers)]
+            )
+            self.logger.info(f"Show workers ready: {len(set(pids))} processes warmed")
+        except Exception as e:
+            self.logger.error(f"Show worker warm-up failed: {e}")
+        finally:
+            self.state = "ready"
+
+    async def run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self, wait: Optional[bool] = True) -> None:
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -1,5 +1,5 @@
 import os
-from unittest.mock import MagicMock
+from unittest.mock import Mock
 
 import pytest
 
@@ -10,20 +10,26 @@ def mock_llm(monkeypatch):
     monkeypatch.setattr(
         "services.llm_service.LLMService.generate_topic_context", lambda *args, **kwargs: "This is a mock topic context."
     )
-    # Patch GroupChatManager.initiate_chat to return a mock chat result
-    from autogen import GroupChatManager
+    # Patch ConversableAgent.generate_reply so duel turns never reach the LLM
+    from autogen import ConversableAgent
 
-    mock_chat_result = MagicMock()
-    mock_chat_result.chat_history = [{"role": "comedian1", "content": "Joke 1"}, {"role": "comedian2", "content": "Joke 2"}]
-    monkeypatch.setattr(GroupChatManager, "initiate_chat", lambda self, *a, **kw: mock_chat_result)
+    monkeypatch.setattr(
+        ConversableAgent, "generate_reply", lambda self, messages=None, *a, **kw: f"Joke {len(messages or [])}"
+    )
     yield
 
 
-# Patch TTSService implementations' speak methods
+# Patch TTSService implementations' speak and stream methods
 @pytest.fixture(autouse=True)
 def mock_tts(monkeypatch):
     monkeypatch.setattr("tts.eleven_tts_service.ElevenTTSService.speak", lambda self, *args, **kwargs: b"FAKE_WAV_DATA")
     monkeypatch.setattr("tts.bark_tts_service.BarkTTSService.speak", lambda self, *args, **kwargs: (b"FAKE_WAV_DATA", 22050))
+    monkeypatch.setattr(
+        "tts.eleven_tts_service.ElevenTTSService.stream", lambda self, *args, **kwargs: iter([b"FAKE_", b"WAV_DATA"])
+    )
+    monkeypatch.setattr(
+        "tts.bark_tts_service.BarkTTSService.stream", lambda self, *args, **kwargs: iter([b"FAKE_", b"WAV_DATA"])
+    )
     yield
 
 
@@ -36,3 +42,32 @@ def fail_on_real_api_keys():
         pytest.fail("Real OPENAI_API_KEY detected in test environment! Use a dummy value.")
     if elevenlabs_key and elevenlabs_key not in ["dummy", "test", "", None]:
         pytest.fail("Real ELEVENLABS_API_KEY detected in test environment! Use a dummy value.")
+
+
+# Settings prefix and storage defaults (relative to tmp_path) of each cache built by make_cache
+CACHE_SETTINGS = {
+    "TopicContextCache": ("TOPIC_CONTEXT_CACHE_", {"path": "topics.sqlite3", "ttl": 3600, "max_items": 10}),
+    "AudioCache": ("TTS_CACHE_", {"dir": "", "memory_items": 2, "max_disk_mb": 1}),
+    "ComedianifyCache": ("COMEDIANIFY_CACHE_", {"path": "comedianify.sqlite3", "memory_items": 2}),
+}
+
+
+@pytest.fixture
+def make_cache(request, monkeypatch, tmp_path):
+    """Build the test class's ``cache_class`` with its storage in ``tmp_path``.
+
+    Keyword arguments override the settings the cache reads, named without their prefix, e.g.
+    ``make_cache(memory_items=0)`` sets ``TTS_CACHE_MEMORY_ITEMS`` for an ``AudioCache``.
+    """
+    cache_class = request.cls.cache_class
+    prefix, defaults = CACHE_SETTINGS[cache_class.__name__]
+
+    def _make(**overrides):
+        values = {**defaults, **overrides}
+        for name, value in values.items():
+            if name in ("path", "dir") and name not in overrides:
+                value = str(tmp_path / value)
+            monkeypatch.setattr(f"config.settings.{prefix}{name.upper()}", value)
+        return cache_class(logger=Mock())
+
+    return _make
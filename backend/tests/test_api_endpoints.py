@@ -1,6 +1,8 @@
+import threading
+
 from fastapi.testclient import TestClient
 
-from main import app
+from main import api_service, app
 
 client = TestClient(app)
 
@@ -16,6 +18,7 @@ class TestAPIEndpoints:
         assert data["status"] == "healthy"
         assert "version" in data
         assert "timestamp" in data
+        assert data["workers"] in ["cold", "ready"]
 
     def test_personas_endpoint(self):
         """Test personas endpoint"""
@@ -83,6 +86,70 @@ class TestAPIEndpoints:
         # but the endpoint should still return a 422 status
         assert response.status_code == 422  # Validation error
 
+    def test_generate_show_stream_endpoint(self):
+        """Test streaming show generation emits SSE events ending with the full history"""
+        request_data = {
+            "comedian1_persona": {
+                "name": "Relatable",
+                "style": "relatable",
+                "description": "Relatable comedian",
+                "description_pl": "Komik, z którym można się utożsamiać",
+            },
+            "comedian2_persona": {
+                "name": "Absurd",
+                "style": "absurd",
+                "description": "Absurd comedian",
+                "description_pl": "Absurdalny komik",
+            },
+            "lang": "en",
+            "mode": "topical",
+            "topic": "airplanes",
+            "num_rounds": 1,
+        }
+        response = client.post("/generate-show/stream", json=request_data)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "event: done" in response.text
+        assert response.text.count("event: message") == 4
+        assert "Joke 1" in response.text
+
+    def test_show_job_lifecycle(self, monkeypatch):
+        """Test a queued show job can be polled and subscribed to until it completes"""
+        from unittest.mock import Mock
+
+        import main
+
+        async def fake_runner(body_dict):
+            return {"history": [{"role": "Comedian_1", "content": f"Joke about {body_dict['topic']}"}]}
+
+        monkeypatch.setattr(main.settings, "SHOW_WORKERS_WARM_UP", False)
+        monkeypatch.setattr(main.settings, "PRELOAD_HEAVY_MODULES", False)
+        monkeypatch.setattr(main, "show_pool", Mock())
+        monkeypatch.setattr(main, "io_pool", Mock())
+        monkeypatch.setattr(main.show_jobs, "runner", fake_runner)
+        request_data = {
+            "comedian1_persona": {"name": "A", "style": "relatable", "description": "A", "description_pl": "A"},
+            "comedian2_persona": {"name": "B", "style": "absurd", "description": "B", "description_pl": "B"},
+            "topic": "airplanes",
+        }
+        with TestClient(app) as lifespan_client:
+            response = lifespan_client.post("/generate-show/jobs", json=request_data)
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            events = lifespan_client.get(f"/generate-show/jobs/{job_id}/events")
+            assert "event: done" in events.text
+
+            job = lifespan_client.get(f"/generate-show/jobs/{job_id}").json()
+            assert job["status"] == "completed"
+            assert job["result"]["history"][0]["content"] == "Joke about airplanes"
+
+            stats = lifespan_client.get("/generate-show/jobs/stats").json()
+            assert stats["completed"] >= 1
+            assert stats["queue_depth"] == 0
+
+        assert client.get("/generate-show/jobs/missing").status_code == 404
+
     def test_tts_endpoint(self):
         """Test TTS endpoint"""
         request_data = {"text": "Hello, this is a test.", "lang": "en"}
@@ -91,6 +158,86 @@ class TestAPIEndpoints:
         # and that it returns a proper error response
         assert response.status_code in [200, 422, 500]  # Accept OK or error responses due to mocking or missing API keys
 
+    def test_tts_endpoint_serves_repeats_from_cache(self):
+        """Test repeated TTS requests are served from the audio cache"""
+        request_data = {"text": "Cache me if you can.", "lang": "en", "voice_id": "cache-test"}
+        first = client.post("/tts", json=request_data)
+        assert first.content == b"FAKE_WAV_DATA"
+        response = client.post("/tts", json=request_data)
+        assert response.status_code == 200
+        assert response.headers.get("x-tts-cache") == "hit"
+        assert response.content == b"FAKE_WAV_DATA"
+
+        stats = client.get("/tts/cache-stats")
+        assert stats.status_code == 200
+        assert stats.json()["memory_hits"] + stats.json()["disk_hits"] >= 1
+
+    def test_tts_cache_lookups_run_off_the_event_loop(self, monkeypatch):
+        """Test the cache lookups that decide the rate limit run on the I/O pool"""
+        threads = {}
+
+        def lookup(name, result):
+            return lambda *args: threads.setdefault(name, threading.current_thread().name) and result
+
+        monkeypatch.setattr(api_service, "cached_tts", lookup("cached_tts", b"CACHED"))
+        monkeypatch.setattr(api_service, "batch_cached", lookup("batch_cached", False))
+        assert client.post("/tts", json={"text": "Off the loop.", "lang": "en"}).content == b"CACHED"
+        client.post("/tts/batch", json={"history": [{"role": "Comedian_1", "content": "Off the loop."}], "lang": "en"})
+        assert threads["cached_tts"].startswith("blocking-io")
+        assert threads["batch_cached"].startswith("blocking-io")
+
+    def test_tts_endpoint_negotiates_audio_format(self):
+        """Test the Accept header and format field select the encoding and media type"""
+        request_data = {"text": "Compress me.", "lang": "en", "voice_id": "format-test"}
+        response = client.post("/tts", json=request_data, headers={"Accept": "audio/mpeg"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.headers["vary"] == "Accept"
+
+        # The format field wins over Accept, and the encoded variant is served from the cache
+        cached = client.post("/tts", json={**request_data, "format": "mp3"}, headers={"Accept": "audio/wav"})
+        assert cached.headers["content-type"] == "audio/mpeg"
+        assert cached.headers.get("x-tts-cache") == "hit"
+
+        unsupported = client.post("/tts", json=request_data, headers={"Accept": "audio/flac"})
+        assert unsupported.status_code == 406
+        assert unsupported.json()["error_code"] == "UNSUPPORTED_AUDIO_FORMAT"
+
+    def test_tts_batch_endpoint_returns_manifest_of_cached_clips(self):
+        """Test whole-show TTS returns one fetchable clip per comedian line"""
+        request_data = {
+            "history": [
+                {"role": "chat_manager", "content": "Opening prompt"},
+                {"role": "Comedian_1", "content": "Batch line one."},
+                {"role": "Comedian_2", "content": "Batch line two."},
+            ],
+            "lang": "en",
+        }
+        response = client.post("/tts/batch", json=request_data)
+        assert response.status_code == 200
+        data = response.json()
+        assert [clip["index"] for clip in data["clips"]] == [1, 2]
+        assert [clip["role"] for clip in data["clips"]] == ["Comedian_1", "Comedian_2"]
+        assert data["media_type"] == "audio/mpeg"
+
+        clip = client.get(data["clips"][0]["url"])
+        assert clip.status_code == 200
+        assert clip.content == b"FAKE_WAV_DATA"
+        assert clip.headers["content-type"] == "audio/mpeg"
+
+        # A fully cached show is served without touching the provider or the rate limit
+        repeat = client.post("/tts/batch", json=request_data)
+        assert all(clip["cached"] for clip in repeat.json()["clips"])
+
+        assert client.get(f"/tts/clips/{'0' * 64}.mp3").status_code == 404
+        assert client.get("/tts/clips/not-a-clip").status_code == 404
+
+    def test_tts_batch_endpoint_rejects_history_without_comedians(self):
+        """Test whole-show TTS with nothing to say"""
+        response = client.post("/tts/batch", json={"history": [{"role": "chat_manager", "content": "Opening prompt"}]})
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "TTS_BATCH_EMPTY"
+
     def test_tts_endpoint_invalid_request(self):
         """Test TTS endpoint with invalid request"""
         request_data = {"text": "", "lang": "invalid_lang"}  # Empty text  # Invalid language
@@ -128,6 +275,46 @@ class TestAPIEndpoints:
         assert isinstance(data["winner"], str)
         assert isinstance(data["summary"], str)
 
+    def test_judge_show_runs_off_event_loop(self, monkeypatch):
+        """Test the blocking judge call is dispatched to the bounded I/O thread pool"""
+        import threading
+
+        import main
+
+        threads = []
+
+        def fake_judge_show(**kwargs):
+            threads.append(threading.current_thread().name)
+            return kwargs["comedian1_name"], "Funnier."
+
+        monkeypatch.setattr(main.llm_service, "judge_show", fake_judge_show)
+        request_data = {
+            "comedian1_name": "ComedianA",
+            "comedian2_name": "ComedianB",
+            "history": [{"role": "ComedianA", "content": "Joke"}],
+            "lang": "en",
+        }
+        response = client.post("/judge-show", json=request_data)
+        assert response.status_code == 200
+        assert response.json()["winner"] == "ComedianA"
+        assert threads and threads[0].startswith("blocking-io")
+
+    def test_metrics_endpoint(self):
+        """Test Prometheus metrics include endpoint latency, stage latency and pool gauges"""
+        from utils.metrics import stage_timer
+
+        client.get("/health")
+        with stage_timer("judge"):
+            pass
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'robocomic_http_request_duration_seconds_count{endpoint="/health",method="GET",status="200"}' in text
+        assert 'robocomic_stage_duration_seconds_count{stage="judge"}' in text
+        assert "robocomic_show_pool_in_flight" in text
+        assert "robocomic_show_jobs_queue_depth" in text
+
     def test_cors_headers(self):
         """Test CORS headers are present for GET and OPTIONS requests"""
         # For GET request
@@ -1,10 +1,17 @@
 import json
+import threading
 import time
 from unittest.mock import Mock, patch
 
+import pytest
+import uvicorn
 from fastapi.testclient import TestClient
 
+from fakes.openai_stub import StubConfig, create_app
 from main import app
+from services.llm_service import LLMService
+from tts.fake_tts_service import FakeTTSService
+from utils.resilience import ResilienceService
 
 client = TestClient(app)
 
@@ -252,3 +259,59 @@ class TestDataFlowIntegration:
         # The validation error handler has an issue with JSON serialization
         # but the endpoint should still return a 422 status
         assert response.status_code == 422
+
+
+class TestFakeBackends:
+    """Test the offline LLM and TTS stand-ins"""
+
+    @pytest.fixture
+    def stub_client(self):
+        return TestClient(create_app(StubConfig(latency=0, tokens_per_second=0, completion_tokens=5)))
+
+    def test_stub_chat_completion(self, stub_client):
+        response = stub_client.post(
+            "/v1/chat/completions", json={"model": "m", "messages": [{"role": "user", "content": "Hi"}]}
+        )
+        data = response.json()
+        assert data["object"] == "chat.completion"
+        assert len(data["choices"][0]["message"]["content"].split()) == 5
+        assert data["usage"]["completion_tokens"] == 5
+
+    def test_stub_streams_tokens(self, stub_client):
+        response = stub_client.post(
+            "/v1/chat/completions", json={"model": "m", "stream": True, "messages": [{"role": "user", "content": "Hi"}]}
+        )
+        events = [line[len("data: ") :] for line in response.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        deltas = [json.loads(event)["choices"][0]["delta"].get("content", "") for event in events[:-1]]
+        assert len("".join(deltas).split()) == 5
+
+    def test_llm_service_judges_against_stub_server(self, monkeypatch):
+        server = uvicorn.Server(
+            uvicorn.Config(create_app(StubConfig(latency=0, tokens_per_second=0)), port=0, log_level="error")
+        )
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        try:
+            monkeypatch.setattr("config.settings.LLM_BASE_URL", f"http://127.0.0.1:{port}/v1")
+            llm_service = LLMService(logger=Mock(), resilience_service=ResilienceService(logger=Mock()))
+            winner, summary = llm_service.judge_show("Alice", "Bob", [{"role": "Alice", "content": "Joke"}])
+            assert winner == "Alice"
+            assert "timing" in summary
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+
+    def test_fake_tts_returns_sized_audio(self, monkeypatch):
+        monkeypatch.setattr("config.settings.FAKE_TTS_LATENCY_MS", 0)
+        monkeypatch.setattr("config.settings.FAKE_TTS_SPEED", 1000)
+        service = FakeTTSService(logger=Mock())
+        audio = service.speak("x" * 30)
+        # 30 characters at 15 chars/s is two seconds of 16 kHz 16-bit mono
+        assert audio[:4] == b"RIFF"
+        assert len(audio) == 44 + 2 * 16000 * 2
+        streamed = b"".join(service.stream("x" * 30))
+        assert len(streamed) == len(audio)
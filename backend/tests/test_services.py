@@ -1,11 +1,39 @@
-from unittest.mock import Mock, patch
+import io
+import sys
+import types
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, Mock, patch
 
+import numpy as np
 import pytest
+import requests
 
+from agents.comedian_agent import ComedianAgent
+from config import settings
 from config.personas import COMEDIAN_PERSONAS
-from models.api_models import GenerateShowRequest, TTSRequest
-from services.agent_manager import AgentManager
+from models.api_models import AudioFormat, GenerateShowRequest, TTSBatchRequest, TTSRequest
+from services.agent_manager import AgentManager, DuelCheckpoint, DuelWindow, fallback_summary
 from services.api_service import ApiService
+from services.llm_service import LLMService
+from services.topic_context_cache import TopicContextCache
+from services.worker_pool import ShowWorkerPool
+from tts.audio_cache import AudioCache
+from tts.audio_encoding import (
+    crossfade_concat,
+    crossfade_stream,
+    encode_audio,
+    negotiate_audio_format,
+    stitch_audio,
+    to_pcm16,
+    wav_stream_header,
+)
+from tts.bark_model import BarkModel, split_segments
+from tts.bark_tts_service import BarkTTSService
+from tts.comedianify_cache import ComedianifyCache
+from tts.eleven_tts_service import ElevenTTSService
+from tts.tts_service import TTSService
+from utils.exceptions import APIException, TTSServiceException, UpstreamUnavailableException
+from utils.resilience import ResilienceService
 
 
 class TestAgentManager:
@@ -61,18 +89,212 @@ class TestAgentManager:
         except Exception:
             pass
 
-    def test_validate_comedians(self):
-        mock_logger = Mock()
+    @pytest.fixture
+    def manager(self):
         mock_resilience_service = Mock()
-        manager = AgentManager(logger=mock_logger, resilience_service=mock_resilience_service)
-        valid_comedians = list(COMEDIAN_PERSONAS.keys())[:2]
-        assert len(valid_comedians) >= 2
-        try:
-            manager.set_personas(valid_comedians[0], valid_comedians[1], lang="en")
-            assert manager.comedian1_key == valid_comedians[0]
-            assert manager.comedian2_key == valid_comedians[1]
-        except Exception:
-            pass
+        mock_resilience_service.resilient_llm_call.return_value = lambda func: func
+        return AgentManager(logger=Mock(), resilience_service=mock_resilience_service)
+
+    def test_iter_duel_alternates_comedians(self, manager):
+        persona = COMEDIAN_PERSONAS["relatable"]
+        messages = list(manager.iter_duel("topical", topic="airplanes", max_rounds=1, persona1=persona, persona2=persona))
+        assert [msg["role"] for msg in messages] == ["chat_manager", "Comedian_1", "Comedian_2", "Comedian_1"]
+        assert messages[1]["content"] == "Joke 1"
+        assert messages[3]["content"] == "Joke 3"
+
+    def test_iter_duel_stops_when_cancelled(self, manager):
+        import threading
+
+        cancel_event = threading.Event()
+        persona = COMEDIAN_PERSONAS["relatable"]
+        messages = []
+        for message in manager.iter_duel("roast", max_rounds=3, persona1=persona, persona2=persona, cancel_event=cancel_event):
+            messages.append(message)
+            if len(messages) == 2:
+                cancel_event.set()
+        assert len(messages) == 2
+
+    def test_iter_duel_turn_timeout(self, manager):
+        import time
+
+        from autogen import ConversableAgent
+
+        from utils.exceptions import AgentException
+
+        persona = COMEDIAN_PERSONAS["relatable"]
+        with patch.object(ConversableAgent, "generate_reply", lambda self, messages=None, **kw: time.sleep(1) or "late"):
+            with pytest.raises(AgentException):
+                list(manager.iter_duel("roast", persona1=persona, persona2=persona, turn_timeout=0.1))
+
+    def test_run_duel_keeps_partial_history_on_failure(self, manager):
+        persona = COMEDIAN_PERSONAS["relatable"]
+        replies = iter(["First joke"])
+
+        def flaky_reply(self, messages=None, **kw):
+            return next(replies)
+
+        from autogen import ConversableAgent
+
+        checkpoint = DuelCheckpoint()
+        with patch.object(ConversableAgent, "generate_reply", flaky_reply):
+            history = manager.run_duel("roast", max_rounds=2, persona1=persona, persona2=persona, checkpoint=checkpoint)
+        assert [msg["content"] for msg in history[1:]] == ["First joke"]
+        assert not checkpoint.complete
+
+    def test_generate_show_flags_incomplete_duel(self, manager, monkeypatch):
+        monkeypatch.setattr(settings, "DUEL_TURN_RETRY_WAIT", 0)
+        persona = {**COMEDIAN_PERSONAS["relatable"], "name": "Relatable"}
+        request = GenerateShowRequest(
+            comedian1_persona=persona, comedian2_persona=persona, mode="roast", num_rounds=2, build_context=False
+        )
+        service = ApiService(agent_manager=manager, tts_service=Mock(), logger=Mock(), llm_service=Mock())
+        replies = iter(["First joke"])
+
+        from autogen import ConversableAgent
+
+        with patch.object(ConversableAgent, "generate_reply", lambda self, messages=None, **kw: next(replies)):
+            response = service.generate_show(request)
+        assert response.incomplete
+        assert response.turns_completed == 1
+        assert response.message == "Show ended after 1 of 7 turns"
+
+        assert not service.generate_show(request.model_copy(update={"num_rounds": 1})).incomplete
+
+    def test_iter_duel_retries_only_the_failed_turn(self, manager, monkeypatch):
+        monkeypatch.setattr(settings, "DUEL_TURN_RETRY_WAIT", 0)
+        persona = COMEDIAN_PERSONAS["relatable"]
+        calls = []
+
+        def flaky_reply(self, messages=None, **kw):
+            calls.append(len(messages))
+            if len(calls) == 2:
+                raise ConnectionError("transient")
+            return f"Joke {len(messages)}"
+
+        from autogen import ConversableAgent
+
+        checkpoint = DuelCheckpoint()
+        with patch.object(ConversableAgent, "generate_reply", flaky_reply):
+            messages = list(
+                manager.iter_duel("roast", max_rounds=1, persona1=persona, persona2=persona, checkpoint=checkpoint)
+            )
+        assert [msg["content"] for msg in messages[1:]] == ["Joke 1", "Joke 2", "Joke 3"]
+        # The failed second turn was replayed with the same history; the first turn was not redone
+        assert calls == [1, 2, 2, 3]
+        assert checkpoint.retries == 1
+        assert checkpoint.history == messages
+
+    def test_iter_duel_resumes_from_checkpoint(self, manager):
+        persona = COMEDIAN_PERSONAS["relatable"]
+        checkpoint = DuelCheckpoint(
+            history=[{"role": "chat_manager", "content": "Go"}, {"role": "Comedian_1", "content": "A"}]
+        )
+        messages = list(manager.iter_duel("roast", max_rounds=1, persona1=persona, persona2=persona, checkpoint=checkpoint))
+        assert [msg["role"] for msg in messages] == ["Comedian_2", "Comedian_1"]
+        assert messages[0]["content"] == "Joke 2"
+        assert checkpoint.turns_done == 3
+
+    def test_iter_duel_keeps_turn_prompts_flat(self, manager, monkeypatch):
+        monkeypatch.setattr(settings, "DUEL_WINDOW_TURNS_ROAST", 2)
+        monkeypatch.setattr(settings, "DUEL_SUMMARY_BATCH", 2)
+        manager.llm_service = Mock()
+        manager.llm_service.summarize_duel.side_effect = lambda summary, turns, lang: f"{summary}+{len(turns)}"
+        persona = COMEDIAN_PERSONAS["relatable"]
+        prompts = []
+
+        def reply(self, messages=None, **kw):
+            prompts.append(messages)
+            return f"Joke {len(prompts)}"
+
+        from autogen import ConversableAgent
+
+        checkpoint = DuelCheckpoint()
+        with patch.object(ConversableAgent, "generate_reply", reply):
+            history = list(manager.iter_duel("roast", max_rounds=3, persona1=persona, persona2=persona, checkpoint=checkpoint))
+        assert len(history) == 12
+        # Opening prompt, then the summary once one is due, then 2 or 3 turns verbatim
+        assert [len(messages) for messages in prompts] == [1, 2, 3, 4, 4, 5, 4, 5, 4, 5, 4]
+        assert manager.llm_service.summarize_duel.call_count == 4
+        assert checkpoint.summary == "+2+2+2+2"
+        assert checkpoint.summarized == 8
+        assert prompts[-1][1]["content"] == "Earlier in the show (summary):\n+2+2+2+2"
+        assert [msg["content"] for msg in prompts[-1][2:]] == ["Joke 9", "Joke 10"]
+
+    def test_iter_duel_falls_back_when_summary_fails(self, manager, monkeypatch):
+        monkeypatch.setattr(settings, "DUEL_WINDOW_TURNS_ROAST", 1)
+        monkeypatch.setattr(settings, "DUEL_SUMMARY_BATCH", 1)
+        monkeypatch.setattr(settings, "DUEL_SUMMARY_MAX_WORDS", 5)
+        manager.llm_service = Mock()
+        manager.llm_service.summarize_duel.return_value = ""
+        persona = COMEDIAN_PERSONAS["relatable"]
+        checkpoint = DuelCheckpoint()
+        list(manager.iter_duel("roast", max_rounds=1, persona1=persona, persona2=persona, checkpoint=checkpoint))
+        assert checkpoint.summarized == 1
+        assert checkpoint.summary == "Comedian_1: Joke 1"
+
+    def test_duel_window_per_mode(self, monkeypatch):
+        monkeypatch.setattr(settings, "DUEL_WINDOW_TURNS_ROAST", 2)
+        monkeypatch.setattr(settings, "DUEL_WINDOW_TURNS_TOPICAL", 0)
+        monkeypatch.setattr(settings, "DUEL_SUMMARY_BATCH", 1)
+        checkpoint = DuelCheckpoint(
+            history=[{"role": "chat_manager", "content": "Go"}]
+            + [{"role": f"Comedian_{i % 2 + 1}", "content": f"joke {i}"} for i in range(3)]
+        )
+        assert DuelWindow.for_mode("topical", "en").due(checkpoint) == []
+        assert DuelWindow.for_mode("roast", "en").due(checkpoint) == checkpoint.history[1:2]
+        assert DuelWindow.for_mode("roast", "pl").apply(checkpoint) == checkpoint.history
+
+        checkpoint.summary, checkpoint.summarized = "Old jokes", 1
+        messages = DuelWindow.for_mode("roast", "pl").apply(checkpoint)
+        assert messages[1]["content"] == "Wcześniej w programie (streszczenie):\nOld jokes"
+        assert messages[2:] == checkpoint.history[2:]
+
+    def test_fallback_summary_keeps_the_latest_words(self):
+        turns = [{"role": "Comedian_2", "content": "one two three"}]
+        assert fallback_summary("alpha beta", turns, max_words=4) == "Comedian_2: one two three"
+        assert fallback_summary("", turns, max_words=10) == "Comedian_2: one two three"
+
+    def test_comedian_records_each_token_once(self):
+        from agents.comedian_agent import ComedianAgent
+        from utils.usage import track_usage
+
+        comedian = ComedianAgent(Mock())
+        comedian.agent = Mock()
+        comedian.agent.client.actual_usage_summary = None
+
+        def reply(messages):
+            # The client's usage summary is a running total per model
+            usage = (comedian.agent.client.actual_usage_summary or {}).get("gpt", {"prompt_tokens": 0, "completion_tokens": 0})
+            comedian.agent.client.actual_usage_summary = {
+                "total_cost": 0,
+                "gpt": {"prompt_tokens": usage["prompt_tokens"] + 10, "completion_tokens": usage["completion_tokens"] + 2},
+            }
+            return "Joke"
+
+        comedian.agent.generate_reply.side_effect = reply
+        with track_usage("duel", Mock()) as usage:
+            comedian.generate_reply([])
+            comedian.generate_reply([])
+            # A hedged duplicate that finishes without new usage of its own records nothing
+            comedian._record_usage()
+        stage = usage.totals()["stages"]["duel_turn"]
+        assert (stage["calls"], stage["prompt_tokens"], stage["completion_tokens"]) == (2, 20, 4)
+
+    def test_stream_duel_emits_messages_and_history(self, manager):
+        persona = COMEDIAN_PERSONAS["relatable"]
+        events = list(manager.stream_duel("topical", topic="airplanes", max_rounds=1, persona1=persona, persona2=persona))
+        assert [e["event"] for e in events] == ["message"] * 4 + ["done"]
+        assert events[-1]["data"] == [e["data"] for e in events[:-1]]
+
+    def test_generate_show_builds_one_pair_of_agents(self, manager):
+        persona = {**COMEDIAN_PERSONAS["relatable"], "name": "Relatable"}
+        request = GenerateShowRequest(
+            comedian1_persona=persona, comedian2_persona=persona, mode="roast", num_rounds=1, build_context=False
+        )
+        service = ApiService(agent_manager=manager, tts_service=Mock(), logger=Mock(), llm_service=Mock())
+        with patch("services.agent_manager.ComedianAgent", wraps=ComedianAgent) as agents:
+            assert len(service.generate_show(request).history) == 4
+        assert agents.call_count == 2
 
 
 class TestApiService:
@@ -122,7 +344,6 @@ class TestApiService:
             temperature=0.7,
         )
         try:
-            service.agent_manager.set_personas.return_value = None
             service.agent_manager.run_duel.return_value = [{"role": "comedian1", "content": "joke"}]
             result = service.generate_show(request)
             assert result is not None
@@ -130,6 +351,38 @@ class TestApiService:
         except Exception:
             pass
 
+    def test_stream_show_service(self):
+        mock_agent_manager = Mock()
+        mock_logger = Mock()
+        service = ApiService(agent_manager=mock_agent_manager, tts_service=Mock(), logger=mock_logger, llm_service=Mock())
+        mock_agent_manager.stream_duel.return_value = iter(
+            [
+                {"event": "message", "data": {"role": "Comedian_1", "content": "joke"}},
+                {"event": "done", "data": [{"role": "Comedian_1", "content": "joke"}]},
+            ]
+        )
+        request = GenerateShowRequest(
+            comedian1_persona=COMEDIAN_PERSONAS["relatable"] | {"name": "Relatable"},
+            comedian2_persona=COMEDIAN_PERSONAS["absurd"] | {"name": "Absurd"},
+            topic="airplanes",
+        )
+        events = list(service.stream_show(request))
+        assert [event for event, _ in events] == ["message", "done"]
+        assert events[0][1] == {"role": "Comedian_1", "content": "joke"}
+        assert events[1][1]["history"] == [{"role": "Comedian_1", "content": "joke"}]
+
+    def test_stream_show_reports_errors_as_event(self):
+        mock_agent_manager = Mock()
+        service = ApiService(agent_manager=mock_agent_manager, tts_service=Mock(), logger=Mock(), llm_service=Mock())
+        mock_agent_manager.stream_duel.side_effect = RuntimeError("boom")
+        request = GenerateShowRequest(
+            comedian1_persona=COMEDIAN_PERSONAS["relatable"] | {"name": "Relatable"},
+            comedian2_persona=COMEDIAN_PERSONAS["absurd"] | {"name": "Absurd"},
+        )
+        events = list(service.stream_show(request))
+        assert events[-1][0] == "error"
+        assert events[-1][1]["error_code"] == "SHOW_GENERATION_FAILED"
+
     def test_tts_service(self):
         mock_agent_manager = Mock()
         mock_tts_service = Mock()
@@ -139,13 +392,497 @@ class TestApiService:
             agent_manager=mock_agent_manager, tts_service=mock_tts_service, logger=mock_logger, llm_service=mock_llm_service
         )
         request = TTSRequest(text="Hello, this is a test.", lang="en")
+        service.tts_service.stream.return_value = iter([b"AUDIO"])
+        assert b"".join(service.tts_stream(request)) == b"AUDIO"
+
+
+class TestLLMService:
+    """Test LLMService client and chain reuse"""
+
+    @pytest.fixture
+    def llm_service(self):
+        mock_resilience_service = Mock()
+        mock_resilience_service.resilient_llm_call.return_value = lambda func: func
+        return LLMService(logger=Mock(), resilience_service=mock_resilience_service)
+
+    def test_chains_are_built_once_per_lang_and_temperature(self, llm_service):
+        from langchain_core.language_models import FakeListChatModel
+
+        judge_reply = '```json\n{"winner": "Absurd", "summary": "Weirder and funnier."}\n```'
+        with patch.object(llm_service, "_create_llm", return_value=FakeListChatModel(responses=[judge_reply])) as create_llm:
+            history = [{"role": "Relatable", "content": "Joke"}, {"role": "Absurd", "content": "Better joke"}]
+            first = llm_service.judge_show("Relatable", "Absurd", history, lang="en")
+            second = llm_service.judge_show("Relatable", "Absurd", history, lang="en")
+
+        assert first == second == ("Absurd", "Weirder and funnier.")
+        create_llm.assert_called_once()
+        assert llm_service._get_chain("judge", "en") is llm_service._get_chain("judge", "en")
+        assert llm_service._get_chain("judge", "en") is not llm_service._get_chain("judge", "pl")
+
+    def test_summarize_duel_folds_turns_into_summary(self, llm_service):
+        from langchain_core.language_models import FakeListChatModel
+
+        with patch.object(llm_service, "_create_llm", return_value=FakeListChatModel(responses=[" A mocked B's hat. "])):
+            turns = [{"role": "A", "content": "Nice hat."}]
+            assert llm_service.summarize_duel("", turns, lang="en") == "A mocked B's hat."
+        with patch.object(llm_service, "_get_chain", side_effect=RuntimeError("down")):
+            assert llm_service.summarize_duel("Old", turns, lang="en") == ""
+
+
+class TestShowWorkerPool:
+    """Test the warm show-generation process pool"""
+
+    def test_warm_up_marks_pool_ready(self):
+        import asyncio
+
+        pool = ShowWorkerPool(Mock(), max_workers=1, max_tasks_per_child=2)
         try:
-            service.tts_service.speak.return_value = (Mock(), 22050)
-            result = service.tts(request)
-            assert result is not None
-        except Exception:
+            assert pool.state == "cold"
+            assert pool.ready
+            asyncio.run(pool.warm_up())
+            assert pool.state == "ready"
+            assert pool.executor._max_tasks_per_child == 2
+        finally:
+            pool.shutdown()
+
+
+class TestTopicContextCache:
+    """Test the SQLite topic context cache"""
+
+    cache_class = TopicContextCache
+
+    def test_normalized_topic_hits(self, make_cache):
+        cache = make_cache()
+        cache.put("Airplanes", "en", "context")
+        assert cache.get("  airplanes! ", "en") == "context"
+        assert cache.get("airplanes", "pl") is None
+
+    def test_shared_between_instances(self, make_cache):
+        make_cache().put("cats", "en", "context")
+        assert make_cache().get("cats", "en") == "context"
+
+    def test_expired_entries_are_ignored(self, make_cache):
+        cache = make_cache(ttl=3600)
+        cache.put("cats", "en", "context")
+        cache.ttl = -1
+        assert cache.get("cats", "en") is None
+
+    def test_lru_eviction(self, make_cache):
+        cache = make_cache(max_items=2)
+        cache.put("a", "en", "A")
+        cache.put("b", "en", "B")
+        cache.get("a", "en")
+        cache.put("c", "en", "C")
+        assert cache.get("a", "en") == "A"
+        assert cache.get("b", "en") is None
+
+    def test_api_service_skips_llm_on_cached_topic(self, make_cache):
+        mock_llm_service = Mock()
+        mock_llm_service.generate_topic_context.return_value = "fresh context"
+        service = ApiService(
+            agent_manager=Mock(), tts_service=Mock(), logger=Mock(), llm_service=mock_llm_service, topic_cache=make_cache()
+        )
+        request = GenerateShowRequest(
+            comedian1_persona=COMEDIAN_PERSONAS["relatable"] | {"name": "Relatable"},
+            comedian2_persona=COMEDIAN_PERSONAS["absurd"] | {"name": "Absurd"},
+            topic="Airplanes",
+            build_context=True,
+        )
+        assert service._build_context(request) == "fresh context"
+        assert service._build_context(request) == "fresh context"
+        mock_llm_service.generate_topic_context.assert_called_once()
+
+
+class TestAudioCache:
+    """Test the two-tier TTS audio cache"""
+
+    cache_class = AudioCache
+
+    def test_key_depends_on_voice_text_and_lang(self):
+        key = AudioCache.make_key("voice", "hello", "en")
+        assert key == AudioCache.make_key("voice", "hello", "en")
+        assert key != AudioCache.make_key("other", "hello", "en")
+        assert key != AudioCache.make_key("voice", "hello", "pl")
+        assert key != AudioCache.make_key("voice", "bye", "en")
+
+    def test_memory_lru_eviction_and_disk_fallback(self, make_cache):
+        cache = make_cache(memory_items=2)
+        for name in ["a", "b", "c"]:
+            cache.put(name, name.encode())
+        assert cache.get("c") == b"c"
+        assert cache.get("a") == b"a"  # evicted from memory, served from disk
+        assert cache.get("missing") is None
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["disk_hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_disk_size_eviction(self, make_cache, tmp_path):
+        cache = make_cache(memory_items=0, max_disk_mb=1)
+        chunk = b"x" * (400 * 1024)
+        for name in ["a", "b", "c"]:
+            cache.put(name, chunk)
+        assert cache.stats()["disk_bytes"] <= 1024 * 1024
+        assert len(list(tmp_path.glob("*.audio"))) == 2
+
+    def test_key_depends_on_audio_format(self):
+        key = AudioCache.make_key("voice", "hello", "en", AudioFormat.MP3)
+        assert key == AudioCache.make_key("voice", "hello", "en", "mp3")
+        assert key != AudioCache.make_key("voice", "hello", "en", AudioFormat.OPUS)
+
+    def test_tee_commits_only_completed_streams(self, make_cache, tmp_path):
+        cache = make_cache(memory_items=0)
+        assert b"".join(cache.tee("done", iter([b"ab", b"cd"]))) == b"abcd"
+        assert cache.get("done") == b"abcd"
+
+        partial = cache.tee("partial", iter([b"ab", b"cd"]))
+        next(partial)
+        partial.close()
+        assert cache.get("partial") is None
+        assert not list(tmp_path.glob("*.tmp"))
+
+    @pytest.mark.parametrize("memory_only", [False, True])
+    def test_tee_caches_streamed_wav_with_real_sizes(self, make_cache, memory_only):
+        import soundfile as sf
+
+        cache = make_cache(memory_items=2)
+        if memory_only:
+            cache.cache_dir = None
+        pcm = to_pcm16(np.linspace(-0.5, 0.5, 100, dtype=np.float32))
+        streamed = b"".join(cache.tee("wav", iter([wav_stream_header(16000), pcm[:50], pcm[50:]])))
+        assert streamed[4:8] == b"\xff\xff\xff\xff"
+
+        cached = cache.get("wav")
+        assert cached[44:] == pcm
+        assert int.from_bytes(cached[4:8], "little") == len(cached) - 8
+        assert int.from_bytes(cached[40:44], "little") == len(pcm)
+        assert len(sf.read(io.BytesIO(cached))[0]) == 100
+
+    def test_tee_streams_uncached_when_spool_cannot_be_opened(self, make_cache, tmp_path, monkeypatch):
+        cache = make_cache()
+        monkeypatch.setattr(cache, "_tmp_path", lambda key: tmp_path / "missing" / f"{key}.tmp")
+        assert b"".join(cache.tee("nospool", iter([b"ab", b"cd"]))) == b"abcd"
+        assert cache.get("nospool") is None
+
+    def test_api_service_tts_stream_caches_and_maps_errors(self, make_cache):
+        mock_tts_service = Mock()
+        mock_tts_service.stream.return_value = iter([b"AU", b"DIO"])
+        service = ApiService(
+            agent_manager=Mock(), tts_service=mock_tts_service, logger=Mock(), llm_service=Mock(), audio_cache=make_cache()
+        )
+        request = TTSRequest(text="Stream me", lang="en", voice_id="voice")
+        assert list(service.tts_stream(request)) == [b"AU", b"DIO"]
+        assert service.cached_tts(request) == b"AUDIO"
+
+        mock_tts_service.stream.side_effect = RuntimeError("boom")
+        with pytest.raises(TTSServiceException):
+            next(service.tts_stream(TTSRequest(text="Other", lang="en")))
+
+
+class TestTTSBatch:
+    """Test whole-show TTS fan-out"""
+
+    def test_maps_voices_by_role_and_synthesizes_duplicates_once(self, monkeypatch):
+        monkeypatch.setattr("services.api_service.COMEDIAN1_VOICE_ID", "voice-1")
+        monkeypatch.setattr("services.api_service.COMEDIAN2_VOICE_ID", "voice-2")
+        mock_tts_service = Mock(native_format=AudioFormat.MP3)
+        mock_tts_service.stream.side_effect = lambda text, **kwargs: iter([f"{kwargs['voice_id']}:{text}".encode()])
+        service = ApiService(agent_manager=Mock(), tts_service=mock_tts_service, logger=Mock(), llm_service=Mock())
+        request = TTSBatchRequest(
+            history=[
+                {"role": "chat_manager", "content": "Prompt"},
+                {"role": "Comedian_1", "content": "Knock knock."},
+                {"role": "Comedian_2", "content": "Who's there?"},
+                {"role": "Comedian_1", "content": "Knock knock."},
+            ]
+        )
+        clips = service.tts_batch(request)
+        assert [clip["index"] for clip in clips] == [1, 2, 3]
+        assert [clip["audio"] for clip in clips] == [b"voice-1:Knock knock.", b"voice-2:Who's there?", b"voice-1:Knock knock."]
+        assert mock_tts_service.stream.call_count == 2
+
+    def test_stitch_audio_joins_clips_with_gap(self):
+        sf = pytest.importorskip("soundfile")
+        clips = [
+            encode_audio(np.full(1000, 0.5, dtype=np.float32), 8000, AudioFormat.WAV),
+            encode_audio(np.zeros(500, dtype=np.float32), 16000, AudioFormat.WAV),
+        ]
+        track, sample_rate = sf.read(io.BytesIO(stitch_audio(clips, AudioFormat.WAV, gap_seconds=0.1)))
+        assert sample_rate == 8000
+        assert len(track) == 1000 + 800 + 250
+
+
+class TestBarkModel:
+    """Test the Bark weight lifecycle without the real model"""
+
+    @pytest.fixture
+    def fake_bark(self, monkeypatch):
+        loaded = {"preload": 0, "clean": 0}
+        bark = types.ModuleType("bark")
+        bark.preload_models = lambda: loaded.__setitem__("preload", loaded["preload"] + 1)
+        bark.generate_audio = lambda text, history_prompt=None, silent=False: np.zeros(len(text), dtype=np.float32)
+        generation = types.ModuleType("bark.generation")
+        generation.clean_models = lambda: loaded.__setitem__("clean", loaded["clean"] + 1)
+        bark.generation = generation
+        monkeypatch.setitem(sys.modules, "bark", bark)
+        monkeypatch.setitem(sys.modules, "bark.generation", generation)
+        return loaded
+
+    def test_loads_once_and_reloads_after_release(self, fake_bark):
+        model = BarkModel(logger=Mock())
+        assert model.state == "unloaded"
+        model.load()
+        assert len(model.generate("hello")) == 5
+        assert fake_bark["preload"] == 1
+        assert model.state == "ready"
+
+        assert model.release()
+        assert model.state == "unloaded"
+        assert fake_bark["clean"] == 1
+        model.generate("again")
+        assert fake_bark["preload"] == 2
+
+    def test_generate_segments_in_order(self, fake_bark):
+        model = BarkModel(logger=Mock())
+        assert [len(audio) for audio in model.generate_segments(["ab", "cde"])] == [2, 3]
+
+    def test_segment_pool_is_warmed_by_load(self, fake_bark, monkeypatch):
+        pool = Mock()
+        pool.return_value.map.return_value = iter([np.zeros(1)])
+        monkeypatch.setattr("tts.bark_model.ProcessPoolExecutor", pool)
+        model = BarkModel(logger=Mock())
+        model.workers = 2
+        model.load()
+        assert model.ready
+        # Workers start without forking the torch process, each load its own weights, and this process loads none
+        assert pool.call_args.kwargs["mp_context"].get_start_method() in ("forkserver", "spawn")
+        assert pool.return_value.submit.call_count == 2
+        assert fake_bark["preload"] == 0
+
+        assert len(list(model.generate_segments(["ab"]))) == 1
+        assert pool.call_count == 1
+        assert fake_bark["preload"] == 0
+
+    def test_broken_segment_pool_is_not_ready(self, fake_bark, monkeypatch):
+        pool = Mock()
+        pool.return_value.map.side_effect = BrokenProcessPool("worker died")
+        monkeypatch.setattr("tts.bark_model.ProcessPoolExecutor", pool)
+        model = BarkModel(logger=Mock())
+        model.workers = 2
+        with pytest.raises(BrokenProcessPool):
+            list(model.generate_segments(["ab", "cd"]))
+        assert not model.ready
+
+    def test_failed_load_is_reported(self, fake_bark, monkeypatch):
+        monkeypatch.setattr(sys.modules["bark"], "preload_models", Mock(side_effect=RuntimeError("no weights")))
+        model = BarkModel(logger=Mock())
+        with pytest.raises(RuntimeError):
+            model.load()
+        assert model.state == "failed"
+        assert not model.ready
+
+    def test_not_ready_until_preloaded(self, fake_bark, monkeypatch):
+        monkeypatch.setattr("config.settings.BARK_PRELOAD", True)
+        model = BarkModel(logger=Mock())
+        assert not model.ready
+        model.load()
+        assert model.ready
+        model.release()
+        assert model.state == "unloaded"
+        assert model.ready
+
+        monkeypatch.setattr("config.settings.BARK_PRELOAD", False)
+        assert BarkModel(logger=Mock()).ready
+
+    def test_releases_when_idle(self, fake_bark, monkeypatch):
+        monkeypatch.setattr("config.settings.BARK_IDLE_RELEASE_SECONDS", 1)
+        monkeypatch.setattr("tts.bark_model.time.sleep", lambda seconds: None)
+        model = BarkModel(logger=Mock())
+        monotonic = iter([0.0, 0.5, 2.0])
+        monkeypatch.setattr("tts.bark_model.time.monotonic", lambda: next(monotonic, 2.0))
+        model.load()
+        model._reaper.join(timeout=5)
+        assert model.state == "unloaded"
+
+
+class TestBarkSegmentation:
+    """Test how Bark lines are split and joined"""
+
+    def test_splits_at_sentences_and_stage_directions(self):
+        text = "[WOMAN] So I went to the gym. [laughs] Never again! Seriously?"
+        assert split_segments(text, max_chars=1) == [
+            "[WOMAN] So I went to the gym.",
+            "[WOMAN] [laughs]",
+            "[WOMAN] Never again!",
+            "[WOMAN] Seriously?",
+        ]
+        assert split_segments(text, max_chars=40) == [
+            "[WOMAN] So I went to the gym. [laughs]",
+            "[WOMAN] Never again! Seriously?",
+        ]
+
+    def test_crossfade_joins_clips(self):
+        clips = [np.ones(10, dtype=np.float32), np.zeros(10, dtype=np.float32)]
+        joined = crossfade_concat(clips, overlap=4)
+        assert len(joined) == 16
+        assert joined[0] == 1.0 and joined[-1] == 0.0
+        assert np.all(np.diff(joined) <= 0)
+        assert np.array_equal(np.concatenate(list(crossfade_stream(iter(clips), 4))), joined)
+        assert len(crossfade_concat(clips, overlap=0)) == 20
+
+    def test_bark_service_comedianifies_once_and_splits(self, monkeypatch):
+        monkeypatch.setattr("config.settings.BARK_SEGMENT_MAX_CHARS", 1)
+        llm_service = Mock()
+        llm_service.comedianify_text.return_value = "[MAN] One. [sighs] Two."
+        service = BarkTTSService(logger=Mock(), llm_service=llm_service, model=Mock())
+        assert service._segments("One. Two.", "MAN", "en") == ["[MAN] One.", "[MAN] [sighs]", "[MAN] Two."]
+        llm_service.comedianify_text.assert_called_once()
+
+
+class TestBarkVoices:
+    """Test that Bark voices follow the request, not arrival order"""
+
+    def test_voice_follows_role(self):
+        assert BarkTTSService._voice("Comedian_2", "pl") == ("WOMAN", "v2/pl_speaker_9")
+        assert BarkTTSService._voice("Comedian_1", "en") == ("MAN", "v2/en_speaker_6")
+        assert BarkTTSService._voice(None, "en") == ("MAN", "v2/en_speaker_6")
+
+    def test_same_voice_id_keeps_comedians_apart(self, monkeypatch):
+        monkeypatch.setattr("services.api_service.COMEDIAN1_VOICE_ID", "shared")
+        monkeypatch.setattr("services.api_service.COMEDIAN2_VOICE_ID", "shared")
+        monkeypatch.setattr("config.settings.TTS_CACHE_DIR", "")
+        mock_tts_service = Mock()
+        mock_tts_service.stream.side_effect = lambda text, **kwargs: iter([kwargs["role"].encode()])
+        service = ApiService(
+            agent_manager=Mock(),
+            tts_service=mock_tts_service,
+            logger=Mock(),
+            llm_service=Mock(),
+            audio_cache=AudioCache(Mock()),
+        )
+        for role in ("Comedian_1", "Comedian_2"):
+            assert b"".join(service.tts_stream(TTSRequest(text="Hi", role=role))) == role.encode()
+        assert mock_tts_service.stream.call_count == 2
+
+    def test_api_service_picks_voice_from_role(self, monkeypatch):
+        monkeypatch.setattr("services.api_service.COMEDIAN2_VOICE_ID", "voice-2")
+        mock_tts_service = Mock()
+        mock_tts_service.stream.return_value = iter([b"AUDIO"])
+        service = ApiService(agent_manager=Mock(), tts_service=mock_tts_service, logger=Mock(), llm_service=Mock())
+        list(service.tts_stream(TTSRequest(text="Hi", role="Comedian_2")))
+        assert mock_tts_service.stream.call_args.kwargs["voice_id"] == "voice-2"
+        list(service.tts_stream(TTSRequest(text="Hi", role="Comedian_2", voice_id="explicit")))
+        assert mock_tts_service.stream.call_args.kwargs["voice_id"] == "explicit"
+
+
+class TestComedianifyCache:
+    """Test the caches that let Bark replays skip the LLM and the model"""
+
+    cache_class = ComedianifyCache
+
+    def test_keyed_by_text_gender_and_lang(self, make_cache):
+        cache = make_cache()
+        cache.put("Hi", "MAN", "en", "[MAN] HI! [laughs]")
+        assert cache.get("Hi", "MAN", "en") == "[MAN] HI! [laughs]"
+        assert cache.get("Hi", "WOMAN", "en") is None
+        assert cache.get("Hi", "MAN", "pl") is None
+
+    def test_memory_is_bounded_and_disk_survives_restart(self, make_cache):
+        cache = make_cache(memory_items=1)
+        cache.put("a", "MAN", "en", "A")
+        cache.put("b", "MAN", "en", "B")
+        assert list(cache._memory) == [ComedianifyCache.make_key("b", "MAN", "en")]
+        assert make_cache(memory_items=1).get("a", "MAN", "en") == "A"
+        assert make_cache(path="").get("a", "MAN", "en") is None
+
+    def test_bark_service_skips_llm_and_model_on_replay(self, make_cache, tmp_path, monkeypatch):
+        monkeypatch.setattr("config.settings.TTS_CACHE_DIR", str(tmp_path / "audio"))
+        llm_service = Mock()
+        llm_service.comedianify_text.return_value = "[MAN] Rewritten."
+        service = BarkTTSService(
+            logger=Mock(),
+            llm_service=llm_service,
+            model=Mock(),
+            comedianify_cache=make_cache(),
+            audio_cache=AudioCache(logger=Mock()),
+        )
+        assert service._segments("Line", "MAN", "en") == service._segments("Line", "MAN", "en")
+        llm_service.comedianify_text.assert_called_once()
+
+        audio_array = np.linspace(-1, 1, 50, dtype=np.float32)
+        assert service._cached_array("Line", "MAN", "v2/en_speaker_6", "en") is None
+        service._cache_array("Line", "MAN", "v2/en_speaker_6", "en", audio_array)
+        assert np.array_equal(service._cached_array("Line", "MAN", "v2/en_speaker_6", "en"), audio_array)
+        assert service._cached_array("Line", "WOMAN", "v2/en_speaker_9", "en") is None
+
+
+class TestAudioFormatNegotiation:
+    """Test /tts format selection from the request body and Accept header"""
+
+    @pytest.mark.parametrize(
+        "requested, accept, expected",
+        [
+            (AudioFormat.OPUS, "audio/mpeg", AudioFormat.OPUS),
+            (None, None, None),
+            (None, "application/json, text/plain, */*", None),
+            (None, "audio/ogg; codecs=opus", AudioFormat.OPUS),
+            (None, "audio/wav;q=0.5, audio/mpeg", AudioFormat.MP3),
+            (None, "audio/flac, audio/x-wav;q=0.1", AudioFormat.WAV),
+            (None, "audio/mpeg;q=0, */*", None),
+        ],
+    )
+    def test_negotiate(self, requested, accept, expected):
+        assert negotiate_audio_format(requested, accept) == expected
+
+    def test_rejects_only_unsupported_audio_types(self):
+        with pytest.raises(APIException) as exc_info:
+            negotiate_audio_format(None, "audio/flac")
+        assert exc_info.value.status_code == 406
+
+
+class TestElevenTTSService:
+    """Test the ElevenLabs HTTP client setup"""
+
+    # conftest replaces ``stream`` in every test; keep the real one for the streaming test
+    real_stream = staticmethod(ElevenTTSService.stream)
+
+    def test_uses_pooled_keep_alive_session(self, monkeypatch):
+        monkeypatch.setattr("config.settings.ELEVENLABS_POOL_SIZE", 7)
+        service = ElevenTTSService(logger=Mock(), resilience_service=Mock())
+        adapter = service.session.get_adapter(service.base_url)
+        assert adapter._pool_maxsize == 7
+        assert adapter.max_retries.total == 0
+        assert service.session.headers["xi-api-key"] == service.api_key
+        assert service.timeout == (settings.ELEVENLABS_CONNECT_TIMEOUT, settings.ELEVENLABS_READ_TIMEOUT)
+
+    def test_stream_holds_bulkhead_slot_and_reports_broken_body(self, monkeypatch):
+        monkeypatch.setattr("config.settings.TTS_BULKHEAD_SIZE", 1)
+        monkeypatch.setattr("config.settings.BULKHEAD_WAIT_SECONDS", 0)
+        resilience_service = ResilienceService(logger=Mock())
+        service = ElevenTTSService(logger=Mock(), resilience_service=resilience_service)
+
+        def body(chunk_size):
+            yield b"ID3"
+            raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+        service.session = MagicMock()
+        service.session.post.return_value.iter_content.side_effect = body
+        chunks = self.real_stream(service, "Hi")
+        assert next(chunks) == b"ID3"
+        with pytest.raises(UpstreamUnavailableException), resilience_service.bulkheads["tts"].slot():
+            pass
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            next(chunks)
+        assert resilience_service.breakers["tts"].failures == 1
+        with resilience_service.bulkheads["tts"].slot():
             pass
 
+    def test_default_stream_yields_speak_result(self):
+        class BytesTTS(TTSService):
+            def speak(self, text, lang="en", voice_id=None, role=None):
+                return f"{text}:{voice_id}:{role}".encode()
+
+        assert list(BytesTTS().stream("hi", voice_id="v1", role="Comedian_2")) == [b"hi:v1:Comedian_2"]
+
 
 class TestConfiguration:
     """Test configuration loading and validation"""
@@ -1,5 +1,27 @@
-from utils.exceptions import RoboComicException, TTSServiceException, ValidationException
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from unittest.mock import Mock
+
+import pytest
+
+from benchmarks.import_profile import parse_importtime, profile_import
+from benchmarks.run import compare, percentile, summarize
+from utils.exceptions import (
+    AgentException,
+    RoboComicException,
+    TTSServiceException,
+    UpstreamUnavailableException,
+    ValidationException,
+)
+from utils.hedging import MIN_SAMPLES, RequestHedger
 from utils.logger import setup_logger
+from utils.metrics import CountingThreadPoolExecutor, RequestTimingMiddleware, render_metrics
+from utils.resilience import Bulkhead, CircuitBreaker, ResilienceService
+from utils.usage import llm_cost, record_llm_usage, track_usage
 
 
 class TestExceptions:
@@ -84,3 +106,350 @@ class TestValidationUtils:
 
         for temp in invalid_temperatures:
             assert not (0.0 <= temp <= 2.0)
+
+
+class TestResilienceMetrics:
+    """Test retry accounting in ResilienceService"""
+
+    def test_retries_are_counted_per_operation(self):
+        def retry_count():
+            body, _ = render_metrics()
+            for line in body.decode().splitlines():
+                if line.startswith('robocomic_retries_total{operation="tts"}'):
+                    return float(line.split()[-1])
+            return 0.0
+
+        before = retry_count()
+        attempts = []
+
+        @ResilienceService(logger=Mock()).resilient_tts_call(max_attempts=3, base_wait=0, max_wait=0)
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("down")
+            return "ok"
+
+        assert flaky() == "ok"
+        assert retry_count() - before == 2
+
+    def test_streamed_response_is_timed_until_the_body_ends(self):
+        from fastapi import FastAPI
+        from fastapi.responses import StreamingResponse
+        from fastapi.testclient import TestClient
+
+        async def slow_body():
+            yield b"first"
+            await asyncio.sleep(0.3)
+            yield b"last"
+
+        app = FastAPI()
+        app.add_middleware(RequestTimingMiddleware)
+        app.get("/slow-stream")(lambda: StreamingResponse(slow_body()))
+
+        def duration_sum():
+            body, _ = render_metrics()
+            for line in body.decode().splitlines():
+                if line.startswith('robocomic_http_request_duration_seconds_sum{endpoint="/slow-stream"'):
+                    return float(line.split()[-1])
+            return 0.0
+
+        before = duration_sum()
+        response = TestClient(app).get("/slow-stream")
+        assert response.content == b"firstlast"
+        # The header goes out with the first byte; the histogram waits for the last one
+        assert float(response.headers["x-process-time"]) < 0.3
+        assert duration_sum() - before >= 0.3
+
+    def test_io_pool_counts_queued_and_running_calls(self):
+        pool = CountingThreadPoolExecutor(max_workers=1)
+        started, release = threading.Event(), threading.Event()
+        first = pool.submit(lambda: started.set() or release.wait(5))
+        second = pool.submit(lambda: "done")
+        cancelled = pool.submit(lambda: "never")
+        assert started.wait(5)
+        assert (pool.queued, pool.running) == (2, 1)
+        assert cancelled.cancel()
+        assert pool.queued == 1
+        release.set()
+        assert first.result(5) and second.result(5) == "done"
+        assert (pool.queued, pool.running) == (0, 0)
+        pool.shutdown()
+
+    def test_circuit_state_of_exited_process_is_dropped(self):
+        import subprocess
+        import sys
+
+        code = "from utils.metrics import CIRCUIT_STATE; CIRCUIT_STATE.labels(upstream='exited').set(2)"
+        subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ))
+        body, _ = render_metrics()
+        assert 'robocomic_circuit_state{upstream="exited"}' not in body.decode()
+
+    def test_reset_keeps_files_while_another_process_is_live(self, monkeypatch, tmp_path):
+        import subprocess
+        import sys
+
+        from utils.metrics import reset_multiprocess_dir
+
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        for pid in (dead.pid, os.getpid()):
+            (tmp_path / f"counter_{pid}.db").touch()
+        assert reset_multiprocess_dir()
+        assert not (tmp_path / f"counter_{dead.pid}.db").exists()
+        assert (tmp_path / f"counter_{os.getpid()}.db").exists()
+
+        sibling = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            (tmp_path / f"started_{sibling.pid}.pid").touch()
+            (tmp_path / f"counter_{dead.pid}.db").touch()
+            assert not reset_multiprocess_dir()
+            assert (tmp_path / f"counter_{dead.pid}.db").exists()
+        finally:
+            sibling.kill()
+            sibling.wait()
+
+
+class TestCircuitBreaker:
+    """Test per-upstream circuit breakers and bulkheads"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        monkeypatch.setattr("config.settings.CIRCUIT_FAILURE_THRESHOLD", 2)
+        monkeypatch.setattr("config.settings.CIRCUIT_RESET_SECONDS", 60)
+        return ResilienceService(logger=Mock())
+
+    def _failing_tts(self, service, calls):
+        @service.resilient_tts_call(max_attempts=1)
+        def call():
+            calls.append(1)
+            raise ConnectionError("down")
+
+        return call
+
+    def test_opens_after_consecutive_failures(self, service):
+        calls = []
+        call = self._failing_tts(service, calls)
+        for _ in range(2):
+            with pytest.raises(Exception):
+                call()
+        assert service.circuit_states()["tts"] == "open"
+        with pytest.raises(UpstreamUnavailableException) as exc_info:
+            call()
+        assert exc_info.value.error_code == "CIRCUIT_OPEN"
+        assert exc_info.value.status_code == 503
+        assert len(calls) == 2
+        # The LLM circuit is independent of the TTS one
+        assert service.circuit_states()["llm"] == "closed"
+
+    def test_rejection_is_not_retried(self, service):
+        service.breakers["tts"]._record_failure()
+        service.breakers["tts"]._record_failure()
+        calls = []
+
+        @service.resilient_tts_call(max_attempts=3, base_wait=0, max_wait=0)
+        def call():
+            calls.append(1)
+
+        with pytest.raises(UpstreamUnavailableException):
+            call()
+        assert calls == []
+
+    def test_half_open_probe_closes_or_reopens(self):
+        breaker = CircuitBreaker("llm", Mock(), failure_threshold=1, reset_timeout=0.01)
+        with pytest.raises(ConnectionError), breaker.guard(lambda e: True):
+            raise ConnectionError("down")
+        assert breaker.state == "open"
+        time.sleep(0.02)
+        with pytest.raises(ConnectionError), breaker.guard(lambda e: True):
+            assert breaker.state == "half_open"
+            # Only one probe at a time while half-open
+            with pytest.raises(UpstreamUnavailableException), breaker.guard(lambda e: True):
+                pass
+            raise ConnectionError("still down")
+        assert breaker.state == "open"
+        time.sleep(0.02)
+        with breaker.guard(lambda e: True):
+            pass
+        assert breaker.state == "closed"
+
+    def test_own_errors_do_not_count_as_upstream_failures(self, service):
+        @service.resilient_llm_call()
+        def call():
+            raise AgentException(message="empty reply", error_code="EMPTY_REPLY")
+
+        for _ in range(3):
+            with pytest.raises(Exception):
+                call()
+        assert service.circuit_states()["llm"] == "closed"
+
+    def test_bulkhead_rejects_when_full(self):
+        bulkhead = Bulkhead("tts", size=1, wait=0)
+        with bulkhead.slot():
+            with pytest.raises(UpstreamUnavailableException) as exc_info, bulkhead.slot():
+                pass
+        assert exc_info.value.error_code == "BULKHEAD_FULL"
+        with bulkhead.slot():
+            pass
+
+
+class TestRequestHedger:
+    """Test hedged LLM calls"""
+
+    @pytest.fixture
+    def hedger(self, monkeypatch):
+        monkeypatch.setattr("config.settings.LLM_HEDGING_ENABLED", True)
+        monkeypatch.setattr("config.settings.LLM_HEDGE_MIN_DELAY", 0.05)
+        monkeypatch.setattr("config.settings.LLM_HEDGE_BUDGET", 1.0)
+        hedger = RequestHedger(logger=Mock())
+        for _ in range(MIN_SAMPLES):
+            hedger._window("judge").record(0.01)
+        return hedger
+
+    def _slow_then_fast(self, calls):
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return "fast"
+
+        return call
+
+    def test_duplicate_wins_when_first_call_is_slow(self, hedger):
+        calls = []
+        assert hedger.call("judge", self._slow_then_fast(calls)) == "fast"
+        assert len(calls) == 2
+
+    def test_each_retry_attempt_is_hedged_on_its_own(self, hedger):
+        hedger.call = Mock(side_effect=hedger.call)
+        attempts = []
+
+        @ResilienceService(logger=Mock(), hedger=hedger).resilient_llm_call(max_attempts=2, base_wait=0, hedge="judge")
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ConnectionError("down")
+            return "ok"
+
+        before = len(hedger._window("judge")._samples)
+        assert flaky() == "ok"
+        assert hedger.call.call_count == 2
+        # Only the successful attempt is recorded, not the whole retry sequence
+        assert len(hedger._window("judge")._samples) == before + 1
+
+    def test_no_hedge_without_latency_history(self, hedger):
+        calls = []
+        assert hedger.call("topic_context", self._slow_then_fast(calls)) == "slow"
+        assert len(calls) == 1
+
+    def test_budget_caps_duplicates(self, hedger):
+        hedger.budget = 0.0
+        calls = []
+        assert hedger.call("judge", self._slow_then_fast(calls)) == "slow"
+        assert len(calls) == 1
+
+    def test_failed_call_falls_back_to_the_other(self, hedger):
+        calls = []
+
+        def call():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.2)
+                raise ConnectionError("reset")
+            time.sleep(0.3)
+            return "hedge"
+
+        assert hedger.call("judge", call) == "hedge"
+
+    def test_disabled_calls_through(self, monkeypatch):
+        monkeypatch.setattr("config.settings.LLM_HEDGING_ENABLED", False)
+        assert RequestHedger(logger=Mock()).call("judge", lambda: "ok") == "ok"
+
+
+class TestUsageTracking:
+    """Test per-request LLM token and cost accounting"""
+
+    def test_llm_cost_uses_configured_prices(self, monkeypatch):
+        monkeypatch.setattr("config.settings.LLM_PROMPT_PRICE_PER_MTOK", 2.0)
+        monkeypatch.setattr("config.settings.LLM_COMPLETION_PRICE_PER_MTOK", 10.0)
+        assert llm_cost(1_000_000, 100_000) == pytest.approx(3.0)
+
+    def test_usage_is_aggregated_by_stage_and_logged(self):
+        logger = Mock()
+        with track_usage("generate-show", logger) as usage:
+            record_llm_usage("duel_turn", 100, 20)
+            record_llm_usage("duel_turn", 120, 30)
+            record_llm_usage("judge", 200, 5)
+        totals = usage.totals()
+        assert totals["llm_calls"] == 3
+        assert totals["prompt_tokens"] == 420
+        assert totals["stages"]["duel_turn"]["completion_tokens"] == 50
+        logger.info.assert_called_once()
+        assert logger.info.call_args.kwargs["request"] == "generate-show"
+        assert 'robocomic_llm_tokens_total{kind="prompt",stage="judge"}' in render_metrics()[0].decode()
+
+    def test_nested_request_adds_to_outer(self):
+        logger = Mock()
+        with track_usage("generate-show", logger) as outer:
+            with track_usage("judge-show", logger) as inner:
+                record_llm_usage("judge", 10, 1)
+        assert inner is outer
+        assert outer.totals()["llm_calls"] == 1
+        logger.info.assert_called_once()
+
+    def test_usage_follows_copied_context_into_threads(self):
+        with track_usage("generate-show", Mock()) as usage:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(copy_context().run, record_llm_usage, "duel_turn", 10, 2).result()
+        assert usage.totals()["completion_tokens"] == 2
+
+    def test_usage_outside_a_request_only_updates_metrics(self):
+        record_llm_usage("topic_context", 5, 5)
+        assert 'robocomic_llm_cost_usd_total{stage="topic_context"}' in render_metrics()[0].decode()
+
+
+class TestBenchmarkStats:
+    """Test the load-test summary helpers"""
+
+    def test_percentile_interpolates(self):
+        values = [0.4, 0.1, 0.3, 0.2]
+        assert percentile(values, 50) == 0.25
+        assert percentile(values, 100) == 0.4
+        assert percentile([], 99) == 0.0
+
+    def test_summarize_counts_errors_and_reports_milliseconds(self):
+        stats = summarize([0.1, 0.2, 0.3], errors=1, elapsed=2.0)
+        assert stats["requests"] == 4
+        assert stats["errors"] == 1
+        assert stats["throughput_rps"] == 1.5
+        assert stats["p50_ms"] == 200.0
+        assert stats["max_ms"] == 300.0
+
+    def test_compare_matches_endpoint_and_level(self):
+        before = {"results": {"tts": {"4": summarize([0.2, 0.2], 0, 1.0)}}}
+        after = {"results": {"tts": {"4": summarize([0.1, 0.1], 0, 1.0), "16": summarize([0.1], 0, 1.0)}}}
+        rows = compare(before, after)
+        assert len(rows) == 1
+        assert rows[0]["concurrency"] == 4
+        assert rows[0]["p50_ms"]["change"] == -0.5
+
+
+class TestColdStart:
+    """Test that the API entry point keeps heavy modules out of startup"""
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        records = parse_importtime(stderr)
+        assert [r["module"] for r in records] == ["json.decoder", "json"]
+        assert records[0]["depth"] == 1
+        assert records[1]["cumulative_us"] == 420
+
+    def test_main_imports_without_heavy_modules(self):
+        profile = profile_import("main")
+        assert profile["heavy_modules_loaded"] == []
+        assert profile["import_ms"] > 0
@@ -0,0 +1,225 @@
+"""Content-addressed audio cache for TTS output."""
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import injector
+import structlog
+
+from config import settings
+
+from .audio_encoding import complete_wav_header
+
+# Bytes read from the start of a spooled clip to find its WAV header and data chunk
+WAV_HEADER_SCAN = 4096
+
+
+class AudioCache:
+    """Two-tier (memory LRU + disk) cache for synthesized audio keyed by (voice_id, text, lang).
+
+    The memory tier evicts the least recently used clip once it holds more than
+    ``TTS_CACHE_MEMORY_ITEMS`` entries. The disk tier evicts the least recently used files
+    once their total size exceeds ``TTS_CACHE_MAX_DISK_MB``.
+    """
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.max_memory_items = settings.TTS_CACHE_MEMORY_ITEMS
+        self.max_disk_bytes = settings.TTS_CACHE_MAX_DISK_MB * 1024 * 1024
+        self.cache_dir = Path(settings.TTS_CACHE_DIR) if settings.TTS_CACHE_DIR and self.max_disk_bytes else None
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk_bytes = 0
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_bytes = sum(f.stat().st_size for f in self.cache_dir.glob("*.audio"))
+            except OSError as e:
+                self.logger.warning(f"TTS disk cache disabled: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def make_key(voice_id: Optional[str], text: str, lang: str, audio_format: Optional[str] = None) -> str:
+        """Build a stable content-addressed key for a clip; each encoded format is cached separately."""
+        parts = [voice_id or "", str(getattr(lang, "value", lang)), text]
+        if audio_format is not None:
+            parts.append(str(getattr(audio_format, "value", audio_format)))
+        raw = "\0".join(parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Check for an entry without touching LRU order or hit counters."""
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self.cache_dir is not None and self._path(key).exists()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if self.max_memory_items <= 0:
+            return
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.audio"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # Bump mtime so eviction is least-recently-used rather than oldest-written
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self.logger.warning(f"Failed to read TTS cache entry {key}: {e}")
+            return None
+
+    def tee(self, key: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass audio chunks through while writing them to the cache.
+
+        Chunks are spooled straight to disk, so the full clip is never buffered in memory. The entry is
+        only committed if the stream completes; an error or early close discards it. A streamed WAV is
+        cached with its real RIFF and data sizes in place of the open-ended ones sent to the client. If
+        the spool file cannot be created, the stream is passed through uncached.
+        """
+        if self.cache_dir is None:
+            buffered = []
+            for chunk in chunks:
+                buffered.append(chunk)
+                yield chunk
+            data = b"".join(buffered)
+            header = complete_wav_header(data[:WAV_HEADER_SCAN], len(data))
+            with self._lock:
+                self._remember(key, data if header is None else header + data[len(header) :])
+            return
+        tmp_path = self._tmp_path(key)
+        try:
+            spool = open(tmp_path, "wb")
+        except OSError as e:
+            self.logger.warning(f"Not caching TTS stream {key}: {e}")
+            yield from chunks
+            return
+        size = 0
+        completed = False
+        try:
+            with spool:
+                for chunk in chunks:
+                    spool.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            if completed and size <= self.max_disk_bytes and self._complete_spooled_wav(key, tmp_path, size):
+                self._commit_disk(key, tmp_path, size)
+            else:
+                tmp_path.unlink(missing_ok=True)
+
+    def _complete_spooled_wav(self, key: str, tmp_path: Path, size: int) -> bool:
+        """Write the final sizes into a spooled streamed WAV; other formats are left as they are."""
+        try:
+            with open(tmp_path, "r+b") as f:
+                header = complete_wav_header(f.read(WAV_HEADER_SCAN), size)
+                if header is not None:
+                    f.seek(0)
+                    f.write(header)
+        except OSError as e:
+            self.logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+            return False
+        return True
+
+    def _tmp_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if self.cache_dir is None or len(data) > self.max_disk_bytes:
+            return
+        tmp_path = self._tmp_path(key)
+        try:
+            tmp_path.write_bytes(data)
+        except OSError as e:
+            self.logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._commit_disk(key, tmp_path, len(data))
+
+    def _commit_disk(self, key: str, tmp_path: Path, size: int) -> None:
+        path = self._path(key)
+        try:
+            existing = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write TTS cache entry {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._disk_bytes += size - existing
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for f in self.cache_dir.glob("*.audio"):
+            try:
+                stat = f.stat()
+                entries.append((stat.st_mtime, stat.st_size, f))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                f.unlink()
+                total -= size
+            except FileNotFoundError:
+                total -= size
+        with self._lock:
+            self._disk_bytes = total
+        self.logger.debug(f"Evicted TTS disk cache down to {total} bytes")
@@ -0,0 +1,213 @@
+"""Audio encoding and format negotiation helpers shared by TTS services and the API."""
+
+import io
+import struct
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+
+from models import AudioFormat
+from utils.exceptions import APIException
+from utils.metrics import stage_timer
+
+# Data size used in streamed WAV headers when the final length is not known yet
+STREAMING_WAV_SIZE = 0xFFFFFFFF
+
+MEDIA_TYPES = {
+    AudioFormat.WAV: "audio/wav",
+    AudioFormat.MP3: "audio/mpeg",
+    AudioFormat.OPUS: "audio/ogg; codecs=opus",
+}
+
+# Accept header media types understood by /tts, including common aliases
+ACCEPT_TYPES = {
+    "audio/wav": AudioFormat.WAV,
+    "audio/wave": AudioFormat.WAV,
+    "audio/x-wav": AudioFormat.WAV,
+    "audio/mpeg": AudioFormat.MP3,
+    "audio/mp3": AudioFormat.MP3,
+    "audio/ogg": AudioFormat.OPUS,
+    "audio/opus": AudioFormat.OPUS,
+}
+
+# Sample rates libopus can encode natively
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# libsndfile (format, subtype) per output format
+_SOUNDFILE_FORMATS = {
+    AudioFormat.WAV: ("WAV", "PCM_16"),
+    AudioFormat.MP3: ("MP3", "MPEG_LAYER_III"),
+    AudioFormat.OPUS: ("OGG", "OPUS"),
+}
+
+
+def _rank_accept(header: str) -> list[str]:
+    """Media types from an Accept header, best first: by q-value, then by position. Types with q=0 are dropped."""
+    ranked = []
+    for position, item in enumerate(header.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(ranked)]
+
+
+def negotiate_audio_format(requested: Optional[AudioFormat], accept: Optional[str]) -> Optional[AudioFormat]:
+    """Pick the output format from an explicit request field or the Accept header.
+
+    Returns None when the client accepts anything, meaning the provider's native format. Raises a 406
+    ``APIException`` when the Accept header only lists audio types we cannot produce.
+    """
+    if requested is not None:
+        return AudioFormat(requested)
+    if not accept:
+        return None
+    media_types = _rank_accept(accept)
+    for media_type in media_types:
+        if media_type in ("*/*", "audio/*"):
+            return None
+        if media_type in ACCEPT_TYPES:
+            return ACCEPT_TYPES[media_type]
+    if any(media_type.startswith("audio/") for media_type in media_types):
+        raise APIException(
+            message="None of the requested audio types are supported",
+            status_code=406,
+            error_code="UNSUPPORTED_AUDIO_FORMAT",
+            details={"accept": accept, "supported": sorted(ACCEPT_TYPES)},
+        )
+    return None
+
+
+def encode_audio(audio_array: np.ndarray, sample_rate: int, audio_format: AudioFormat = AudioFormat.WAV) -> bytes:
+    """Encode a float or int16 array as a complete WAV, MP3 or Ogg Opus file."""
+    import soundfile as sf
+
+    audio_format = AudioFormat(audio_format)
+    if audio_format == AudioFormat.OPUS and sample_rate not in OPUS_SAMPLE_RATES:
+        audio_array, sample_rate = resample(audio_array, sample_rate, 48000), 48000
+    container, subtype = _SOUNDFILE_FORMATS[audio_format]
+    buf = io.BytesIO()
+    with stage_timer(f"{audio_format.value}_encode"):
+        sf.write(buf, audio_array, sample_rate, format=container, subtype=subtype)
+    return buf.getvalue()
+
+
+def transcode_audio(data: bytes, audio_format: AudioFormat) -> bytes:
+    """Decode a complete clip in any format libsndfile reads and re-encode it."""
+    import soundfile as sf
+
+    audio_array, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+    return encode_audio(audio_array, sample_rate, audio_format)
+
+
+def stitch_audio(clips: Sequence[bytes], audio_format: AudioFormat, gap_seconds: float = 0.0) -> bytes:
+    """Decode complete clips, join them as one mono track with silence between them and re-encode."""
+    import soundfile as sf
+
+    arrays = []
+    sample_rate = None
+    for clip in clips:
+        audio_array, clip_rate = sf.read(io.BytesIO(clip), dtype="float32", always_2d=True)
+        sample_rate = sample_rate or clip_rate
+        arrays.append(resample(audio_array.mean(axis=1), clip_rate, sample_rate))
+    if not arrays:
+        raise ValueError("No clips to stitch")
+    gap = np.zeros(int(sample_rate * gap_seconds), dtype=np.float32)
+    track = [arrays[0]]
+    for audio_array in arrays[1:]:
+        track.extend([gap, audio_array])
+    return encode_audio(np.concatenate(track), sample_rate, audio_format)
+
+
+def crossfade_stream(arrays: Iterable[np.ndarray], overlap: int) -> Iterator[np.ndarray]:
+    """Join consecutive clips with a linear crossfade of ``overlap`` samples, yielding audio as soon as it is final.
+
+    The last ``overlap`` samples of each clip are held back until the next clip arrives to be mixed with it.
+    """
+    tail = None
+    for audio_array in arrays:
+        audio_array = np.asarray(audio_array, dtype=np.float32)
+        if tail is None:
+            head = audio_array
+        else:
+            n = min(overlap, len(tail), len(audio_array))
+            fade = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            mixed = tail[len(tail) - n :] * (1.0 - fade) + audio_array[:n] * fade
+            head = np.concatenate([tail[: len(tail) - n], mixed, audio_array[n:]])
+        split = max(len(head) - overlap, 0)
+        if split:
+            yield head[:split]
+        tail = head[split:]
+    if tail is not None and len(tail):
+        yield tail
+
+
+def crossfade_concat(arrays: Iterable[np.ndarray], overlap: int) -> np.ndarray:
+    """Join clips into one array with ``overlap``-sample crossfades between them."""
+    return np.concatenate(list(crossfade_stream(arrays, overlap)) or [np.zeros(0, dtype=np.float32)])
+
+
+def resample(audio_array: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resample; adequate for speech going into a lossy codec."""
+    if sample_rate == target_rate or len(audio_array) == 0:
+        return audio_array
+    duration = len(audio_array) / sample_rate
+    target = np.linspace(0, duration, int(round(duration * target_rate)), endpoint=False)
+    source = np.arange(len(audio_array)) / sample_rate
+    return np.interp(target, source, audio_array).astype(np.float32)
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1) -> bytes:
+    """16-bit PCM WAV header with an open-ended length, for audio that is streamed before it is complete."""
+    byte_rate = sample_rate * channels * 2
+    return (
+        b"RIFF"
+        + struct.pack("<I", STREAMING_WAV_SIZE)
+        + b"WAVEfmt "
+        + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * 2, 16)
+        + b"data"
+        + struct.pack("<I", STREAMING_WAV_SIZE)
+    )
+
+
+def complete_wav_header(header: bytes, total_size: int) -> Optional[bytes]:
+    """Fill in the real RIFF and data sizes of a streamed WAV once its ``total_size`` is known.
+
+    ``header`` is the start of the file and must reach the data chunk. Returns the patched bytes, or None when
+    the file is not a WAV with open-ended sizes (other formats, or a WAV that was already complete).
+    """
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    if struct.unpack_from("<I", header, 4)[0] != STREAMING_WAV_SIZE:
+        return None
+    patched = bytearray(header)
+    struct.pack_into("<I", patched, 4, total_size - 8)
+    offset = 12
+    while offset + 8 <= len(patched):
+        chunk_id, chunk_size = patched[offset : offset + 4], struct.unpack_from("<I", patched, offset + 4)[0]
+        if chunk_id == b"data":
+            struct.pack_into("<I", patched, offset + 4, total_size - offset - 8)
+            return bytes(patched)
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def pcm16_wav(audio_array: np.ndarray, sample_rate: int, channels: int = 1) -> bytes:
+    """Complete 16-bit PCM WAV file built without libsndfile."""
+    pcm = to_pcm16(audio_array)
+    header = bytearray(wav_stream_header(sample_rate, channels))
+    struct.pack_into("<I", header, 4, 36 + len(pcm))
+    struct.pack_into("<I", header, 40, len(pcm))
+    return bytes(header) + pcm
+
+
+def to_pcm16(audio_array: np.ndarray) -> bytes:
+    """Convert a float array in [-1, 1] to little-endian 16-bit PCM bytes."""
+    return (np.clip(audio_array, -1.0, 1.0) * 32767).astype("<i2").tobytes()
@@ -0,0 +1,223 @@
+"""Process-wide Bark model lifecycle: preloading, readiness and idle release."""
+
+import gc
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional
+
+import injector
+import numpy as np
+import structlog
+
+from config import settings
+from utils.metrics import stage_timer
+
+# Same value as ``bark.SAMPLE_RATE``; kept here so callers do not need to import bark
+SAMPLE_RATE = 24000
+
+# Leading speaker hint added by COMEDIANIFY_PROMPT, e.g. "[MAN]"; repeated on every segment to keep the voice
+SPEAKER_TAG = re.compile(r"^\s*(\[(?:MAN|WOMAN)\])\s*")
+# Segments end after sentence punctuation or after a stage direction such as "[laughs]"
+SEGMENT_END = re.compile(r"(?<=[.!?\]])\s+")
+
+_worker_model: Optional["BarkModel"] = None
+_worker_barrier = None
+
+
+def split_segments(text: str, max_chars: int) -> list[str]:
+    """Split comedianified text at sentence and stage-direction boundaries into segments Bark renders well.
+
+    Pieces are merged back together up to ``max_chars`` so short sentences do not each pay Bark's per-call cost.
+    """
+    match = SPEAKER_TAG.match(text)
+    speaker = f"{match.group(1)} " if match else ""
+    pieces = [piece for piece in SEGMENT_END.split(text[match.end() :] if match else text.strip()) if piece]
+    segments: list[str] = []
+    for piece in pieces:
+        if segments and len(segments[-1]) + 1 + len(piece) <= max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return [f"{speaker}{segment}" for segment in segments]
+
+
+def _init_segment_worker(threads: int, barrier) -> None:
+    """Process initializer: split the CPU between workers and load this worker's own copy of the weights."""
+    global _worker_model, _worker_barrier
+    import torch
+
+    torch.set_num_threads(threads)
+    _worker_barrier = barrier
+    _worker_model = BarkModel(structlog.get_logger())
+    _worker_model.workers = 0
+    _worker_model.idle_release = 0
+    _worker_model.load()
+
+
+def _warm_segment_worker() -> None:
+    # Held until every worker has loaded, so each warm-up task lands on a different worker
+    _worker_barrier.wait()
+
+
+def _generate_segment(text: str, history_prompt: Optional[str]) -> np.ndarray:
+    return _worker_model.generate(text, history_prompt=history_prompt)
+
+
+class BarkModel:
+    """Owns the Bark weights for this process.
+
+    States: ``unloaded``, ``loading``, ``ready`` and ``failed``. Weights are loaded by ``load()`` (at startup
+    when ``BARK_PRELOAD`` is set) or on first use. With ``BARK_WORKERS`` set they live only in the segment
+    workers, which ``load()`` starts and waits for. With ``BARK_IDLE_RELEASE_SECONDS`` set, weights are freed
+    after that long without a generation and loaded again on the next one.
+    """
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.idle_release = settings.BARK_IDLE_RELEASE_SECONDS
+        self.state = "unloaded"
+        # Until the startup preload has run, an unloaded model means the first request would pay the load
+        self._preload_pending = settings.BARK_PRELOAD
+        self._lock = threading.RLock()
+        self._in_use = 0
+        self._last_used = 0.0
+        self._reaper: Optional[threading.Thread] = None
+        self.workers = settings.BARK_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def ready(self) -> bool:
+        """Loaded, or unloaded on purpose (no preload, or released when idle); not while loading or after a failure."""
+        if self.state == "unloaded":
+            return not self._preload_pending
+        return self.state == "ready"
+
+    def load(self) -> None:
+        """Load every Bark sub-model, or start the segment workers; blocks generations until the weights are in memory."""
+        with self._lock:
+            if self.state == "ready":
+                return
+            self.state = "loading"
+            self.logger.info("Loading Bark models")
+            try:
+                with stage_timer("bark_load"):
+                    if self.workers > 0:
+                        self._pool = self._start_segment_pool()
+                    else:
+                        from bark import preload_models
+
+                        preload_models()
+            except Exception as e:
+                self._preload_pending = False
+                self.state = "failed"
+                self.logger.error(f"Bark model load failed: {e}")
+                raise
+            self._preload_pending = False
+            self.state = "ready"
+            self._last_used = time.monotonic()
+            self.logger.info("Bark models ready")
+            self._start_reaper()
+
+    def generate(self, text: str, history_prompt: Optional[str] = None) -> np.ndarray:
+        """Render ``text`` to a float array at ``SAMPLE_RATE``, loading the weights first if needed."""
+        with self._lock:
+            if self.state != "ready":
+                self.load()
+            self._in_use += 1
+        try:
+            from bark import generate_audio
+
+            with stage_timer("bark_generate"):
+                return generate_audio(text, history_prompt=history_prompt, silent=True)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+
+    def generate_segments(self, segments: list[str], history_prompt: Optional[str] = None) -> Iterator[np.ndarray]:
+        """Render segments in order, in parallel on the segment process pool when ``BARK_WORKERS`` is set.
+
+        Each pool worker holds its own copy of the weights, so ``BARK_WORKERS`` multiplies Bark's memory use; this
+        process then loads none.
+        """
+        if self.workers <= 0:
+            for segment in segments:
+                yield self.generate(segment, history_prompt=history_prompt)
+            return
+        with self._lock:
+            if self.state != "ready":
+                self.load()
+            self._in_use += 1
+            pool = self._pool
+        try:
+            yield from pool.map(_generate_segment, segments, [history_prompt] * len(segments))
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+                    self.state = "failed"
+            raise
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+
+    def _start_segment_pool(self) -> ProcessPoolExecutor:
+        # Forking this process, which may already run torch threads, can deadlock the children; workers start
+        # from a fork server or a fresh interpreter and load their own weights instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_segment_worker,
+            initargs=(threads, context.Barrier(self.workers)),
+        )
+        try:
+            for future in [pool.submit(_warm_segment_worker) for _ in range(self.workers)]:
+                future.result()
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        self.logger.info(f"Started {self.workers} Bark segment workers ({method}, {threads} threads each)")
+        return pool
+
+    def release(self) -> bool:
+        """Free the weights unless a generation is running; returns whether anything was released."""
+        with self._lock:
+            if self.state != "ready" or self._in_use:
+                return False
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            else:
+                from bark.generation import clean_models
+
+                clean_models()
+                gc.collect()
+            self.state = "unloaded"
+            self.logger.info("Bark models released")
+            return True
+
+    def _start_reaper(self) -> None:
+        if self.idle_release <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._release_when_idle, name="bark-idle-release", daemon=True)
+        self._reaper.start()
+
+    def _release_when_idle(self) -> None:
+        while True:
+            time.sleep(min(self.idle_release, 30))
+            with self._lock:
+                if self.state != "ready":
+                    return
+                idle = time.monotonic() - self._last_used
+                if idle >= self.idle_release and self.release():
+                    return
@@ -1,16 +1,22 @@
 """BarkTTSService for RoboComic backend."""
 
+import io
 import os
-from typing import Tuple
+from typing import Iterator, Optional, Tuple
 
 import injector
 import numpy as np
 import structlog
 
 import models
+from config import settings
+from services.agent_manager import COMEDIAN2_ROLE
 from services.llm_service import LLMService
-from utils.resilience import ResilienceService
 
+from .audio_cache import AudioCache
+from .audio_encoding import crossfade_concat, crossfade_stream, encode_audio, to_pcm16, wav_stream_header
+from .bark_model import SAMPLE_RATE, BarkModel, split_segments
+from .comedianify_cache import ComedianifyCache
 from .tts_service import TTSService
 
 # NOTE: This must be set after imports for flake8 compliance, but before Bark is used.
@@ -18,26 +24,108 @@ os.environ["SUNO_USE_SMALL_MODELS"] = "True"
 
 
 class BarkTTSService(TTSService):
+    """Bark TTS with two caches in front of it: comedianified text (skips the LLM) and rendered arrays (skips Bark)."""
+
     @injector.inject
-    def __init__(self, logger: structlog.BoundLogger, llm_service: LLMService, resilience_service: ResilienceService):
+    def __init__(
+        self,
+        logger: structlog.BoundLogger,
+        llm_service: LLMService,
+        model: BarkModel,
+        comedianify_cache: ComedianifyCache = None,
+        audio_cache: AudioCache = None,
+    ):
         self.logger = logger
         self.llm_service = llm_service
-        self.resilience_service = resilience_service
-        self.prompt_index = 0
+        self.model = model
+        self.comedianify_cache = comedianify_cache
+        self.audio_cache = audio_cache
+        self.crossfade = int(SAMPLE_RATE * settings.BARK_CROSSFADE_MS / 1000)
+
+    def speak(
+        self, text: str, lang: str = models.Language.ENGLISH, voice_id: str = None, role: str = None
+    ) -> Tuple[np.ndarray, int]:
+        gender, speaker = self._voice(role, lang)
+        audio_array = self._cached_array(text, gender, speaker, lang)
+        if audio_array is None:
+            segments = self._segments(text, gender, lang)
+            audio_array = crossfade_concat(self.model.generate_segments(segments, speaker), self.crossfade)
+            self._cache_array(text, gender, speaker, lang, audio_array)
+        return audio_array, SAMPLE_RATE
+
+    def stream(
+        self,
+        text: str,
+        lang: str = models.Language.ENGLISH,
+        voice_id: str = None,
+        audio_format: Optional[models.AudioFormat] = None,
+        role: str = None,
+    ) -> Iterator[bytes]:
+        """Yield a streaming WAV: the header first, then PCM for each segment as soon as Bark renders it.
 
-    def speak(self, text: str, lang: str = models.Language.ENGLISH) -> Tuple[np.ndarray, int]:
-        from bark import SAMPLE_RATE, generate_audio  # moved import here to avoid test dependency
+        Compressed formats need the whole clip, so segments are rendered first and encoded once.
+        """
+        audio_format = models.AudioFormat(audio_format or self.native_format)
+        gender, speaker = self._voice(role, lang)
+        audio_array = self._cached_array(text, gender, speaker, lang)
+        if audio_array is not None:
+            rendered = iter([audio_array])
+        else:
+            rendered = self.model.generate_segments(self._segments(text, gender, lang), speaker)
+        if audio_format != models.AudioFormat.WAV:
+            if audio_array is None:
+                audio_array = crossfade_concat(rendered, self.crossfade)
+                self._cache_array(text, gender, speaker, lang, audio_array)
+            yield encode_audio(audio_array, SAMPLE_RATE, audio_format)
+            return
+        yield wav_stream_header(SAMPLE_RATE)
+        parts = []
+        for part in crossfade_stream(rendered, self.crossfade):
+            parts.append(part)
+            yield to_pcm16(part)
+        if audio_array is None and parts:
+            self._cache_array(text, gender, speaker, lang, np.concatenate(parts))
 
-        # Alternate gender for each call
-        gender = "MAN" if self.prompt_index == 0 else "WOMAN"
-        self.prompt_index = (self.prompt_index + 1) % 2
+    @staticmethod
+    def _voice(role: Optional[str], lang: str) -> Tuple[str, Optional[str]]:
+        """Pick the (gender, Bark speaker preset) for a request from its speaker role.
 
-        @self.resilience_service.resilient_llm_call()
-        def _process_text():
-            # Comedianify the text using the LLM
+        The second comedian gets the second voice and anything else the first, so the same line always renders
+        the same way regardless of request order or of how the ElevenLabs voice ids are configured.
+        """
+        if role == COMEDIAN2_ROLE:
+            gender, speaker = "WOMAN", settings.BARK_COMEDIAN2_SPEAKER
+        else:
+            gender, speaker = "MAN", settings.BARK_COMEDIAN1_SPEAKER
+        return gender, speaker.format(lang=getattr(lang, "value", lang)) or None
+
+    def _segments(self, text: str, gender: str, lang: str) -> list[str]:
+        """Comedianify the line (through the cache) and split it into segments Bark can render independently."""
+        comedianified_text = self.comedianify_cache.get(text, gender, lang) if self.comedianify_cache else None
+        if comedianified_text is None:
+            # comedianify_text is already guarded by LLMService's retry, circuit breaker and bulkhead
             comedianified_text = self.llm_service.comedianify_text(text, gender=gender, lang=lang)
-            self.logger.debug(f"Comedianified text: {comedianified_text}")
-            audio_array = generate_audio(comedianified_text)
-            return audio_array, SAMPLE_RATE
+            # comedianify_text falls back to the original text on failure; only real rewrites are cached
+            if self.comedianify_cache is not None and comedianified_text != text:
+                self.comedianify_cache.put(text, gender, lang, comedianified_text)
+        self.logger.debug(f"Comedianified text: {comedianified_text}")
+        segments = split_segments(comedianified_text, settings.BARK_SEGMENT_MAX_CHARS)
+        self.logger.debug(f"Bark segments: {len(segments)}")
+        return segments
+
+    @staticmethod
+    def _array_key(text: str, gender: str, speaker: Optional[str], lang: str) -> str:
+        return AudioCache.make_key(f"bark:{gender}:{speaker or ''}", text, lang, "npy")
+
+    def _cached_array(self, text: str, gender: str, speaker: Optional[str], lang: str) -> Optional[np.ndarray]:
+        if self.audio_cache is None:
+            return None
+        data = self.audio_cache.get(self._array_key(text, gender, speaker, lang))
+        return np.load(io.BytesIO(data), allow_pickle=False) if data is not None else None
 
-        return _process_text()
+    def _cache_array(self, text: str, gender: str, speaker: Optional[str], lang: str, audio_array: np.ndarray) -> None:
+        if self.audio_cache is None:
+            return
+        buf = io.BytesIO()
+        np.save(buf, np.asarray(audio_array, dtype=np.float32), allow_pickle=False)
+        self.audio_cache.put(self._array_key(text, gender, speaker, lang), buf.getvalue())
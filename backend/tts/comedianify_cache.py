@@ -0,0 +1,104 @@
+"""Memoization of comedianified text in front of Bark."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+
+import injector
+import structlog
+
+from config import settings
+
+
+class ComedianifyCache:
+    """Bounded in-memory LRU of LLM rewrites keyed by (text, gender, lang), with an optional SQLite tier.
+
+    The disk tier (``COMEDIANIFY_CACHE_PATH``) survives restarts and is shared by every process on the host;
+    like ``TopicContextCache`` it opens a short-lived connection per operation.
+    """
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.memory_items = settings.COMEDIANIFY_CACHE_MEMORY_ITEMS
+        self.path = settings.COMEDIANIFY_CACHE_PATH
+        self.max_items = settings.COMEDIANIFY_CACHE_MAX_ITEMS
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_enabled = bool(self.path) and self.max_items > 0
+        if self.disk_enabled:
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS comedianify ("
+                        "key TEXT PRIMARY KEY, rewritten TEXT NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS comedianify_accessed ON comedianify (accessed_at)")
+            except sqlite3.Error as e:
+                self.logger.warning(f"Comedianify disk cache disabled: {e}")
+                self.disk_enabled = False
+
+    @staticmethod
+    def make_key(text: str, gender: str, lang: str) -> str:
+        raw = "\0".join([str(getattr(lang, "value", lang)), gender, text])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, gender: str, lang: str) -> Optional[str]:
+        key = self.make_key(text, gender, lang)
+        with self._lock:
+            rewritten = self._memory.get(key)
+            if rewritten is not None:
+                self._memory.move_to_end(key)
+                return rewritten
+        if not self.disk_enabled:
+            return None
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute("SELECT rewritten FROM comedianify WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE comedianify SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Comedianify cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        self._remember(key, row[0])
+        return row[0]
+
+    def put(self, text: str, gender: str, lang: str, rewritten: str) -> None:
+        if not rewritten:
+            return
+        key = self.make_key(text, gender, lang)
+        self._remember(key, rewritten)
+        if not self.disk_enabled:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO comedianify (key, rewritten, accessed_at) VALUES (?, ?, ?)",
+                    (key, rewritten, time.time()),
+                )
+                conn.execute(
+                    "DELETE FROM comedianify WHERE key NOT IN "
+                    "(SELECT key FROM comedianify ORDER BY accessed_at DESC LIMIT ?)",
+                    (self.max_items,),
+                )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Comedianify cache write failed: {e}")
+
+    def _remember(self, key: str, rewritten: str) -> None:
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = rewritten
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
@@ -1,33 +1,59 @@
 """ElevenTTSService for RoboComic backend."""
 
+from typing import Iterator, Optional
+
 import injector
+import numpy as np
 import requests
 import structlog
+from requests.adapters import HTTPAdapter
 
+from config import settings
 from config.settings import COMEDIAN1_VOICE_ID, ELEVENLABS_API_KEY
+from models import AudioFormat
+from utils.metrics import stage_timer
 from utils.resilience import ResilienceService
 
+from .audio_encoding import encode_audio, wav_stream_header
 from .tts_service import TTSService
 
+MP3_OUTPUT_FORMAT = "mp3_44100_128"
+# Raw PCM is requested for formats ElevenLabs cannot produce itself and encoded here
+PCM_SAMPLE_RATE = 24000
+PCM_OUTPUT_FORMAT = f"pcm_{PCM_SAMPLE_RATE}"
+
 
 class ElevenTTSService(TTSService):
+    native_format = AudioFormat.MP3
+
     @injector.inject
     def __init__(self, logger: structlog.BoundLogger, resilience_service: ResilienceService):
         self.logger = logger
         self.resilience_service = resilience_service
         self.api_key = ELEVENLABS_API_KEY
         self.base_url = "https://api.elevenlabs.io/v1/text-to-speech/"
+        self.timeout = (settings.ELEVENLABS_CONNECT_TIMEOUT, settings.ELEVENLABS_READ_TIMEOUT)
+        self.session = self._create_session(settings.ELEVENLABS_POOL_SIZE)
 
-    def speak(self, text: str, lang: str = None, voice_id: str = COMEDIAN1_VOICE_ID) -> bytes:
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Create a keep-alive session so retries and concurrent /tts calls reuse TLS connections."""
+        session = requests.Session()
+        # Retries are handled by ResilienceService, so the adapter itself never retries
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+        session.mount("https://", adapter)
+        session.headers.update({"xi-api-key": self.api_key, "Content-Type": "application/json"})
+        return session
+
+    def speak(self, text: str, lang: str = None, voice_id: str = COMEDIAN1_VOICE_ID, role: str = None) -> bytes:
         self.logger.info(f"TTS request to ElevenLabs: voice_id={voice_id}, text_length={len(text)}")
 
         @self.resilience_service.resilient_tts_call()
         def _make_tts_request():
             url = f"{self.base_url}{voice_id}"
-            headers = {"xi-api-key": self.api_key, "Content-Type": "application/json"}
             data = {"text": text, "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}}
 
-            response = requests.post(url, headers=headers, json=data)
+            with stage_timer("elevenlabs"):
+                response = self.session.post(url, json=data, timeout=self.timeout)
             response.raise_for_status()
             self.logger.info(f"ElevenLabs TTS successful: {len(response.content)} bytes")
             return response.content
@@ -37,3 +63,65 @@ class ElevenTTSService(TTSService):
         except requests.exceptions.RequestException as e:
             self.logger.error(f"ElevenLabs TTS failed: {str(e)}")
             raise
+
+    def stream(
+        self,
+        text: str,
+        lang: str = None,
+        voice_id: str = None,
+        audio_format: Optional[AudioFormat] = None,
+        role: str = None,
+    ) -> Iterator[bytes]:
+        """Stream audio from ElevenLabs' streaming endpoint, forwarding chunks as they arrive.
+
+        MP3 is passed through as ElevenLabs produces it and WAV is streamed as raw PCM behind a WAV header.
+        Opus needs the whole clip, so the PCM is buffered and encoded once the stream ends.
+        """
+        voice_id = voice_id or COMEDIAN1_VOICE_ID
+        audio_format = AudioFormat(audio_format or self.native_format)
+        output_format = MP3_OUTPUT_FORMAT if audio_format == AudioFormat.MP3 else PCM_OUTPUT_FORMAT
+        self.logger.info(
+            f"Streaming TTS request to ElevenLabs: voice_id={voice_id}, text_length={len(text)}, format={output_format}"
+        )
+
+        # Only opening the stream is retried; once audio has been forwarded a failure cannot be replayed. The
+        # bulkhead slot is held below until the body is read, so attempts here do not take their own
+        @self.resilience_service.resilient_tts_call(slot=False)
+        def _open_stream():
+            url = f"{self.base_url}{voice_id}/stream"
+            data = {"text": text, "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}}
+
+            with stage_timer("elevenlabs"):
+                response = self.session.post(
+                    url, json=data, params={"output_format": output_format}, timeout=self.timeout, stream=True
+                )
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError:
+                response.close()
+                raise
+            return response
+
+        with self.resilience_service.bulkheads["tts"].slot():
+            try:
+                response = _open_stream()
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"ElevenLabs TTS stream failed: {str(e)}")
+                raise
+            with response, self.resilience_service.streamed_body("tts"):
+                yield from self._forward(response, audio_format)
+
+    def _forward(self, response: requests.Response, audio_format: AudioFormat) -> Iterator[bytes]:
+        chunks = (chunk for chunk in response.iter_content(chunk_size=settings.TTS_STREAM_CHUNK_SIZE) if chunk)
+        total = 0
+        if audio_format == AudioFormat.OPUS:
+            pcm = b"".join(chunks)
+            total = len(pcm) - len(pcm) % 2
+            yield encode_audio(np.frombuffer(pcm[:total], dtype="<i2"), PCM_SAMPLE_RATE, AudioFormat.OPUS)
+        else:
+            if audio_format == AudioFormat.WAV:
+                yield wav_stream_header(PCM_SAMPLE_RATE)
+            for chunk in chunks:
+                total += len(chunk)
+                yield chunk
+        self.logger.info(f"ElevenLabs TTS stream finished: {total} bytes")
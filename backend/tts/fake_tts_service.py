@@ -0,0 +1,61 @@
+"""FakeTTSService for offline development and load testing."""
+
+import time
+from typing import Iterator, Optional
+
+import injector
+import numpy as np
+import structlog
+
+from config import settings
+from models import AudioFormat, Language
+
+from .audio_encoding import pcm16_wav, to_pcm16, wav_stream_header
+from .tts_service import TTSService
+
+SAMPLE_RATE = 16000
+
+
+class FakeTTSService(TTSService):
+    """Returns silent WAV audio sized like real speech for the text, after a configurable delay.
+
+    The first byte arrives after ``FAKE_TTS_LATENCY_MS`` and the rest is paced at ``FAKE_TTS_SPEED`` times
+    real time, so streaming, caching and rate limits behave as they would against a real provider.
+    """
+
+    native_format = AudioFormat.WAV
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.latency = settings.FAKE_TTS_LATENCY_MS / 1000
+        self.speed = settings.FAKE_TTS_SPEED
+        self.chars_per_second = settings.FAKE_TTS_CHARS_PER_SECOND
+
+    def _silence(self, text: str) -> np.ndarray:
+        return np.zeros(int(SAMPLE_RATE * len(text) / self.chars_per_second), dtype=np.float32)
+
+    def speak(self, text: str, lang: str = Language.ENGLISH, voice_id: str = None, role: str = None) -> bytes:
+        audio_array = self._silence(text)
+        time.sleep(self.latency + len(audio_array) / SAMPLE_RATE / self.speed)
+        return pcm16_wav(audio_array, SAMPLE_RATE)
+
+    def stream(
+        self,
+        text: str,
+        lang: str = Language.ENGLISH,
+        voice_id: Optional[str] = None,
+        audio_format: Optional[AudioFormat] = None,
+        role: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        if AudioFormat(audio_format or self.native_format) != AudioFormat.WAV:
+            yield from super().stream(text, lang=lang, voice_id=voice_id, audio_format=audio_format, role=role)
+            return
+        pcm = to_pcm16(self._silence(text))
+        time.sleep(self.latency)
+        yield wav_stream_header(SAMPLE_RATE)
+        chunk_size = settings.TTS_STREAM_CHUNK_SIZE
+        for start in range(0, len(pcm), chunk_size):
+            chunk = pcm[start : start + chunk_size]
+            time.sleep(len(chunk) / 2 / SAMPLE_RATE / self.speed)
+            yield chunk
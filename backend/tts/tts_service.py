@@ -1,20 +1,60 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, Union
+from typing import Iterator, Optional, Tuple, Union
 
 import numpy as np
 
-from models import Language
+from models import AudioFormat, Language
 
 
 class TTSService(ABC):
+    # Format ``speak`` returns audio in, used when the client does not ask for one
+    native_format: AudioFormat = AudioFormat.WAV
+
     @abstractmethod
-    def speak(self, text: str, lang: str = Language.ENGLISH) -> Union[bytes, Tuple[np.ndarray, int]]:
+    def speak(
+        self, text: str, lang: str = Language.ENGLISH, voice_id: Optional[str] = None, role: Optional[str] = None
+    ) -> Union[bytes, Tuple[np.ndarray, int]]:
         """Convert text to speech audio.
 
         Args:
             text: Text to convert to speech
             lang: Language code (e.g., 'en', 'pl')
+            voice_id: Optional provider voice ID
+            role: Optional speaker role (e.g., 'Comedian_1'), for providers that pick a voice per comedian
 
         Returns:
             Audio data as bytes (ElevenLabs) or tuple of (audio_array, sample_rate) (Bark)
         """
+
+    def stream(
+        self,
+        text: str,
+        lang: str = Language.ENGLISH,
+        voice_id: Optional[str] = None,
+        audio_format: Optional[AudioFormat] = None,
+        role: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """Convert text to speech, yielding encoded audio chunks as soon as they are available.
+
+        The default implementation synthesizes the whole clip with ``speak`` and yields it as one chunk;
+        providers that can produce audio incrementally override it.
+
+        Args:
+            text: Text to convert to speech
+            lang: Language code (e.g., 'en', 'pl')
+            voice_id: Optional provider voice ID
+            audio_format: Output format, defaults to ``native_format``
+            role: Optional speaker role (e.g., 'Comedian_1'), for providers that pick a voice per comedian
+
+        Yields:
+            Chunks of encoded audio
+        """
+        from .audio_encoding import encode_audio, transcode_audio
+
+        audio_format = audio_format or self.native_format
+        audio = self.speak(text, lang=lang, voice_id=voice_id, role=role)
+        if isinstance(audio, tuple):
+            audio = encode_audio(*audio, audio_format)
+        elif audio_format != self.native_format:
+            audio = transcode_audio(audio, audio_format)
+        yield audio
@@ -13,6 +13,7 @@ from services.llm_service import LLMService
 from tts.tts_service import TTSService
 
 
+@injector.singleton
 class UIService:
     """Service class for Streamlit UI with dependency injection."""
 
@@ -53,13 +54,20 @@ class UIService:
 
     def generate_show(self, comedian1_style, comedian2_style, lang, mode, topic, num_rounds):
         """Generate the show and update session state."""
-        self.agent_manager.set_personas(comedian1_style, comedian2_style, lang=lang)
         for k in list(st.session_state.keys()):
             if k.startswith("audio_"):
                 del st.session_state[k]
         with st.spinner(TRANSLATIONS[lang].get("please_wait", "Generating show, please wait...")):
             context = self.llm_service.generate_topic_context(topic, lang) if mode == Mode.TOPICAL else ""
-            history = self.agent_manager.run_duel(mode, topic, max_rounds=num_rounds, lang=lang, context=context)
+            history = self.agent_manager.run_duel(
+                mode,
+                topic,
+                max_rounds=num_rounds,
+                lang=lang,
+                context=context,
+                persona1=COMEDIAN_PERSONAS[comedian1_style],
+                persona2=COMEDIAN_PERSONAS[comedian2_style],
+            )
         for msg in history:
             msg["content"] = self.clean_response(msg["role"], msg["content"])
         st.session_state["history"] = history
@@ -82,7 +90,7 @@ class UIService:
             st.markdown(f'<div class="{bubble_class}">{content}</div>', unsafe_allow_html=True)
             if voice_mode:
                 if st.button("Play ⏵", key=play_key):
-                    audio_result = self.tts_service.speak(content, lang=lang)
+                    audio_result = self.tts_service.speak(content, lang=lang, role=msg["role"])
                     st.session_state[audio_key] = audio_result
                 if audio_key in st.session_state:
                     audio_result = st.session_state[audio_key]
@@ -5,10 +5,12 @@ from .exceptions import (
     ConfigurationException,
     RoboComicException,
     TTSServiceException,
+    UpstreamUnavailableException,
     ValidationException,
 )
 from .logger import get_logger, setup_logger
 from .resilience import ResilienceService
+from .sse import format_sse_event
 
 __all__ = [
     "setup_logger",
@@ -19,8 +21,10 @@ __all__ = [
     "ConfigurationException",
     "ValidationException",
     "APIException",
+    "UpstreamUnavailableException",
     "validation_exception_handler",
     "robocomic_exception_handler",
     "general_exception_handler",
     "ResilienceService",
+    "format_sse_event",
 ]
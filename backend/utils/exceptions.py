@@ -30,3 +30,11 @@ class APIException(RoboComicException):
     def __init__(self, message: str, status_code: int = 500, error_code: str = None, details: dict = None):
         super().__init__(message, error_code, details)
         self.status_code = status_code
+
+
+class UpstreamUnavailableException(APIException):
+    """Raised without calling an upstream (LLM or TTS) when its circuit is open or its bulkhead is full."""
+
+    def __init__(self, upstream: str, error_code: str, message: str, details: dict = None):
+        super().__init__(message, status_code=503, error_code=error_code, details={"upstream": upstream, **(details or {})})
+        self.upstream = upstream
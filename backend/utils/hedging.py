@@ -0,0 +1,136 @@
+"""Hedged requests: race a duplicate call against a slow one to cut tail latency."""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Callable, Optional, TypeVar
+
+import injector
+import structlog
+
+from config import settings
+
+from .metrics import HEDGES
+
+T = TypeVar("T")
+
+# Latencies kept per operation, and how many are needed before its percentile is trusted
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+# Unused hedge budget that can be saved up for a burst of slow calls
+MAX_SAVED_HEDGES = 2.0
+
+
+class LatencyWindow:
+    """Recent latencies of one operation, used to pick the hedge delay."""
+
+    def __init__(self, size: int = LATENCY_WINDOW):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The ``q``-th percentile (0-100) of the window, or None until ``MIN_SAMPLES`` calls were recorded."""
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class RequestHedger:
+    """Fires a duplicate of a call that is still running after its operation's ``LLM_HEDGE_PERCENTILE`` latency.
+
+    ``ResilienceService`` hedges single upstream attempts, inside its retry loop, so a slow attempt never starts a
+    second retry sequence and the latency windows only hold per-attempt times.
+    Whichever call succeeds first wins. The other is cancelled if it has not started yet. A blocking HTTP call
+    that is already running cannot be interrupted, so its result is dropped when it arrives. Every call earns
+    ``LLM_HEDGE_BUDGET`` of a hedge, and a hedge is only fired when a whole one has been earned. This keeps
+    duplicates under that fraction of all calls. No hedges are fired until an operation has ``MIN_SAMPLES``
+    latencies on record.
+    """
+
+    @injector.inject
+    def __init__(self, logger: structlog.BoundLogger):
+        self.logger = logger
+        self.enabled = settings.LLM_HEDGING_ENABLED
+        self.percentile = settings.LLM_HEDGE_PERCENTILE
+        self.min_delay = settings.LLM_HEDGE_MIN_DELAY
+        self.budget = settings.LLM_HEDGE_BUDGET
+        self._saved = 0.0
+        self._windows: dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def call(self, operation: str, func: Callable[[], T]) -> T:
+        if not self.enabled:
+            return func()
+        window = self._window(operation)
+        delay = window.percentile(self.percentile)
+        self._earn()
+        primary = self._executor().submit(copy_context().run, self._timed, func)
+        if delay is None:
+            return self._finish(window, primary)
+        done, _ = wait([primary], timeout=max(delay, self.min_delay))
+        if done:
+            return self._finish(window, primary)
+        if not self._spend():
+            HEDGES.labels(operation=operation, outcome="over_budget").inc()
+            return self._finish(window, primary)
+
+        HEDGES.labels(operation=operation, outcome="fired").inc()
+        self.logger.debug(f"Hedging {operation} after {delay:.2f}s")
+        hedge = self._executor().submit(copy_context().run, self._timed, func)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    HEDGES.labels(operation=operation, outcome="won").inc()
+                return self._finish(window, future)
+        raise error
+
+    @staticmethod
+    def _timed(func: Callable[[], T]) -> tuple[T, float]:
+        start = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    def _finish(window: LatencyWindow, future) -> T:
+        result, elapsed = future.result()
+        window.record(elapsed)
+        return result
+
+    def _window(self, operation: str) -> LatencyWindow:
+        with self._lock:
+            return self._windows.setdefault(operation, LatencyWindow())
+
+    def _earn(self) -> None:
+        with self._lock:
+            self._saved = min(self._saved + self.budget, MAX_SAVED_HEDGES)
+
+    def _spend(self) -> bool:
+        with self._lock:
+            if self._saved < 1.0:
+                return False
+            self._saved -= 1.0
+            return True
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Room for a primary and a hedge for every call the LLM bulkhead lets through
+                self._pool = ThreadPoolExecutor(max_workers=2 * settings.LLM_BULKHEAD_SIZE, thread_name_prefix="llm-hedge")
+            return self._pool
@@ -0,0 +1,24 @@
+"""Heavy modules kept out of API cold start and loaded in the background once the server is up."""
+
+import importlib
+import time
+
+import structlog
+
+# Imported on first use by LLMService, ComedianAgent and AgentManager; ``main`` must not import them eagerly
+HEAVY_MODULES = ["autogen", "langchain_openai", "langchain.output_parsers", "langchain.prompts", "langsmith"]
+
+
+def preload_heavy_modules(logger: structlog.BoundLogger = None) -> float:
+    """Import every module in ``HEAVY_MODULES`` and return how long it took in seconds."""
+    start = time.perf_counter()
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            if logger is not None:
+                logger.warning(f"Background import of {name} failed: {e}")
+    elapsed = time.perf_counter() - start
+    if logger is not None:
+        logger.info(f"Heavy modules loaded in {elapsed:.2f}s")
+    return elapsed
@@ -0,0 +1,248 @@
+"""Prometheus metrics shared by the API process and the show worker processes."""
+
+import fcntl
+import multiprocessing.util
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+from config import settings
+
+# Must be set before prometheus_client is imported so every process writes to the shared multiprocess store
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.METRICS_DIR)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402  # isort: skip
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402  # isort: skip
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "robocomic_http_request_duration_seconds",
+    "HTTP request latency by endpoint, until the whole response body (including streamed ones) is sent",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "robocomic_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+STAGE_DURATION = Histogram(
+    "robocomic_stage_duration_seconds",
+    "Latency of internal stages (topic_context, duel_turn, duel_summary, judge, comedianify, elevenlabs, bark_load, bark_generate, "
+    "wav_encode, mp3_encode, opus_encode)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "robocomic_llm_tokens_total",
+    "LLM tokens by stage (topic_context, duel_turn, duel_summary, judge, comedianify) and kind (prompt or completion)",
+    ["stage", "kind"],
+)
+LLM_COST = Counter("robocomic_llm_cost_usd_total", "Estimated LLM spend in USD by stage", ["stage"])
+LLM_REQUEST_TOKENS = Histogram(
+    "robocomic_llm_request_tokens",
+    "Total LLM tokens used to serve one request",
+    ["request"],
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+)
+RETRIES = Counter("robocomic_retries_total", "Retries scheduled by ResilienceService", ["operation"])
+CIRCUIT_STATE = Gauge(
+    "robocomic_circuit_state",
+    "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open); the worst state across live processes",
+    ["upstream"],
+    multiprocess_mode="livemax",
+)
+HEDGES = Counter(
+    "robocomic_llm_hedges_total",
+    "Hedged LLM calls by operation and outcome (fired, won or over_budget)",
+    ["operation", "outcome"],
+)
+UPSTREAM_REJECTIONS = Counter(
+    "robocomic_upstream_rejections_total",
+    "Calls rejected without reaching the upstream, by reason (circuit_open or bulkhead_full)",
+    ["upstream", "reason"],
+)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Record how long the wrapped block takes under ``robocomic_stage_duration_seconds{stage=...}``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware timing each request until its response body is fully sent.
+
+    ``robocomic_http_request_duration_seconds`` and the in-flight gauge therefore cover the whole stream of a
+    streamed response, while the ``X-Process-Time`` header, sent with the headers, is the time to first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        from starlette.datastructures import MutableHeaders
+
+        start_time = time.time()
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=scope["method"])
+        in_flight.inc()
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Process-Time", str(time.time() - start_time))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            in_flight.dec()
+            # Use the route template so path parameters (job ids) don't explode label cardinality
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"], endpoint=getattr(route, "path", "unmatched"), status=str(status)
+            ).observe(time.time() - start_time)
+
+
+class CountingThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool that counts calls waiting for a thread (``queued``) and running on one (``running``)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queued = 0
+        self.running = 0
+        self._counts_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._counts_lock:
+            self.queued += 1
+        try:
+            future = super().submit(self._run, fn, *args, **kwargs)
+        except BaseException:
+            self._count(queued=-1)
+            raise
+        # Calls cancelled before they started (e.g. on shutdown) never reach _run
+        future.add_done_callback(lambda f: f.cancelled() and self._count(queued=-1))
+        return future
+
+    def _run(self, fn, *args, **kwargs):
+        self._count(queued=-1, running=1)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._count(running=-1)
+
+    def _count(self, queued: int = 0, running: int = 0) -> None:
+        with self._counts_lock:
+            self.queued += queued
+            self.running += running
+
+
+class GaugeCollector:
+    """Collector for point-in-time values (queue depths, in-flight counts) read at scrape time."""
+
+    def __init__(self, gauges: Callable[[], Iterable[tuple[str, str, float]]]):
+        self.gauges = gauges
+
+    def collect(self):
+        for name, documentation, value in self.gauges():
+            yield GaugeMetricFamily(name, documentation, value=value)
+
+
+# Per-process files in the multiprocess directory: samples (``counter_<pid>.db``) and start markers
+_PROCESS_FILE = re.compile(r"_(\d+)\.(?:db|pid)$")
+_RESET_LOCK = "reset.lock"
+# Sample files of live-mode gauges, which must be removed once their process is gone
+_LIVE_GAUGE_FILE = re.compile(r"^gauge_live\w+_(\d+)\.db$")
+_exit_hook_registered = False
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def reset_multiprocess_dir() -> bool:
+    """Remove samples left behind by earlier runs, unless another live process is already using the directory.
+
+    Safe to call from every API process (``uvicorn --workers``, restarted workers): only the first process of a
+    run clears the directory, and it never removes its own files. Returns whether the directory was cleared.
+    """
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    me = os.getpid()
+    with open(os.path.join(path, _RESET_LOCK), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        owners = {name: int(match.group(1)) for name in os.listdir(path) if (match := _PROCESS_FILE.search(name))}
+        in_use = any(pid != me and _pid_alive(pid) for pid in owners.values())
+        if not in_use:
+            for name, pid in owners.items():
+                if pid != me:
+                    _remove(os.path.join(path, name))
+        # Tells processes started later in this run that the directory is in use, even before this one writes samples
+        open(os.path.join(path, f"started_{me}.pid"), "w").close()
+    return not in_use
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def mark_dead_on_exit() -> None:
+    """Drop this process's live-gauge samples when it exits; call from worker processes that may be recycled."""
+    global _exit_hook_registered
+    if _exit_hook_registered:
+        return
+    # Finalizers run on a worker's normal exit, unlike atexit handlers, which multiprocessing children skip
+    multiprocessing.util.Finalize(None, multiprocess.mark_process_dead, args=(os.getpid(),), exitpriority=0)
+    _exit_hook_registered = True
+
+
+def sweep_dead_processes() -> None:
+    """Drop live-gauge samples left by processes that died without cleaning up (e.g. a killed worker)."""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for name in os.listdir(path):
+        match = _LIVE_GAUGE_FILE.match(name)
+        if match and not _pid_alive(int(match.group(1))):
+            multiprocess.mark_process_dead(int(match.group(1)), path)
+
+
+def render_metrics(*collectors) -> tuple[bytes, str]:
+    """Aggregate samples from every process plus the given scrape-time collectors."""
+    sweep_dead_processes()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -2,12 +2,28 @@
 
 import functools
 import logging
-from typing import Any, Callable, TypeVar
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Iterator, Optional, TypeVar
 
 import injector
 import requests
 import structlog
-from tenacity import before_sleep_log, retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from config import settings
+
+from .exceptions import RoboComicException, UpstreamUnavailableException
+from .hedging import RequestHedger
+from .metrics import CIRCUIT_STATE, RETRIES, UPSTREAM_REJECTIONS
 
 T = TypeVar("T")
 
@@ -22,13 +38,163 @@ RETRYABLE_EXCEPTIONS = (
     OSError,
 )
 
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitBreaker:
+    """Fail fast while an upstream is down.
+
+    ``closed`` lets every call through and opens after ``failure_threshold`` consecutive failures. ``open``
+    rejects calls until ``reset_timeout`` has passed, then turns ``half_open`` and lets up to ``half_open_probes``
+    calls through: a successful probe closes the circuit, a failed one opens it again.
+    """
+
+    def __init__(
+        self,
+        upstream: str,
+        logger: structlog.BoundLogger,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_probes: int = 1,
+    ):
+        self.upstream = upstream
+        self.logger = logger
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(upstream=upstream).set(0)
+
+    @contextmanager
+    def guard(self, is_failure: Callable[[BaseException], bool]) -> Iterator[None]:
+        """Run the wrapped call if the circuit allows it and record its outcome; raises if the circuit is open."""
+        probe = self._admit()
+        try:
+            yield
+        except BaseException as e:
+            if is_failure(e):
+                self._record_failure()
+            elif probe:
+                with self._lock:
+                    self._probes = max(0, self._probes - 1)
+            raise
+        self._record_success()
+
+    def _admit(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise self._rejection(remaining)
+                self._transition("half_open")
+            if self.state == "half_open":
+                if self._probes >= self.half_open_probes:
+                    raise self._rejection(0.0)
+                self._probes += 1
+                return True
+            return False
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state != "closed":
+                self._transition("closed")
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold > 0):
+                self._opened_at = time.monotonic()
+                self._transition("open")
+
+    def _transition(self, state: str) -> None:
+        self.logger.warning(f"Circuit for {self.upstream} {self.state} -> {state} after {self.failures} failures")
+        self.state = state
+        self._probes = 0
+        CIRCUIT_STATE.labels(upstream=self.upstream).set(CIRCUIT_STATES[state])
+
+    def _rejection(self, retry_after: float) -> UpstreamUnavailableException:
+        UPSTREAM_REJECTIONS.labels(upstream=self.upstream, reason="circuit_open").inc()
+        return UpstreamUnavailableException(
+            self.upstream,
+            "CIRCUIT_OPEN",
+            f"{self.upstream.upper()} service temporarily unavailable",
+            details={"retry_after": round(retry_after, 1)},
+        )
+
+
+class Bulkhead:
+    """Cap concurrent calls to one upstream so a slow outage cannot take every thread or worker with it."""
+
+    def __init__(self, upstream: str, size: int, wait: float):
+        self.upstream = upstream
+        self.size = size
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        if not self._slots.acquire(timeout=self.wait):
+            UPSTREAM_REJECTIONS.labels(upstream=self.upstream, reason="bulkhead_full").inc()
+            raise UpstreamUnavailableException(
+                self.upstream,
+                "BULKHEAD_FULL",
+                f"Too many concurrent {self.upstream.upper()} calls",
+                details={"limit": self.size},
+            )
+        try:
+            yield
+        finally:
+            self._slots.release()
+
 
 class ResilienceService:
-    """Service for providing resilient API calls with proper IoC logging."""
+    """Service for providing resilient API calls with proper IoC logging.
+
+    Calls to the ``llm`` and ``tts`` upstreams also go through a per-upstream ``CircuitBreaker`` and ``Bulkhead``.
+    Both are per process, so each show worker learns about an outage on its own. With a ``RequestHedger``, calls
+    that name a ``hedge`` operation hedge each attempt on its own, inside the retry loop.
+    """
 
     @injector.inject
-    def __init__(self, logger: structlog.BoundLogger):
+    def __init__(self, logger: structlog.BoundLogger, hedger: RequestHedger = None):
         self.logger = logger
+        self.hedger = hedger
+        self.breakers = {
+            upstream: CircuitBreaker(
+                upstream,
+                logger,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_SECONDS,
+                half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+            )
+            for upstream in ("llm", "tts")
+        }
+        self.bulkheads = {
+            "llm": Bulkhead("llm", settings.LLM_BULKHEAD_SIZE, settings.BULKHEAD_WAIT_SECONDS),
+            "tts": Bulkhead("tts", settings.TTS_BULKHEAD_SIZE, settings.BULKHEAD_WAIT_SECONDS),
+        }
+
+    def circuit_states(self) -> dict[str, str]:
+        return {upstream: breaker.state for upstream, breaker in self.breakers.items()}
+
+    @contextmanager
+    def streamed_body(self, upstream: str, exceptions: tuple = RETRYABLE_EXCEPTIONS) -> Iterator[None]:
+        """Record errors while reading an already opened response as failures of ``upstream``'s circuit breaker.
+
+        Opening the stream went through ``resilient_api_call``; a body that breaks off halfway cannot be retried
+        but still says the upstream is unhealthy.
+        """
+        try:
+            yield
+        except exceptions as e:
+            if not isinstance(e, RoboComicException):
+                self.breakers[upstream]._record_failure()
+            raise
 
     def resilient_api_call(
         self,
@@ -36,6 +202,10 @@ class ResilienceService:
         base_wait: float = 1.0,
         max_wait: float = 10.0,
         exceptions: tuple = RETRYABLE_EXCEPTIONS,
+        operation: str = "api",
+        upstream: Optional[str] = None,
+        hedge: Optional[str] = None,
+        slot: bool = True,
     ) -> Callable[[Callable[..., T]], Callable[..., T]]:
         """
         Decorator for resilient external API calls with exponential backoff.
@@ -45,18 +215,41 @@ class ResilienceService:
             base_wait: Base wait time in seconds
             max_wait: Maximum wait time in seconds
             exceptions: Tuple of exceptions that should trigger retries
+            operation: Label for the retry counter (api, llm or tts)
+            upstream: Circuit breaker and bulkhead guarding each attempt (llm or tts); rejections are not retried
+            hedge: Operation name under which each attempt is hedged; a duplicate takes its own bulkhead slot
+            slot: Take a bulkhead slot per attempt; False when the caller already holds one for the whole call
         """
+        log_retry = before_sleep_log(self.logger, logging.WARNING)
+        breaker = self.breakers.get(upstream)
+        bulkhead = self.bulkheads.get(upstream)
+
+        def is_failure(e: BaseException) -> bool:
+            # Our own errors (empty replies, bad input) say nothing about the upstream's health
+            return isinstance(e, exceptions) and not isinstance(e, RoboComicException)
+
+        def before_sleep(retry_state):
+            RETRIES.labels(operation=operation).inc()
+            log_retry(retry_state)
 
         def decorator(func: Callable[..., T]) -> Callable[..., T]:
             @functools.wraps(func)
             @retry(
                 stop=stop_after_attempt(max_attempts),
                 wait=wait_exponential(multiplier=base_wait, max=max_wait),
-                retry=retry_if_exception_type(exceptions),
-                before_sleep=before_sleep_log(self.logger, logging.WARNING),
+                retry=retry_if_exception_type(exceptions) & retry_if_not_exception_type(UpstreamUnavailableException),
+                before_sleep=before_sleep,
             )
             def wrapper(*args: Any, **kwargs: Any) -> T:
-                return func(*args, **kwargs)
+                def attempt() -> T:
+                    if breaker is None:
+                        return func(*args, **kwargs)
+                    with breaker.guard(is_failure), bulkhead.slot() if slot else nullcontext():
+                        return func(*args, **kwargs)
+
+                if hedge is not None and self.hedger is not None:
+                    return self.hedger.call(hedge, attempt)
+                return attempt()
 
             return wrapper
 
@@ -67,6 +260,7 @@ class ResilienceService:
         max_attempts: int = 1,  # Reduced to minimize conversation state loss
         base_wait: float = 1.0,  # Faster retry for conversation-level calls
         max_wait: float = 3.0,  # Shorter max wait
+        hedge: Optional[str] = None,
     ) -> Callable[[Callable[..., T]], Callable[..., T]]:
         """
         Decorator specifically for LLM API calls with conservative retry settings.
@@ -75,12 +269,16 @@ class ResilienceService:
             max_attempts: Maximum number of retry attempts (lower for LLM calls)
             base_wait: Base wait time in seconds
             max_wait: Maximum wait time in seconds
+            hedge: Operation name under which each attempt is hedged (see ``RequestHedger``)
         """
         return self.resilient_api_call(
             max_attempts=max_attempts,
             base_wait=base_wait,
             max_wait=max_wait,
             exceptions=(Exception,),  # Broader exception handling for LLM calls
+            operation="llm",
+            upstream="llm",
+            hedge=hedge,
         )
 
     def resilient_tts_call(
@@ -88,6 +286,7 @@ class ResilienceService:
         max_attempts: int = 3,
         base_wait: float = 1.0,
         max_wait: float = 5.0,
+        slot: bool = True,
     ) -> Callable[[Callable[..., T]], Callable[..., T]]:
         """
         Decorator specifically for TTS API calls.
@@ -96,10 +295,14 @@ class ResilienceService:
             max_attempts: Maximum number of retry attempts
             base_wait: Base wait time in seconds
             max_wait: Maximum wait time in seconds
+            slot: Take a bulkhead slot per attempt; False when the caller already holds one for the whole call
         """
         return self.resilient_api_call(
             max_attempts=max_attempts,
             base_wait=base_wait,
             max_wait=max_wait,
             exceptions=RETRYABLE_EXCEPTIONS,
+            operation="tts",
+            upstream="tts",
+            slot=slot,
         )
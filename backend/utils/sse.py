@@ -0,0 +1,9 @@
+"""Server-Sent Events helpers."""
+
+import json
+from typing import Any
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """Serialize a single Server-Sent Event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
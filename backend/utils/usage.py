@@ -0,0 +1,99 @@
+"""Token and cost accounting for LLM calls, per call, per stage and per request."""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional, TypeVar
+
+import structlog
+
+from config import settings
+
+from .metrics import LLM_COST, LLM_REQUEST_TOKENS, LLM_TOKENS
+
+T = TypeVar("T")
+
+_current: ContextVar[Optional["UsageTracker"]] = ContextVar("llm_usage", default=None)
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost from the configured per-million-token prices."""
+    return (
+        prompt_tokens * settings.LLM_PROMPT_PRICE_PER_MTOK + completion_tokens * settings.LLM_COMPLETION_PRICE_PER_MTOK
+    ) / 1_000_000
+
+
+class UsageTracker:
+    """Tokens and cost of every LLM call made on behalf of one request, by stage."""
+
+    def __init__(self, request: str):
+        self.request = request
+        self.stages: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, prompt_tokens: int, completion_tokens: int, cost: float) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+
+    def totals(self) -> dict:
+        with self._lock:
+            stages = {stage: dict(totals, cost_usd=round(totals["cost_usd"], 6)) for stage, totals in self.stages.items()}
+        return {
+            "llm_calls": sum(s["calls"] for s in stages.values()),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in stages.values()),
+            "completion_tokens": sum(s["completion_tokens"] for s in stages.values()),
+            "cost_usd": round(sum(s["cost_usd"] for s in stages.values()), 6),
+            "stages": stages,
+        }
+
+    @contextmanager
+    def active(self) -> Iterator["UsageTracker"]:
+        """Attribute LLM calls made in the wrapped block (and threads it starts with a copied context) to this tracker."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        with self.active():
+            return func(*args, **kwargs)
+
+    def report(self, logger: structlog.BoundLogger) -> None:
+        totals = self.totals()
+        LLM_REQUEST_TOKENS.labels(request=self.request).observe(totals["prompt_tokens"] + totals["completion_tokens"])
+        logger.info("LLM usage", request=self.request, **totals)
+
+
+@contextmanager
+def track_usage(request: str, logger: structlog.BoundLogger) -> Iterator[UsageTracker]:
+    """Collect LLM usage for a request and log it when the block ends.
+
+    Nested inside another tracked request (e.g. the judge called while generating a show), calls are added to the
+    outer request instead.
+    """
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    tracker = UsageTracker(request)
+    try:
+        with tracker.active():
+            yield tracker
+    finally:
+        tracker.report(logger)
+
+
+def record_llm_usage(stage: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Count one LLM call's tokens under ``stage`` and add them to the current request, if any."""
+    cost = llm_cost(prompt_tokens, completion_tokens)
+    LLM_TOKENS.labels(stage=stage, kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(stage=stage, kind="completion").inc(completion_tokens)
+    LLM_COST.labels(stage=stage).inc(cost)
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.add(stage, prompt_tokens, completion_tokens, cost)